@@ -12,19 +12,24 @@ cdef size_t H1_A8_ANTIDIAGONAL = 0x0102040810204080
 cdef size_t LIGHT_SQUARES = 0x55AA55AA55AA55AA
 cdef size_t DARK_SQUARES = 0xAA55AA55AA55AA55
 
-cpdef size_t BSF(size_t b)
-cpdef size_t BSR(size_t b)
-cpdef size_t POPCOUNT(size_t b)
+cpdef size_t BSF(size_t b) nogil
+cpdef size_t BSR(size_t b) nogil
+cpdef size_t POPCOUNT(size_t b) nogil
 
 cpdef void initBitboards()
 cpdef size_t SQUARE_TO_BITBOARD[64]
 
+# Attack sets of the leaping pieces, indexed by square. Pawn attacks are indexed by color first.
+cdef size_t KNIGHT_ATTACKS[64]
+cdef size_t KING_ATTACKS[64]
+cdef size_t PAWN_ATTACKS[2][64]
 
-cpdef size_t eastOne(size_t b)
-cpdef size_t westOne(size_t b)
-cpdef size_t northOne(size_t b)
-cpdef size_t southOne(size_t b)
 
-cpdef size_t northFill(size_t b)
-cpdef size_t southFill(size_t b)
-cpdef size_t fileFill(size_t b)
\ No newline at end of file
+cpdef size_t eastOne(size_t b) nogil
+cpdef size_t westOne(size_t b) nogil
+cpdef size_t northOne(size_t b) nogil
+cpdef size_t southOne(size_t b) nogil
+
+cpdef size_t northFill(size_t b) nogil
+cpdef size_t southFill(size_t b) nogil
+cpdef size_t fileFill(size_t b) nogil
\ No newline at end of file
@@ -37,27 +37,40 @@ BITBOARD_TO_SQUARE = {}
 
 cpdef void initBitboards():
 	# Provides access to a bitboard array to quickly switch between square number and bitboard representation.
+	cdef size_t b, east, west
 	for i in range(64):
 		SQUARE_TO_BITBOARD[i] = <size_t> 0x01 << i
 		BITBOARD_TO_SQUARE[np.uint64(0x01)] = i
 
-cpdef size_t eastOne(size_t b):
+		# Leaper attacks, built from the one-step shifts.
+		# https://www.chessprogramming.org/Knight_Pattern
+		# https://www.chessprogramming.org/King_Pattern
+		b = SQUARE_TO_BITBOARD[i]
+		east = eastOne(b)
+		west = westOne(b)
+		KNIGHT_ATTACKS[i] = (northOne(northOne(east | west)) | southOne(southOne(east | west))
+							| northOne(eastOne(east) | westOne(west)) | southOne(eastOne(east) | westOne(west)))
+		KING_ATTACKS[i] = east | west | northOne(b | east | west) | southOne(b | east | west)
+		PAWN_ATTACKS[0][i] = northOne(east | west)
+		PAWN_ATTACKS[1][i] = southOne(east | west)
+
+cpdef size_t eastOne(size_t b) nogil:
 	return (b << 1) & ~A_FILE
 
 cpdef eastOneCython(size_t b):
 	cdef size_t afile = 0x0101010101010101
 	return b << 1 & ~afile
 
-cpdef size_t westOne(size_t b):
+cpdef size_t westOne(size_t b) nogil:
 	return b >> 1 & ~H_FILE
 
-cpdef size_t northOne(size_t b):
+cpdef size_t northOne(size_t b) nogil:
 	return b << 8
 
 cpdef northOneCython(size_t b):
 	return b << 8
 
-cpdef size_t southOne(size_t b):
+cpdef size_t southOne(size_t b) nogil:
 	return b >> 8
 
 # These are called Kogge-Stone algorithms.
@@ -76,19 +89,19 @@ def southFill(b) -> np.uint64():
 	return b
 '''
 
-cpdef size_t northFill(size_t b):
+cpdef size_t northFill(size_t b) nogil:
 	b |= b << 8
 	b |= b << 16
 	b |= b << 32
 	return b
 
-cpdef size_t southFill(size_t b):
+cpdef size_t southFill(size_t b) nogil:
 	b |= b >> 8
 	b |= b >> 16
 	b |= b >> 32
 	return b
 
-cpdef size_t fileFill(size_t b):
+cpdef size_t fileFill(size_t b) nogil:
 	return northFill(b) | southFill(b)
 
 bsf_index = [0,  1, 48,  2, 57, 49, 28,  3,
@@ -127,9 +140,14 @@ def BSF2(b: int):
 	debruijn64 = 0x03f79d71b4cb0a89
 	return bsf_index[c_uint64((b ^ (b-1)) * debruijn64).value  >> 58]
 
-cpdef size_t BSF(size_t b):
+# C copy of the table above, so the bit scan runs without the GIL.
+cdef int BSF_INDEX[64]
+for _i in range(64):
+	BSF_INDEX[_i] = bsf2_index[_i]
+
+cpdef size_t BSF(size_t b) nogil:
 	cdef size_t debruijn64 = 0x03f79d71b4cb0a89
-	return bsf2_index[((b ^ (b-1)) * debruijn64) >> 58]
+	return BSF_INDEX[((b ^ (b-1)) * debruijn64) >> 58]
 
 cpdef runBSFRepeated(size_t n):
 	cy = timeit.timeit('bb.BSF3(10483)', setup='import bitboard as bb', number=n)
@@ -155,12 +173,16 @@ bsr_index = [0, 47,  1, 56, 48, 27,  2, 60,
    34, 51, 20, 43, 31, 22, 10, 45,
    25, 39, 14, 33, 19, 30,  9, 24,
    13, 18,  8, 12,  7,  6,  5, 63]
+cdef int BSR_INDEX[64]
+for _i in range(64):
+	BSR_INDEX[_i] = bsr_index[_i]
+
 # Bit Scan Reverse using De Bruijn multiplication
 # Undefined for b == 0
 # Returns the index of the most significant one bit
 # https://www.chessprogramming.org/BitScan#De_Bruijn_Multiplication_2
 # authors Kim Walisch, Mark Dickinson
-cpdef size_t BSR(size_t b):
+cpdef size_t BSR(size_t b) nogil:
 	cdef size_t debruijn64 = 0x03f79d71b4cb0a89
 	# assert b != 0
 	b |= b >> 0x01
@@ -169,7 +191,7 @@ cpdef size_t BSR(size_t b):
 	b |= b >> 0x08
 	b |= b >> 0x10
 	b |= b >> 0x20
-	return bsr_index[(b * debruijn64) >> 58]
+	return BSR_INDEX[(b * debruijn64) >> 58]
 
 # https://www.chessprogramming.org/Population_Count#Brian_Kernighan.27s_way
 '''
@@ -181,7 +203,7 @@ def POPCOUNT(b) -> int:
 	return count
 '''
 
-cpdef size_t POPCOUNT(size_t b):
+cpdef size_t POPCOUNT(size_t b) nogil:
 	cdef size_t count = 0
 	while (b):
 		count += 1
@@ -195,4 +217,5 @@ def generateEmptyBoard():
 	pass
 
 def wIsInCheck():
-	pass
\ No newline at end of file
+	pass
+initBitboards()
@@ -1,23 +1,253 @@
+from libc.stdint cimport int8_t, uint32_t, uint64_t
+
+from parsers cimport FenState
+
+# Moves are packed into 32 bits:
+#   bits  0-5   origin square
+#   bits  6-11  destination square
+#   bits 12-15  flag
+#   bits 16-18  captured piece type (NO_PIECE if nothing is captured)
+#   bits 19-21  promotion piece type (NO_PIECE if the move does not promote)
+# https://www.chessprogramming.org/Encoding_Moves
+ctypedef uint32_t move_t
+
+cdef enum:
+	QUIET = 0x00
+	DOUBLE_PAWN_PUSH = 0x01
+	KING_CASTLE = 0x02
+	QUEEN_CASTLE = 0x03
+	CAPTURE = 0x04
+	EP_CAPTURE = 0x05
+	KNIGHT_PROMOTION = 0x08
+	BISHOP_PROMOTION = 0x09
+	ROOK_PROMOTION = 0x0A
+	QUEEN_PROMOTION = 0x0B
+	KNIGHT_PROMOTION_CAPTURE = 0x0C
+	BISHOP_PROMOTION_CAPTURE = 0x0D
+	ROOK_PROMOTION_CAPTURE = 0x0E
+	QUEEN_PROMOTION_CAPTURE = 0x0F
+
+	NO_PIECE = 7
+	NULL_MOVE = 0
+
+# C-level copies of the piece and color constants in constants.py.
+cdef enum:
+	PAWN = 0
+	KNIGHT = 1
+	BISHOP = 2
+	ROOK = 3
+	QUEEN = 4
+	KING = 5
+
+	WHITE = 0
+	BLACK = 1
+
+cdef inline int INVERT(int color) nogil:
+	return color ^ 1
+
+# Castling rights are kept as a 4-bit mask.
+cdef enum:
+	WHITE_KINGSIDE = 1
+	WHITE_QUEENSIDE = 2
+	BLACK_KINGSIDE = 4
+	BLACK_QUEENSIDE = 8
+
+	NO_SQUARE = 64
+
+# C-level names of the squares castling moves touch. Python code uses the Square enum.
+cdef enum:
+	A1 = 0
+	B1 = 1
+	C1 = 2
+	D1 = 3
+	E1 = 4
+	F1 = 5
+	G1 = 6
+	H1 = 7
+	A8 = 56
+	B8 = 57
+	C8 = 58
+	D8 = 59
+	E8 = 60
+	F8 = 61
+	G8 = 62
+	H8 = 63
+
+cdef inline move_t encodeMove(int origin, int destination, int flag, int captured) nogil:
+	return origin | (destination << 6) | (flag << 12) | (captured << 16) | (NO_PIECE << 19)
+
+cdef inline move_t encodePromotion(int origin, int destination, int flag, int captured, int promotion) nogil:
+	return origin | (destination << 6) | (flag << 12) | (captured << 16) | (promotion << 19)
+
+cdef inline int moveOrigin(move_t move) nogil:
+	return move & 0x3F
+
+cdef inline int moveDestination(move_t move) nogil:
+	return (move >> 6) & 0x3F
+
+cdef inline int moveFlag(move_t move) nogil:
+	return (move >> 12) & 0x0F
+
+cdef inline int moveCaptured(move_t move) nogil:
+	return (move >> 16) & 0x07
+
+cdef inline int movePromotion(move_t move) nogil:
+	return (move >> 19) & 0x07
+
+cdef enum:
+	MAX_MOVES = 256
+
+# The generators write into a plain struct, so a search can keep one per ply without the GIL.
+cdef struct MoveBuffer:
+	move_t moves[MAX_MOVES]
+	int count
+
+cdef class MoveList:
+	cdef MoveBuffer buffer
+
+	cdef Py_ssize_t shape[1]
+	cdef Py_ssize_t strides[1]
+
+cdef inline void addMove(MoveBuffer *moves, move_t move) nogil:
+	moves.moves[moves.count] = move
+	moves.count += 1
+
+# Everything CBoard needs to restore itself, as one fixed-size block of plain data.
+cdef struct BoardState:
+	uint64_t bitboards[2][6]
+	int8_t mailbox[64]
+	size_t whiteBoard
+	size_t blackBoard
+	size_t occupied
+	size_t key
+
+# Snapshot of a Position for copy-make.
+# https://www.chessprogramming.org/Copy-Make
+cdef struct PositionState:
+	BoardState board
+	int side
+	int castling
+	int epSquare
+	int halfmoveClock
+	size_t stateKey
+
+# What make/unmake can't recover from the move itself. The move already carries the captured piece.
+cdef struct UndoState:
+	int castling
+	int epSquare
+	int halfmoveClock
+	size_t stateKey
+
 cdef class CBoard:
 
-    cdef public fen
-    cdef public list pieceBoards
+	cdef public fen
+
+	# Piece bitboards indexed [color][piece], and the piece type on each square (NO_PIECE if empty).
+	# Python code goes through the pieceBoards and pieceLocations properties.
+	cdef uint64_t bitboards[2][6]
+	cdef int8_t mailbox[64]
+
+	cdef public size_t whiteBoard
+	cdef public size_t blackBoard
+	#self.whiteBoard = None
+	#self.blackBoard = None
+	cdef public size_t occupied
+
+	# Zobrist key of the pieces on the board. Position folds in the rest of the state.
+	cdef readonly size_t key
+
+	cdef void load(self, fen, const FenState *state) except *
+
+	cdef void removePiece(self, int color, int piece, size_t bbSquare) nogil
+	cdef void putPiece(self, int piece, int color, int square) nogil
+	cdef int pieceOn(self, int square) nogil
+	cdef int pieceTypeOn(self, int color, int square) nogil
+
+	# When set, every doMove/undoMove verifies the incremental state with checkConsistency.
+	cdef public bint debug
+
+	cdef void saveState(self, BoardState *state) nogil
+	cdef void restoreState(self, const BoardState *state) nogil
+
+	cpdef updateColorBoards(self)
+	cpdef void checkConsistency(self) except *
+
+	# attackersTo and isSquareAttacked for C callers.
+	cdef size_t attackers(self, int square, size_t occupied) nogil
+	cdef size_t colorAttackers(self, int square, size_t occupied, int color) nogil
+	cdef bint attacked(self, int square, int byColor) nogil
+	cpdef size_t attacksBy(self, int color)
+
+	cpdef size_t computeKey(self)
+
+	cdef void doMove(self, move_t move, int color) nogil
+	cdef void undoMove(self, move_t move, int color) nogil
+
+cdef class Position:
+
+	cdef public object parent
+	cdef public CBoard board
+
+	cdef public int halfmove_clock
+	cdef public int fullmove_number
+
+	# Side to move, castling rights and en passant target square.
+	# Python code reads and writes them through the sideToMove, wkCastle, ... and epTargetSquare
+	# properties, which keep stateKey in step.
+	cdef readonly int side
+	cdef readonly int castling
+	cdef readonly int epSquare
+
+	# Zobrist key of the side to move, castling rights and en passant file.
+	# The full key of the position is board.key ^ stateKey.
+	cdef size_t stateKey
+
+	cdef public list moveSequence
+
+	# Irreversible state from before each move, pushed by doMove and popped by undoMove.
+	cdef UndoState *undoStack
+	cdef int undoCount
+	cdef int undoCapacity
+
+	# With copy-make, doMove pushes a snapshot of the whole position here and undoMove pops it.
+	cdef readonly bint copyMake
+	cdef PositionState *states
+	cdef int stateCount
+	cdef int stateCapacity
+
+	# Make room on the undo stacks for plies more moves.
+	cdef void reserve(self, int plies) except *
+	cdef void pushUndo(self) nogil
+	cdef void pushState(self) nogil
+	cdef void popState(self) nogil
+
+	cdef public bint debug
 
-    cdef public list pieceLocations
+	# One preallocated move buffer per ply, so walking the tree does not allocate.
+	cdef list moveLists
 
-    cdef public size_t whiteBoard
-    cdef public size_t blackBoard
-    #self.whiteBoard = None
-    #self.blackBoard = None
-    cdef public size_t occupied
+	cdef MoveList moveListAt(self, int ply)
 
-    cpdef removePiece(self, color, piece, bbSquare)
-    cpdef putPiece(self, piece, color, square)
-    
-    cpdef updateColorBoards(self)
+	cdef void setSide(self, int side) nogil
+	cdef void setCastling(self, int castling) nogil
+	cdef void setEpSquare(self, int square) nogil
+	cpdef size_t computeKey(self)
 
-    
+	# doMove and undoMove check their input, keep moveSequence and log in debug mode.
+	# The search calls applyMove and revertMove, which do none of that and run without the GIL;
+	# reserve room on the undo stacks before calling applyMove.
+	cdef void doMove(self, move_t move) except *
+	cdef void undoMove(self, move_t move) except *
+	cdef void applyMove(self, move_t move) nogil
+	cdef void revertMove(self, move_t move) nogil
 
+	# score() in centipawns, from the side to move's point of view.
+	cdef int evaluate(self) nogil
 
+	cpdef long traverse(self, int ply) except -1
+	cpdef long perft(self, int depth) except -1
 
+cdef inline size_t positionKey(Position position) nogil:
+	return position.board.key ^ position.stateKey
 
+cdef move_t toEncodedMove(move) except? 0
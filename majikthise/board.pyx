@@ -3,13 +3,20 @@
 
 from dataclasses import dataclass
 from enum import IntEnum
-from copy import deepcopy
 
 import numpy as np
-import re
+
+from cpython.buffer cimport PyBUF_WRITABLE
+from libc.stdint cimport uint64_t
+from libc.stdlib cimport malloc, realloc, free
+from libc.string cimport memcpy
 
 from bitboard cimport *
+from magics cimport bishopMagicAttacks, rookMagicAttacks, queenMagicAttacks
+from parsers cimport FenState, parseFen
+from zobrist cimport *
 from constants import *
+from parsers import STARTING_FEN
 
 from cython.operator import dereference
 
@@ -136,36 +143,17 @@ class Dir(IntEnum):
 	SOUTH_WEST = 7
 
 class Fen:
+	''' Piece and castling lookups on a FEN string, parsed once by parsers.parseFen. '''
 	def __init__(self, fen: str):
-		if fen is None:
-			self.fen = 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1'
-		else:
-			self.fen = fen
-		#self.occupied = _occupied()
+		cdef FenState state
+		self.fen = STARTING_FEN if fen is None else fen
+		parseFen(self.fen, &state)
+		self.bitboards = [[state.bitboards[color][piece] for piece in range(6)] for color in range(2)]
+		self.castling = state.castling
 
 	def findPiece(self, pieceType):
-		cdef size_t bb = 0
-		squareIdx = 56
-		idx = 0
-		while squareIdx >= 0:
-			char = self.fen[idx]
-			if char == '/' or char == ' ':
-				idx += 1
-				squareIdx -= 16
-				continue
-			elif char == pieceType:
-				bb |= <size_t> 1 << squareIdx
-				idx += 1
-				squareIdx += 1
-			elif char.isnumeric():
-				idx += 1
-				squareIdx += int(char)
-				#squareIdx += np.uint64(int(char))
-			else:
-				idx += 1
-				squareIdx += 1
-
-		return bb
+		index = 'PNBRQKpnbrqk'.index(pieceType)
+		return self.bitboards[index // 6][index % 6]
 
 	def whitePawns(self):
 		return self.findPiece('P')
@@ -204,199 +192,592 @@ class Fen:
 		return self.findPiece('k')
 
 	def whiteKingCastle(self):
-		return 1 if re.search('[wb]\s.*K', self.fen) else 0
+		return 1 if self.castling & WHITE_KINGSIDE else 0
 
 	def whiteQueenCastle(self):
-		return 1 if re.search('[wb]\s.*Q', self.fen) else 0
+		return 1 if self.castling & WHITE_QUEENSIDE else 0
 
 	def blackKingCastle(self):
-		return 1 if re.search('[wb]\s.*k', self.fen) else 0
+		return 1 if self.castling & BLACK_KINGSIDE else 0
 
 	def blackQueenCastle(self):
-		return 1 if re.search('[wb]\s.*q', self.fen) else 0
+		return 1 if self.castling & BLACK_QUEENSIDE else 0
+
+cdef class MoveList:
+	'''
+	Fixed-capacity buffer of packed moves that the generators write into directly.
+	It supports the buffer protocol, so memoryview(moveList) exposes the moves as unsigned 32-bit ints.
+	'''
+	@property
+	def count(self):
+		return self.buffer.count
+
+	def __len__(self):
+		return self.buffer.count
+
+	def __getitem__(self, int i):
+		if i < 0:
+			i += self.buffer.count
+		if i < 0 or i >= self.buffer.count:
+			raise IndexError('MoveList index out of range')
+		return self.buffer.moves[i]
+
+	def clear(self):
+		self.buffer.count = 0
+
+	def __getbuffer__(self, Py_buffer *buffer, int flags):
+		if flags & PyBUF_WRITABLE:
+			raise BufferError('MoveList buffers are read-only')
+
+		self.shape[0] = self.buffer.count
+		self.strides[0] = sizeof(move_t)
+
+		buffer.buf = <char *> &self.buffer.moves[0]
+		buffer.format = b'I'
+		buffer.internal = NULL
+		buffer.itemsize = sizeof(move_t)
+		buffer.len = self.buffer.count * sizeof(move_t)
+		buffer.ndim = 1
+		buffer.obj = self
+		buffer.readonly = 1
+		buffer.shape = self.shape
+		buffer.strides = self.strides
+		buffer.suboffsets = NULL
+
+	def __releasebuffer__(self, Py_buffer *buffer):
+		pass
 
 cdef class CBoard:
 	def __init__(self, fen_str: str = None):
-		self.fen = Fen(fen_str)
-
-		# Access the piece boards through self.pieceBoards[color][piece]
-		self.pieceBoards = [[self.fen.whitePawns(), 
-							self.fen.whiteKnights(), 
-							self.fen.whiteBishops(),
-							self.fen.whiteRooks(),
-							self.fen.whiteQueens(),
-							self.fen.whiteKing()],
-							[self.fen.blackPawns(), 
-							self.fen.blackKnights(), 
-							self.fen.blackBishops(),
-							self.fen.blackRooks(),
-							self.fen.blackQueens(),
-							self.fen.blackKing()]]
-
-		self.pieceLocations = [None] * 64
-	
-		self.whiteBoard = 0
-		self.blackBoard = 0
-		#self.whiteBoard = None
-		#self.blackBoard = None
-		self.occupied = 0
+		cdef FenState state
+		parseFen(STARTING_FEN if fen_str is None else fen_str, &state)
+		self.debug = False
+		self.load(fen_str, &state)
+
+	cdef void load(self, fen, const FenState *state) except *:
+		# Python code reads and writes the piece boards through self.pieceBoards[color][piece].
+		self.fen = STARTING_FEN if fen is None else fen
+		memcpy(self.bitboards, state.bitboards, sizeof(self.bitboards))
 		self.updateColorBoards()
-		self.onInitUpdatePieceLocations()
-
 
 	def __eq__(self, other: 'CBoard'):
 		return (self.pieceBoards == other.pieceBoards
 				and self.whiteBoard == other.whiteBoard
 				and self.blackBoard == other.blackBoard)
 
-	def doubledPawnCount(self, sideToMove: Color) -> int:
-		pawnBoard = self.pieceBoards[WHITE][PAWN] if sideToMove == WHITE else self.pieceBoards[BLACK][PAWN]
-		_file = A_FILE
-		
-		count = 0
-		for _ in range(7):
-			pawns_on_this_file = POPCOUNT(_file & pawnBoard)
-			if pawns_on_this_file > 1:
-				count += pawns_on_this_file
-			_file <<= 1
+	@property
+	def pieceBoards(self):
+		''' The piece bitboards, indexable as pieceBoards[color][piece]. Assigning through it writes the C array. '''
+		return PieceBoards(self)
+
+	@property
+	def pieceLocations(self):
+		''' Piece type on each square, or None if it is empty. A copy of the mailbox. '''
+		return [None if self.mailbox[square] == NO_PIECE else self.mailbox[square] for square in range(64)]
 
-		return count
+	def doubledPawnCount(self, sideToMove: Color) -> int:
+		return doubledPawns(self.bitboards[sideToMove][PAWN])
 
 	def isolanis(self, sideToMove: Color) -> np.uint64():
-		#https://www.chessprogramming.org/Isolated_Pawns_(Bitboards)
-		pawnBoard = self.pieceBoards[WHITE][PAWN] if sideToMove == WHITE else self.pieceBoards[BLACK][PAWN]
-		fill = pawnBoard & ~fileFill(eastOne(pawnBoard))
-		fill &= pawnBoard & ~fileFill(westOne(pawnBoard))
-		return fill
+		return isolatedPawns(self.bitboards[sideToMove][PAWN])
 
 	def isolatedPawnCount(self, sideToMove: Color) -> int:
 		return POPCOUNT(self.isolanis(sideToMove))
 		
 	def blockedPawnCount(self, sideToMove: Color) -> int:
-		if sideToMove == WHITE:
-			return POPCOUNT(northOne(self.pieceBoards[WHITE][PAWN]) & self.occupied)
-		else:
-			return POPCOUNT(southOne(self.pieceBoards[BLACK][PAWN]) & self.occupied)
+		return blockedPawns(self, sideToMove)
 
 	def makeMove(self, move: 'Move', color):
-		if move.flag == 0x04:
+		self.doMove(toEncodedMove(move), color)
+		if self.debug:
+			self.checkConsistency()
+
+	def unmakeMove(self, move: 'Move', color):
+		self.undoMove(toEncodedMove(move), color)
+		if self.debug:
+			self.checkConsistency()
+
+	cdef void doMove(self, move_t move, int color) nogil:
+		cdef int origin = moveOrigin(move)
+		cdef int destination = moveDestination(move)
+		cdef int flag = moveFlag(move)
+		cdef int movingPiece
+
+		if flag == EP_CAPTURE:
+			# The captured pawn sits behind the destination square.
+			self.removePiece(INVERT(color), PAWN, SQUARE_TO_BITBOARD[destination - 8 if color == WHITE else destination + 8])
+		elif flag & CAPTURE:
 			# Remove the captured piece.
 			# Add color and piece type to this call. removePiece is one of the slowest functions due to branching.
-			self.removePiece(INVERT(color), move.capturedPieceType, move.destination.bitboard())
-		# TODO Handle en passant and promotions and double pawn pushes
+			self.removePiece(INVERT(color), moveCaptured(move), SQUARE_TO_BITBOARD[destination])
 
-		movingPiece = self.pieceTypeAtSquare(move.origin)
-		self.removePiece(color, movingPiece, move.origin.bitboard())
-		self.putPiece(movingPiece, color, move.destination)
+		movingPiece = self.pieceOn(origin)
+		self.removePiece(color, movingPiece, SQUARE_TO_BITBOARD[origin])
+		if flag & KNIGHT_PROMOTION:
+			self.putPiece(movePromotion(move), color, destination)
+		else:
+			self.putPiece(movingPiece, color, destination)
 
-		if move.flag == 0x02:
+		if flag == KING_CASTLE:
 			# King Castle. Move the rook. Reset castling flags
 			if color == WHITE:
-				self.removePiece(color, ROOK, Square.H1.bitboard())
-				self.putPiece(ROOK, WHITE, Square.F1)
+				self.removePiece(color, ROOK, SQUARE_TO_BITBOARD[H1])
+				self.putPiece(ROOK, WHITE, F1)
 			else:
-				self.removePiece(color, ROOK, Square.H8.bitboard())
-				self.putPiece(ROOK, BLACK, Square.F8)
+				self.removePiece(color, ROOK, SQUARE_TO_BITBOARD[H8])
+				self.putPiece(ROOK, BLACK, F8)
 
-		if move.flag == 0x03:
+		if flag == QUEEN_CASTLE:
 			# Queen Castle. Move the rook.
 			if color == WHITE:
-				self.removePiece(color, ROOK, Square.A1.bitboard())
-				self.putPiece(ROOK, WHITE, Square.D1)
+				self.removePiece(color, ROOK, SQUARE_TO_BITBOARD[A1])
+				self.putPiece(ROOK, WHITE, D1)
 			else:
-				self.removePiece(color, ROOK, Square.A8.bitboard())
-				self.putPiece(ROOK, BLACK, Square.D8)
-
-		self.updateColorBoards()
-		
-
-	def unmakeMove(self, move: 'Move', color):
-		movingPiece = self.pieceTypeAtSquare(move.destination)
-		self.removePiece(color, movingPiece, move.destination.bitboard())
-		self.putPiece(movingPiece, color, move.origin)
+				self.removePiece(color, ROOK, SQUARE_TO_BITBOARD[A8])
+				self.putPiece(ROOK, BLACK, D8)
+
+	cdef void undoMove(self, move_t move, int color) nogil:
+		cdef int origin = moveOrigin(move)
+		cdef int destination = moveDestination(move)
+		cdef int flag = moveFlag(move)
+		cdef int movingPiece = self.pieceOn(destination)
+
+		self.removePiece(color, movingPiece, SQUARE_TO_BITBOARD[destination])
+		if flag & KNIGHT_PROMOTION:
+			self.putPiece(PAWN, color, origin)
+		else:
+			self.putPiece(movingPiece, color, origin)
 
-		if move.flag == 0x02:
+		if flag == KING_CASTLE:
 			# King Castle. Put the rook back.
 			if color == WHITE:
-				self.removePiece(color, ROOK, Square.F1.bitboard())
-				self.putPiece(ROOK, WHITE, Square.H1)
+				self.removePiece(color, ROOK, SQUARE_TO_BITBOARD[F1])
+				self.putPiece(ROOK, WHITE, H1)
 			else:
-				self.removePiece(color, ROOK, Square.F8.bitboard())
-				self.putPiece(ROOK, BLACK, Square.H8)
-		
-		if move.flag == 0x03:
+				self.removePiece(color, ROOK, SQUARE_TO_BITBOARD[F8])
+				self.putPiece(ROOK, BLACK, H8)
+
+		if flag == QUEEN_CASTLE:
 			# Queen Castle. Put the rook back.
 			if color == WHITE:
-				self.removePiece(color, ROOK, Square.D1.bitboard())
-				self.putPiece(ROOK, WHITE, Square.A1)
+				self.removePiece(color, ROOK, SQUARE_TO_BITBOARD[D1])
+				self.putPiece(ROOK, WHITE, A1)
 			else:
-				self.removePiece(color, ROOK, Square.D8.bitboard())
-				self.putPiece(ROOK, BLACK, Square.A8)
+				self.removePiece(color, ROOK, SQUARE_TO_BITBOARD[D8])
+				self.putPiece(ROOK, BLACK, A8)
 
-		if move.flag == 0x04:
+		if flag == EP_CAPTURE:
+			self.putPiece(PAWN, INVERT(color), destination - 8 if color == WHITE else destination + 8)
+		elif flag & CAPTURE:
 			# Puts the captured piece back.
-			self.putPiece(move.capturedPieceType, INVERT(color), move.destination)
+			self.putPiece(moveCaptured(move), INVERT(color), destination)
 
-		self.updateColorBoards()
-		
-	cpdef removePiece(self, color, piece, bbSquare):
-		self.pieceBoards[color][piece] = self.pieceBoards[color][piece] ^ bbSquare
-		self.pieceLocations[BSF(bbSquare)] = None
-		
+	cdef void removePiece(self, int color, int piece, size_t bbSquare) nogil:
+		cdef int square = BSF(bbSquare)
+		self.bitboards[color][piece] ^= bbSquare
+		if color == WHITE:
+			self.whiteBoard ^= bbSquare
+		else:
+			self.blackBoard ^= bbSquare
+		self.occupied ^= bbSquare
+		self.mailbox[square] = NO_PIECE
+		self.key ^= PIECE_KEYS[color][piece][square]
+
+	cdef void putPiece(self, int piece, int color, int square) nogil:
+		cdef size_t bbSquare = SQUARE_TO_BITBOARD[square]
+		self.bitboards[color][piece] |= bbSquare
+		if color == WHITE:
+			self.whiteBoard |= bbSquare
+		else:
+			self.blackBoard |= bbSquare
+		self.occupied |= bbSquare
+		self.mailbox[square] = piece
+		self.key ^= PIECE_KEYS[color][piece][square]
+
+	cpdef size_t computeKey(self):
+		''' Compute the Zobrist key of the pieces from scratch. Used on setup and to verify the incremental key. '''
+		cdef size_t key = 0
+		cdef size_t pieces
+		cdef int color, piece
 
-	cpdef putPiece(self, piece, color, square):
-		self.pieceBoards[color][piece] |= square.bitboard()
-		self.pieceLocations[square.value] = piece
+		for color in range(2):
+			for piece in range(6):
+				pieces = self.bitboards[color][piece]
+				while pieces:
+					key ^= PIECE_KEYS[color][piece][BSF(pieces)]
+					pieces &= pieces - 1
+
+		return key
+
+	cdef int pieceOn(self, int square) nogil:
+		return self.mailbox[square]
+
+	cdef int pieceTypeOn(self, int color, int square) nogil:
+		# Reads the piece boards rather than the mailbox, so it also works on boards set up bitboard by bitboard.
+		cdef int piece
+		for piece in range(6):
+			if self.bitboards[color][piece] & SQUARE_TO_BITBOARD[square]:
+				return piece
+		return NO_PIECE
 
 	def pieceTypeAtSquare(self, square: Square):
 		# This might be acting up. Is pieceLocations correct?
 		return self.pieceLocations[square.value]
 
 	cpdef updateColorBoards(self):
-		self.whiteBoard = self.pieceBoards[WHITE][PAWN] | self.pieceBoards[WHITE][KNIGHT] | self.pieceBoards[WHITE][BISHOP] | self.pieceBoards[WHITE][ROOK] | self.pieceBoards[WHITE][QUEEN] | self.pieceBoards[WHITE][KING]
-		self.blackBoard = self.pieceBoards[BLACK][PAWN] | self.pieceBoards[BLACK][KNIGHT] | self.pieceBoards[BLACK][BISHOP] | self.pieceBoards[BLACK][ROOK] | self.pieceBoards[BLACK][QUEEN] | self.pieceBoards[BLACK][KING]
+		'''
+		Rebuild everything derived from the piece bitboards: the color and occupancy boards,
+		the mailbox and the key. putPiece and removePiece keep these up to date, so this is
+		only needed after writing to pieceBoards directly.
+		'''
+		self.whiteBoard = self.bitboards[WHITE][PAWN] | self.bitboards[WHITE][KNIGHT] | self.bitboards[WHITE][BISHOP] | self.bitboards[WHITE][ROOK] | self.bitboards[WHITE][QUEEN] | self.bitboards[WHITE][KING]
+		self.blackBoard = self.bitboards[BLACK][PAWN] | self.bitboards[BLACK][KNIGHT] | self.bitboards[BLACK][BISHOP] | self.bitboards[BLACK][ROOK] | self.bitboards[BLACK][QUEEN] | self.bitboards[BLACK][KING]
 		self.occupied = self.whiteBoard | self.blackBoard
+		self.onInitUpdatePieceLocations()
+		self.key = self.computeKey()
+
+	cpdef void checkConsistency(self) except *:
+		''' Recompute the incrementally maintained state from the piece bitboards and raise AssertionError if it differs. '''
+		cdef size_t white = 0, black = 0, seen = 0
+		cdef int piece, square
+
+		for piece in range(6):
+			for bitboard in (self.bitboards[WHITE][piece], self.bitboards[BLACK][piece]):
+				if seen & bitboard:
+					raise AssertionError(f'Two pieces share a square: {seen & bitboard:#018x}')
+				seen |= bitboard
+			white |= self.bitboards[WHITE][piece]
+			black |= self.bitboards[BLACK][piece]
+
+		if white != self.whiteBoard or black != self.blackBoard or (white | black) != self.occupied:
+			raise AssertionError(f'Color boards out of sync: white {self.whiteBoard:#018x} != {white:#018x}, '
+								f'black {self.blackBoard:#018x} != {black:#018x}')
+
+		for square in range(64):
+			piece = self.pieceTypeOn(WHITE, square)
+			if piece == NO_PIECE:
+				piece = self.pieceTypeOn(BLACK, square)
+			if piece != self.mailbox[square]:
+				raise AssertionError(f'Mailbox out of sync on {Square(square).name}: {self.mailbox[square]} != {piece}')
+
+		if self.key != self.computeKey():
+			raise AssertionError('Zobrist key out of sync')
+
+	def attackersTo(self, int square, size_t occupied, color=None):
+		'''
+		Pieces of the given color, or of both colors if it is None, that attack the square, with
+		sliders blocked by occupied. Passing an occupancy other than self.occupied lets callers see
+		through pieces that are about to move.
+		https://www.chessprogramming.org/Square_Attacked_By#AnyAttackBySide
+		'''
+		if color is None:
+			return self.attackers(square, occupied)
+		return self.colorAttackers(square, occupied, color)
+
+	def isSquareAttacked(self, int square, int byColor):
+		return self.attacked(square, byColor)
+
+	cdef size_t attackers(self, int square, size_t occupied) nogil:
+		cdef uint64_t *white = self.bitboards[WHITE]
+		cdef uint64_t *black = self.bitboards[BLACK]
+		cdef size_t rookLike = white[ROOK] | white[QUEEN] | black[ROOK] | black[QUEEN]
+		cdef size_t bishopLike = white[BISHOP] | white[QUEEN] | black[BISHOP] | black[QUEEN]
+
+		# A pawn attacks the squares a pawn of the other color on the target square would.
+		return ((PAWN_ATTACKS[BLACK][square] & white[PAWN])
+				| (PAWN_ATTACKS[WHITE][square] & black[PAWN])
+				| (KNIGHT_ATTACKS[square] & (white[KNIGHT] | black[KNIGHT]))
+				| (KING_ATTACKS[square] & (white[KING] | black[KING]))
+				| (rookMagicAttacks(square, occupied) & rookLike)
+				| (bishopMagicAttacks(square, occupied) & bishopLike)) & occupied
+
+	cdef size_t colorAttackers(self, int square, size_t occupied, int color) nogil:
+		cdef uint64_t *pieces = self.bitboards[color]
+
+		return ((PAWN_ATTACKS[color ^ 1][square] & pieces[PAWN])
+				| (KNIGHT_ATTACKS[square] & pieces[KNIGHT])
+				| (KING_ATTACKS[square] & pieces[KING])
+				| (rookMagicAttacks(square, occupied) & (pieces[ROOK] | pieces[QUEEN]))
+				| (bishopMagicAttacks(square, occupied) & (pieces[BISHOP] | pieces[QUEEN]))) & occupied
+
+	cdef bint attacked(self, int square, int byColor) nogil:
+		return self.colorAttackers(square, self.occupied, byColor) != 0
+
+	cpdef size_t attacksBy(self, int color):
+		''' Every square attacked by the given side. '''
+		cdef uint64_t *pieces = self.bitboards[color]
+		cdef size_t attacks = 0
+		cdef size_t b
+		cdef int piece
+
+		b = pieces[PAWN]
+		attacks = northOne(eastOne(b) | westOne(b)) if color == WHITE else southOne(eastOne(b) | westOne(b))
+		for piece in range(KNIGHT, KING + 1):
+			b = pieces[piece]
+			while b:
+				if piece == KNIGHT:
+					attacks |= KNIGHT_ATTACKS[BSF(b)]
+				elif piece == BISHOP:
+					attacks |= bishopMagicAttacks(BSF(b), self.occupied)
+				elif piece == ROOK:
+					attacks |= rookMagicAttacks(BSF(b), self.occupied)
+				elif piece == QUEEN:
+					attacks |= queenMagicAttacks(BSF(b), self.occupied)
+				else:
+					attacks |= KING_ATTACKS[BSF(b)]
+				b &= b - 1
+
+		return attacks
+
+	cdef void saveState(self, BoardState *state) nogil:
+		memcpy(state.bitboards, self.bitboards, sizeof(self.bitboards))
+		memcpy(state.mailbox, self.mailbox, sizeof(self.mailbox))
+		state.whiteBoard = self.whiteBoard
+		state.blackBoard = self.blackBoard
+		state.occupied = self.occupied
+		state.key = self.key
+
+	cdef void restoreState(self, const BoardState *state) nogil:
+		memcpy(self.bitboards, state.bitboards, sizeof(self.bitboards))
+		memcpy(self.mailbox, state.mailbox, sizeof(self.mailbox))
+		self.whiteBoard = state.whiteBoard
+		self.blackBoard = state.blackBoard
+		self.occupied = state.occupied
+		self.key = state.key
 
 	def onInitUpdatePieceLocations(self):
+		cdef size_t pieceBitboard
+		cdef int color, piece, square
+
+		for square in range(64):
+			self.mailbox[square] = NO_PIECE
 		for color in range(2):
 			for piece in range(6):
-				pieceBitboard = deepcopy(self.pieceBoards[color][piece])
+				pieceBitboard = self.bitboards[color][piece]
 				while pieceBitboard:
-					squareIdx = BSF(pieceBitboard)
-					self.pieceLocations[squareIdx] = piece
-					pieceBitboard ^= 0x01 << squareIdx
+					self.mailbox[BSF(pieceBitboard)] = piece
+					pieceBitboard &= pieceBitboard - 1
 
+cdef class PieceBoards:
+	''' List-like view of a CBoard's piece bitboards, one ColorBoards per color. '''
+	cdef CBoard board
 
-class Position:
-	def __init__(self, fen=None, debug=False):
-		self.parent: 'Position' = None
-		self.board: CBoard = CBoard(fen)
-		self.wAttacks: CBoard = None
-		self.bAttacks: CBoard = None
+	def __init__(self, CBoard board):
+		self.board = board
 
-		self.sideToMove = WHITE
-		self.halfmove_clock = 0
+	def __getitem__(self, int color):
+		if not 0 <= color < 2:
+			raise IndexError('color out of range')
+		return ColorBoards(self.board, color)
 
-		# If 1, then castling is allowed.
-		self.wkCastle = self.board.fen.whiteKingCastle()
-		self.wqCastle = self.board.fen.whiteQueenCastle()
-		self.bkCastle = self.board.fen.blackKingCastle()
-		self.bqCastle = self.board.fen.blackQueenCastle()
+	def __len__(self):
+		return 2
 
-		self.epTargetSquare: Square = Square.NONE
+	def tolist(self):
+		return [self[color].tolist() for color in range(2)]
 
-		self.moveSequence = []
+	def __eq__(self, other):
+		if isinstance(other, PieceBoards):
+			other = other.tolist()
+		return self.tolist() == other
+
+	def __repr__(self):
+		return repr(self.tolist())
+
+cdef class ColorBoards:
+	''' The six piece bitboards of one color. Item assignment writes through to the board. '''
+	cdef CBoard board
+	cdef int color
+
+	def __init__(self, CBoard board, int color):
+		self.board = board
+		self.color = color
+
+	def __getitem__(self, int piece):
+		if not 0 <= piece < 6:
+			raise IndexError('piece out of range')
+		return self.board.bitboards[self.color][piece]
+
+	def __setitem__(self, int piece, uint64_t bitboard):
+		if not 0 <= piece < 6:
+			raise IndexError('piece out of range')
+		self.board.bitboards[self.color][piece] = bitboard
+
+	def __len__(self):
+		return 6
+
+	def tolist(self):
+		return [self.board.bitboards[self.color][piece] for piece in range(6)]
+
+	def __eq__(self, other):
+		if isinstance(other, ColorBoards):
+			other = other.tolist()
+		return self.tolist() == other
+
+	def __repr__(self):
+		return repr(self.tolist())
+
+
+# Castling rights that survive a move touching each square.
+cdef int CASTLING_MASK[64]
+for _square in range(64):
+	CASTLING_MASK[_square] = WHITE_KINGSIDE | WHITE_QUEENSIDE | BLACK_KINGSIDE | BLACK_QUEENSIDE
+CASTLING_MASK[Square.E1] &= ~(WHITE_KINGSIDE | WHITE_QUEENSIDE)
+CASTLING_MASK[Square.H1] &= ~WHITE_KINGSIDE
+CASTLING_MASK[Square.A1] &= ~WHITE_QUEENSIDE
+CASTLING_MASK[Square.E8] &= ~(BLACK_KINGSIDE | BLACK_QUEENSIDE)
+CASTLING_MASK[Square.H8] &= ~BLACK_KINGSIDE
+CASTLING_MASK[Square.A8] &= ~BLACK_QUEENSIDE
+
+cdef class Position:
+	'''
+	With copyMake, doMove saves a snapshot of the whole position and undoMove restores it,
+	instead of undoing the move piece by piece.
+	'''
+	def __cinit__(self):
+		self.states = NULL
+		self.undoStack = NULL
+
+	def __dealloc__(self):
+		free(self.states)
+		free(self.undoStack)
+
+	def __init__(self, fen=None, debug=False, copyMake=False):
+		self.parent = None
+		self.board = CBoard.__new__(CBoard)
+
+		self.moveLists = []
+		self.undoCapacity = 0
+		self.copyMake = copyMake
+		self.stateCapacity = 0
 
 		self.debug = debug
+		# The board checks its incremental state after every move in debug mode. Loading a FEN keeps the setting.
+		self.board.debug = debug
+		self.setFen(fen)
+
+	def setFen(self, fen=None):
+		'''
+		Set up the position described by fen, or the starting position if it is None.
+		The undo stacks and move buffers are kept, so one Position can be reused across many FENs.
+		'''
+		cdef FenState state
+		parseFen(STARTING_FEN if fen is None else fen, &state)
+
+		self.board.load(fen, &state)
+
+		self.side = state.side
+		self.castling = state.castling
+		self.epSquare = state.epSquare
+		self.halfmove_clock = state.halfmoveClock
+		self.fullmove_number = state.fullmoveNumber
+		self.stateKey = self.computeKey() ^ self.board.key
+
+		self.moveSequence = []
+		self.undoCount = 0
+		self.stateCount = 0
 
 	def __eq__(self, other):
-		return (self.board == other.board
-				and self.sideToMove == other.sideToMove
-				and self.halfmove_clock == other.halfmove_clock
-				and self.wkCastle == other.wkCastle
-				and self.wqCastle == other.wqCastle
-				and self.bkCastle == other.bkCastle
-				and self.bqCastle == other.bqCastle)
+		# The Zobrist key covers the pieces, side to move, castling rights and en passant file, so equal
+		# positions hash equally. The en passant square is compared as well, in case of a key collision.
+		# The halfmove clock isn't in the key, but positions with different clocks aren't equal either.
+		if not isinstance(other, Position):
+			return NotImplemented
+		return (positionKey(self) == positionKey(<Position> other)
+				and self.epSquare == (<Position> other).epSquare
+				and self.halfmove_clock == (<Position> other).halfmove_clock)
+
+	def __hash__(self):
+		return positionKey(self)
+
+	@property
+	def wAttacks(self):
+		''' Squares attacked by white. '''
+		return self.board.attacksBy(WHITE)
+
+	@property
+	def bAttacks(self):
+		''' Squares attacked by black. '''
+		return self.board.attacksBy(BLACK)
+
+	@property
+	def key(self):
+		''' Zobrist key of the whole position, maintained incrementally. '''
+		return positionKey(self)
+
+	cpdef size_t computeKey(self):
+		''' Compute the Zobrist key of the position from scratch. '''
+		cdef size_t key = self.board.computeKey() ^ CASTLING_KEYS[self.castling]
+		if self.side == BLACK:
+			key ^= SIDE_KEY
+		if self.epSquare != NO_SQUARE:
+			key ^= EP_KEYS[self.epSquare % 8]
+		return key
+
+	cdef void setSide(self, int side) nogil:
+		if side != self.side:
+			self.stateKey ^= SIDE_KEY
+		self.side = side
+
+	cdef void setCastling(self, int castling) nogil:
+		self.stateKey ^= CASTLING_KEYS[self.castling] ^ CASTLING_KEYS[castling]
+		self.castling = castling
+
+	cdef void setEpSquare(self, int square) nogil:
+		if self.epSquare != NO_SQUARE:
+			self.stateKey ^= EP_KEYS[self.epSquare % 8]
+		if square != NO_SQUARE:
+			self.stateKey ^= EP_KEYS[square % 8]
+		self.epSquare = square
+
+	@property
+	def sideToMove(self):
+		return self.side
+
+	@sideToMove.setter
+	def sideToMove(self, int side):
+		self.setSide(side)
+
+	# If 1, then castling is allowed.
+	@property
+	def wkCastle(self):
+		return 1 if self.castling & WHITE_KINGSIDE else 0
+
+	@wkCastle.setter
+	def wkCastle(self, allowed):
+		self.setCastling(self.castling | WHITE_KINGSIDE if allowed else self.castling & ~WHITE_KINGSIDE)
+
+	@property
+	def wqCastle(self):
+		return 1 if self.castling & WHITE_QUEENSIDE else 0
+
+	@wqCastle.setter
+	def wqCastle(self, allowed):
+		self.setCastling(self.castling | WHITE_QUEENSIDE if allowed else self.castling & ~WHITE_QUEENSIDE)
+
+	@property
+	def bkCastle(self):
+		return 1 if self.castling & BLACK_KINGSIDE else 0
+
+	@bkCastle.setter
+	def bkCastle(self, allowed):
+		self.setCastling(self.castling | BLACK_KINGSIDE if allowed else self.castling & ~BLACK_KINGSIDE)
+
+	@property
+	def bqCastle(self):
+		return 1 if self.castling & BLACK_QUEENSIDE else 0
+
+	@bqCastle.setter
+	def bqCastle(self, allowed):
+		self.setCastling(self.castling | BLACK_QUEENSIDE if allowed else self.castling & ~BLACK_QUEENSIDE)
+
+	@property
+	def epTargetSquare(self):
+		return Square(self.epSquare)
+
+	@epTargetSquare.setter
+	def epTargetSquare(self, int square):
+		self.setEpSquare(square)
 
 	def __repr__(self):
 		return f'''Board: \n 
@@ -419,112 +800,327 @@ class Position:
 				Black queenside castle: {self.bqCastle}'''
 
 
+	def toFen(self):
+		''' The position in Forsyth-Edwards Notation. '''
+		cdef int rank, file, square, piece, empty
+
+		rows = []
+		for rank in range(7, -1, -1):
+			row = ''
+			empty = 0
+			for file in range(8):
+				square = rank * 8 + file
+				piece = self.board.mailbox[square]
+				if piece == NO_PIECE:
+					empty += 1
+					continue
+				if empty:
+					row += str(empty)
+					empty = 0
+				if self.board.blackBoard & SQUARE_TO_BITBOARD[square]:
+					piece += 6
+				row += 'PNBRQKpnbrqk'[piece]
+			if empty:
+				row += str(empty)
+			rows.append(row)
+
+		castling = ''.join(char for bit, char in zip((WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE), 'KQkq')
+						   if self.castling & bit)
+		epSquare = '-' if self.epSquare == NO_SQUARE else Square(self.epSquare).name.lower()
+		return (f"{'/'.join(rows)} {'wb'[self.side]} {castling or '-'} {epSquare} "
+				f'{self.halfmove_clock} {self.fullmove_number}')
+
 	def makeMove(self, move: 'Move'):
-		# What all needs to be updated?
-		# The board - need to translate squares to pieces on them.
-		# The turn. Should swap after updates are complete.
-		# Halfmove clock?
+		self.doMove(toEncodedMove(move))
+
+	def unmakeMove(self, move: 'Move'):
+		self.undoMove(toEncodedMove(move))
+
+	cdef void doMove(self, move_t move) except *:
 		self.moveSequence.append(move)
 		if self.debug:
 			file = open("Position_log.txt", "a")
-			file.write(f'{self.sideToMove} MAKE MOVE {move} SEQUENCE {self.moveSequence}\n')
+			file.write(f'{self.sideToMove} MAKE MOVE {Move.fromEncoded(move)} SEQUENCE {[Move.fromEncoded(m) for m in self.moveSequence]}\n')
 			file.close()
-		self.board.makeMove(move, self.sideToMove)
-		
-		# TODO Update castling flags when king or rook moves.
-
-		# If castling, update castle flags.
-		if move.flag == 0x02 or move.flag == 0x03:
-			# King castle
-			if self.sideToMove == WHITE:
-				self.wkCastle = 0
-				self.wqCastle = 0
-			else:
-				self.bkCastle = 0
-				self.bqCastle = 0
-
 
-		self.sideToMove = WHITE if self.sideToMove == BLACK else BLACK
-		return
+		self.reserve(1)
+		self.applyMove(move)
+		if self.board.debug:
+			self.board.checkConsistency()
 
-	def unmakeMove(self, move: 'Move'):
-		# TODO Captures, en passants, promotions, halfmove clock
-		#self.sideToMove = WHITE if self.sideToMove == BLACK else BLACK
+	cdef void undoMove(self, move_t move) except *:
 		if self.debug:
 			file = open("Position_log.txt", "a")
-			file.write(f'{self.sideToMove} UNMAKE MOVE {move}\n')
+			file.write(f'{self.sideToMove} UNMAKE MOVE {Move.fromEncoded(move)}\n')
 			file.close()
-		self.board.unmakeMove(move, INVERT(self.sideToMove))
+		if (self.stateCount if self.copyMake else self.undoCount) == 0:
+			raise IndexError('undoMove without a matching doMove')
 		self.moveSequence.pop()
 
-		# If castling, update castle flags.
-		# TODO This can lead to false results if one side initially had a flag of 0 before the move.
-		# It might be better to store castling flags in a stack in the Position.
-		if move.flag == 0x02 or move.flag == 0x03:
-			# King castle
-			if self.sideToMove == WHITE:
-				self.wkCastle = 1
-				self.wqCastle = 1
-			else:
-				self.bkCastle = 1
-				self.bqCastle = 1
+		self.revertMove(move)
+		if self.board.debug:
+			self.board.checkConsistency()
+
+	cdef void applyMove(self, move_t move) nogil:
+		cdef int origin = moveOrigin(move)
+		cdef int destination = moveDestination(move)
+		cdef int flag = moveFlag(move)
+
+		if self.copyMake:
+			self.pushState()
+		else:
+			self.pushUndo()
+
+		if self.side == BLACK:
+			self.fullmove_number += 1
+		if flag & CAPTURE or self.board.pieceOn(origin) == PAWN:
+			self.halfmove_clock = 0
+		else:
+			self.halfmove_clock += 1
+
+		self.board.doMove(move, self.side)
+
+		# Moving the king or a rook, or capturing a rook, loses the matching rights.
+		self.setCastling(self.castling & CASTLING_MASK[origin] & CASTLING_MASK[destination])
 
-		self.sideToMove = WHITE if self.sideToMove == BLACK else BLACK
-		return
+		if flag == DOUBLE_PAWN_PUSH:
+			self.setEpSquare((origin + destination) // 2)
+		else:
+			self.setEpSquare(NO_SQUARE)
+
+		self.setSide(WHITE if self.side == BLACK else BLACK)
+
+	cdef void revertMove(self, move_t move) nogil:
+		cdef UndoState *undo
+
+		if self.side == WHITE:
+			self.fullmove_number -= 1
+		if self.copyMake:
+			self.popState()
+			return
+
+		self.board.undoMove(move, INVERT(self.side))
+
+		self.undoCount -= 1
+		undo = &self.undoStack[self.undoCount]
+		self.castling = undo.castling
+		self.epSquare = undo.epSquare
+		self.halfmove_clock = undo.halfmoveClock
+		self.stateKey = undo.stateKey
+		self.side = INVERT(self.side)
+
+	cdef void reserve(self, int plies) except *:
+		cdef UndoState *grownUndo
+		cdef PositionState *grownStates
+		cdef int capacity
+
+		if not self.copyMake and self.undoCount + plies > self.undoCapacity:
+			capacity = max(64, 2 * self.undoCapacity, self.undoCount + plies)
+			grownUndo = <UndoState *> realloc(self.undoStack, capacity * sizeof(UndoState))
+			if grownUndo == NULL:
+				raise MemoryError()
+			self.undoStack = grownUndo
+			self.undoCapacity = capacity
+
+		if self.copyMake and self.stateCount + plies > self.stateCapacity:
+			capacity = max(64, 2 * self.stateCapacity, self.stateCount + plies)
+			grownStates = <PositionState *> realloc(self.states, capacity * sizeof(PositionState))
+			if grownStates == NULL:
+				raise MemoryError()
+			self.states = grownStates
+			self.stateCapacity = capacity
+
+	cdef void pushUndo(self) nogil:
+		cdef UndoState *undo = &self.undoStack[self.undoCount]
+		undo.castling = self.castling
+		undo.epSquare = self.epSquare
+		undo.halfmoveClock = self.halfmove_clock
+		undo.stateKey = self.stateKey
+		self.undoCount += 1
+
+	cdef void pushState(self) nogil:
+		cdef PositionState *state = &self.states[self.stateCount]
+		self.board.saveState(&state.board)
+		state.side = self.side
+		state.castling = self.castling
+		state.epSquare = self.epSquare
+		state.halfmoveClock = self.halfmove_clock
+		state.stateKey = self.stateKey
+		self.stateCount += 1
+
+	cdef void popState(self) nogil:
+		cdef PositionState *state
+
+		self.stateCount -= 1
+		state = &self.states[self.stateCount]
+		self.board.restoreState(&state.board)
+		self.side = state.side
+		self.castling = state.castling
+		self.epSquare = state.epSquare
+		self.halfmove_clock = state.halfmoveClock
+		self.stateKey = state.stateKey
 
 	def score(self):
+		''' Static evaluation in pawns, from the side to move's point of view. '''
+		return self.evaluate() / 100
+
+	cdef int evaluate(self) nogil:
 		# Use NegaMax
 		# Todo: Add mobility count
 		# https://www.chessprogramming.org/Evaluation
-		_score = 9 * (POPCOUNT(self.board.pieceBoards[WHITE][QUEEN]) - POPCOUNT(self.board.pieceBoards[BLACK][QUEEN])) \
-			+ 5 * (POPCOUNT(self.board.pieceBoards[WHITE][ROOK]) - POPCOUNT(self.board.pieceBoards[BLACK][ROOK])) \
-			+ 3 * (POPCOUNT(self.board.pieceBoards[WHITE][KNIGHT]) - POPCOUNT(self.board.pieceBoards[BLACK][KNIGHT])) \
-			+ 3 * (POPCOUNT(self.board.pieceBoards[WHITE][BISHOP]) - POPCOUNT(self.board.pieceBoards[BLACK][BISHOP])) \
-			+ (POPCOUNT(self.board.pieceBoards[WHITE][PAWN]) - POPCOUNT(self.board.pieceBoards[BLACK][PAWN]))
-
-		_score -= 0.5 * (self.board.doubledPawnCount(WHITE) - self.board.doubledPawnCount(BLACK))
-		_score -= 0.5 * (self.board.isolatedPawnCount(WHITE) - self.board.isolatedPawnCount(BLACK))
-		_score -= 0.5 * (self.board.blockedPawnCount(WHITE) - self.board.blockedPawnCount(BLACK))
+		# Counted in centipawns, so the half-pawn structure terms stay integers.
+		cdef uint64_t *white = self.board.bitboards[WHITE]
+		cdef uint64_t *black = self.board.bitboards[BLACK]
+		cdef int score = 900 * pieceBalance(self.board, QUEEN) \
+			+ 500 * pieceBalance(self.board, ROOK) \
+			+ 300 * pieceBalance(self.board, KNIGHT) \
+			+ 300 * pieceBalance(self.board, BISHOP) \
+			+ 100 * pieceBalance(self.board, PAWN)
+
+		score -= 50 * (doubledPawns(white[PAWN]) - doubledPawns(black[PAWN]))
+		score -= 50 * (<int> POPCOUNT(isolatedPawns(white[PAWN])) - <int> POPCOUNT(isolatedPawns(black[PAWN])))
+		score -= 50 * (blockedPawns(self.board, WHITE) - blockedPawns(self.board, BLACK))
+
+		return score if self.side == WHITE else -score
+
+	def copy(self):
+		''' An independent Position in the same state, without the move history. '''
+		return Position(self.toFen(), copyMake=self.copyMake)
+
+	cdef MoveList moveListAt(self, int ply):
+		while len(self.moveLists) <= ply:
+			self.moveLists.append(MoveList())
+		return self.moveLists[ply]
+
+	cpdef long traverse(self, int ply) except -1:
+		cdef long nMoves
+		cdef MoveList moves
+		cdef int i
 
-		return _score if self.sideToMove == WHITE else -1 * _score
-
-	def traverse(self, ply):
 		if ply == 0:
 			return 0
 
-		from movegen import generateAllMoves
-		moves = generateAllMoves(self)
-		nMoves = len(moves)
-		for move in moves:
-			#expected = deepcopy(self)
-			self.makeMove(move)
+		from movegen import generateMovesInto
+		moves = self.moveListAt(ply)
+		nMoves = generateMovesInto(self, moves)
+		for i in range(moves.buffer.count):
+			self.doMove(moves.buffer.moves[i])
 			nMoves += self.traverse(ply-1)
-			self.unmakeMove(move)
-			#if self != expected:
-				#from printer import printCBoard
-				#printCBoard(expected.board)
-				#printCBoard(self.board)
-				#raise Exception(f"Positions not equivalent: {move.capturedPieceType}\n{self.moveSequence}")
+			self.undoMove(moves.buffer.moves[i])
 		
 		return nMoves
 
+	cpdef long perft(self, int depth) except -1:
+		'''
+		Count the leaf nodes of the move tree depth plies deep.
+		https://www.chessprogramming.org/Perft
+		'''
+		cdef long nodes = 0
+		cdef MoveList moves
+		cdef int i
+
+		if depth == 0:
+			return 1
+
+		from movegen import generateMovesInto
+		moves = self.moveListAt(depth)
+		generateMovesInto(self, moves)
+		for i in range(moves.buffer.count):
+			self.doMove(moves.buffer.moves[i])
+			nodes += self.perft(depth-1)
+			self.undoMove(moves.buffer.moves[i])
+
+		return nodes
+
+	def divide(self, int depth):
+		''' Perft split by root move, as a list of (Move, nodes) pairs. '''
+		cdef MoveList moves = MoveList()
+		cdef move_t move
+		cdef int i
+
+		from movegen import generateMovesInto
+		generateMovesInto(self, moves)
+		result = []
+		for i in range(moves.buffer.count):
+			move = moves.buffer.moves[i]
+			self.doMove(move)
+			result.append((Move.fromEncoded(move), self.perft(depth-1)))
+			self.undoMove(move)
+
+		return result
+
+cdef int pieceBalance(CBoard board, int piece) nogil:
+	''' Number of white pieces of this type minus the number of black ones. '''
+	cdef int white = POPCOUNT(board.bitboards[WHITE][piece])
+	cdef int black = POPCOUNT(board.bitboards[BLACK][piece])
+	return white - black
+
+cdef int doubledPawns(size_t pawns) nogil:
+	# Pawns sharing a file with another pawn. The H file is not counted.
+	cdef size_t file = A_FILE
+	cdef int i, onFile, count = 0
+	for i in range(7):
+		onFile = POPCOUNT(file & pawns)
+		if onFile > 1:
+			count += onFile
+		file <<= 1
+	return count
+
+cdef size_t isolatedPawns(size_t pawns) nogil:
+	# https://www.chessprogramming.org/Isolated_Pawns_(Bitboards)
+	return pawns & ~fileFill(eastOne(pawns)) & ~fileFill(westOne(pawns))
+
+cdef int blockedPawns(CBoard board, int color) nogil:
+	if color == WHITE:
+		return POPCOUNT(northOne(board.bitboards[WHITE][PAWN]) & board.occupied)
+	return POPCOUNT(southOne(board.bitboards[BLACK][PAWN]) & board.occupied)
+
+cdef move_t toEncodedMove(move) except? 0:
+	# The Python-facing API accepts either Move objects or already packed moves.
+	if isinstance(move, Move):
+		return move.encode()
+	return move
+
 class Move:
+	"""
+	Python-facing view of a move, used by the tests and for UCI input and output.
+	Move generation and make/unmake work on the packed move_t encoding in board.pxd.
+	"""
 	def __init__(self, 
 				origin: Square=Square.NONE, 
 				destination: Square=Square.NONE, 
 				flag=0, 
-				capturedPieceType=None):
+				capturedPieceType=None,
+				promotionPieceType=None):
 			self.origin = origin
 			self.destination = destination
 			self.flag=flag
 			self.capturedPieceType = capturedPieceType
+			self.promotionPieceType = promotionPieceType
 			self.enpassantOrigin = origin if flag == 0x05 else Square.NONE
 
 			if flag == 0x04 and self.capturedPieceType == None:
 				print(self)
 				raise Exception("A capture move was generated with no defined capturedPieceType.")
 
+	def encode(self):
+		captured = NO_PIECE if self.capturedPieceType is None else self.capturedPieceType
+		promotion = NO_PIECE if self.promotionPieceType is None else self.promotionPieceType
+		return encodePromotion(self.origin, self.destination, self.flag, captured, promotion)
+
+	@staticmethod
+	def fromEncoded(move_t move):
+		captured = moveCaptured(move)
+		promotion = movePromotion(move)
+		return Move(Square(moveOrigin(move)),
+					Square(moveDestination(move)),
+					moveFlag(move),
+					None if captured == NO_PIECE else captured,
+					None if promotion == NO_PIECE else promotion)
+
 	def __eq__(self, other):
+		if not isinstance(other, Move):
+			return NotImplemented
 		return self.origin == other.origin and \
 				self.destination == other.destination and \
 				self.flag == other.flag
@@ -539,6 +1135,13 @@ class Move:
 	def __str__(self):
 		return "Origin: " + str(self.origin) + " Destination: " + str(self.destination) + " Flag: " + str(self.flag)
 
+	def toLongAlgebraic(self):
+		''' The move in the long algebraic form UCI uses, e.g. e2e4 or e7e8q. '''
+		text = Square(self.origin).name.lower() + Square(self.destination).name.lower()
+		if self.promotionPieceType is not None:
+			text += 'nbrq'[self.promotionPieceType - KNIGHT]
+		return text
+
 	@staticmethod
 	def fromLongAlgebraic(command='', position=None):
 		'''
@@ -546,10 +1149,15 @@ class Move:
 
 		See the Stockfish implementation:
 		https://github.com/official-stockfish/Stockfish/blob/master/src/uci.cpp Line 380
-		It creates a move list first from a given position, then iterates through to see which move it matches
-
+		It creates a move list first from a given position, then iterates through to see which move it matches.
+		Returns None if command is not a legal move in position.
 		'''
-		return
+		from movegen import generateAllMoves
+		command = command.strip().lower()
+		for move in generateAllMoves(position):
+			if move.toLongAlgebraic() == command:
+				return move
+		return None
 
 
 		
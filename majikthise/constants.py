@@ -39,4 +39,8 @@ WHITE = 0
 BLACK = 1
 
 def INVERT(color):
-    return WHITE if color == BLACK else BLACK
\ No newline at end of file
+    return WHITE if color == BLACK else BLACK
+
+# Search scores in centipawns, as in search.pxd. Scores beyond MATE_BOUND are mates.
+MATE_SCORE = 31000
+MATE_BOUND = MATE_SCORE - 64
@@ -1,4 +1,9 @@
-from board import Position
+import threading
+
+from board import Move, Position
+from constants import MATE_BOUND, MATE_SCORE
+from search import Search
+from tt import TranspositionTable
 
 class Engine:
 
@@ -8,10 +13,97 @@ class Engine:
     plies = 5
     movetime = 10000
 
+    # Transposition table size in MB, set through the UCI Hash option.
+    hash = 16
+
+    # Search threads, set through the UCI Threads option. All but the first are Lazy SMP helpers.
+    threads = 1
+
     move_list = []
 
     def __init__(self, debug=False):
         self.debug = debug
         self.position = Position()
-        
-    
\ No newline at end of file
+        self.tt = TranspositionTable(self.hash)
+        self.searcher = None
+        self.helpers = []
+        self.iterations = []
+
+    def setHash(self, megabytes):
+        self.hash = megabytes
+        self.tt.resize(megabytes)
+
+    def setThreads(self, count):
+        self.threads = max(1, count)
+
+    def newGame(self):
+        self.tt.newGeneration()
+
+    def search(self, depth=None, movetime=None, nodes=None, report=None, timeManager=None, searchmoves=None):
+        '''
+        Search the current position with iterative deepening and return the best Move.
+        depth defaults to Engine.depth and movetime (in milliseconds) to Engine.movetime.
+        A timeManager (see timeman.py) replaces movetime with its own limits.
+        report is called with a dict for each completed iteration; see Search.run.
+        searchmoves, a list of Moves, restricts the search to those root moves.
+
+        With more than one thread, helpers search private copies of the position alongside
+        the main search and share its transposition table (Lazy SMP). Only the main search
+        reports and picks the move; the helpers stop when it does.
+        '''
+        depth = depth or self.depth
+        searchmoves = [move.encode() for move in searchmoves] if searchmoves else None
+        self.searcher = Search(self.position, self.tt)
+        self.helpers = [Search(self.position.copy(), self.tt, threadId) for threadId in range(1, self.threads)]
+        threads = [threading.Thread(target=helper.run, args=(depth,), kwargs={'searchmoves': searchmoves},
+                                    daemon=True) for helper in self.helpers]
+        for thread in threads:
+            thread.start()
+
+        try:
+            self.iterations = self.searcher.run(depth,
+                                                movetime if movetime is not None else self.movetime,
+                                                nodes,
+                                                report,
+                                                timeManager,
+                                                self.helpers,
+                                                searchmoves)
+        finally:
+            for helper, thread in zip(self.helpers, threads):
+                # A helper that hasn't started yet would miss a single stop, so repeat it until the thread ends.
+                while thread.is_alive():
+                    helper.stop()
+                    thread.join(0.001)
+
+        if not self.iterations or not self.iterations[-1]['pv']:
+            return None
+        return Move.fromEncoded(self.iterations[-1]['pv'][0])
+
+    def stop(self):
+        if self.searcher is not None:
+            self.searcher.stop()
+
+    def ponderhit(self, timeManager):
+        '''
+        Turn a ponder search into the real one. It keeps its depth and transposition table,
+        and from now on runs within timeManager's limits.
+        '''
+        searcher = self.searcher
+        # Without a searcher the search hasn't started yet, and will pick the limits up when it does.
+        timeManager.ponderhit(searcher.elapsed() if searcher is not None else 0.0)
+        if searcher is not None and timeManager.limited():
+            searcher.setTimeLimit(timeManager.hard)
+
+def formatInfo(iteration):
+    ''' Format one search iteration as a UCI info line. '''
+    pv = ' '.join(Move.fromEncoded(move).toLongAlgebraic() for move in iteration['pv'])
+    return (f"info depth {iteration['depth']} score {formatScore(iteration['score'])} nodes {iteration['nodes']}"
+            f" nps {iteration['nps']} time {int(iteration['time'] * 1000)} pv {pv}")
+
+def formatScore(score):
+    ''' A UCI score: cp in centipawns, or mate in moves (negative when we are the one mated). '''
+    if abs(score) > MATE_BOUND:
+        # The search scores a mate plies from the root as MATE_SCORE - plies.
+        moves = (MATE_SCORE - abs(score) + 1) // 2
+        return f'mate {moves if score > 0 else -moves}'
+    return f'cp {score}'
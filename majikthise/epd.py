@@ -0,0 +1,196 @@
+import argparse
+import json
+import multiprocessing
+import shlex
+import sys
+import time
+
+from board import Move
+from engine import Engine
+from revision import gitRevision
+from san import fromSan
+
+# Batch runner for EPD test suites such as WAC or STS.
+# https://www.chessprogramming.org/Extended_Position_Description
+#
+#   python epd.py wac.epd                         depth 5, one worker per core
+#   python epd.py wac.epd --movetime 1000 --workers 4 --json out.json
+
+# Search clamps deeper requests to its own maximum, so this just means "until the time runs out".
+UNLIMITED_DEPTH = 64
+
+def readEpd(line):
+    '''
+    Split one EPD record into its FEN (the first four fields) and its operations.
+    Operations are returned as a dict from opcode to a list of operands, e.g. {'bm': ['Nf3'], 'id': ['WAC.001']}.
+    '''
+    fields = line.split(None, 4)
+    if len(fields) < 4:
+        raise ValueError(f'invalid EPD: {line}')
+    fen = ' '.join(fields[:4])
+
+    operations = {}
+    if len(fields) == 5:
+        # Unquoted semicolons come out as tokens of their own, even when attached to the last operand,
+        # so a semicolon inside a quoted operand doesn't end the operation.
+        lexer = shlex.shlex(fields[4], posix=True, punctuation_chars=';')
+        lexer.whitespace_split = True
+        lexer.whitespace = ' \t\r\n'
+        lexer.commenters = ''
+        tokens = []
+        for token in lexer:
+            if token.strip(';'):
+                tokens.append(token)
+            elif tokens:
+                operations[tokens[0]] = tokens[1:]
+                tokens = []
+        if tokens:
+            operations[tokens[0]] = tokens[1:]
+
+    return fen, operations
+
+def readEpdFile(path):
+    ''' Yield (fen, operations) for each record in the file, skipping blank lines and # comments. '''
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                yield readEpd(line)
+
+# Each worker process builds one Engine and keeps it, with its Position and hash table, for every record it runs.
+workerEngine = None
+
+def initWorker(hashSize):
+    global workerEngine
+    workerEngine = Engine()
+    workerEngine.setHash(hashSize)
+
+def solveRecord(task):
+    ''' Search one (index, fen, operations, depth, movetime) task on this worker's engine and return its result. '''
+    index, fen, operations, depth, movetime = task
+    # An id operation without an operand falls back to the record number too.
+    result = {'index': index, 'id': (operations.get('id') or [str(index + 1)])[0], 'fen': fen, 'bm': [], 'am': [],
+              'move': None, 'solved': False, 'solveTime': None, 'nodes': 0, 'depth': 0, 'time': 0.0}
+
+    engine = workerEngine
+    try:
+        engine.position.setFen(fen)
+        # bm and am are resolved before searching, so a bad record is reported instead of counting as unsolved.
+        best = {fromSan(engine.position, san).toLongAlgebraic() for san in operations.get('bm', [])}
+        avoid = {fromSan(engine.position, san).toLongAlgebraic() for san in operations.get('am', [])}
+    except (ValueError, IndexError, KeyError) as error:
+        result['error'] = str(error)
+        return result
+
+    def isSolution(move):
+        return (not best or move in best) and move not in avoid
+
+    engine.newGame()
+    start = time.perf_counter()
+    try:
+        # movetime 0 leaves only the depth limit, rather than falling back to the engine's default time.
+        move = engine.search(depth, movetime or 0)
+    except Exception as error:
+        # One failed search is reported with its record instead of ending the whole run.
+        result['error'] = f'search failed: {error!r}'
+        return result
+    finally:
+        result['time'] = time.perf_counter() - start
+    result['bm'] = sorted(best)
+    result['am'] = sorted(avoid)
+    if move is None:
+        return result
+
+    # The solution time is when the search settled on a solving move for good.
+    iterations = engine.iterations
+    for iteration in reversed(iterations):
+        if not isSolution(Move.fromEncoded(iteration['pv'][0]).toLongAlgebraic()):
+            break
+        result['solveTime'] = iteration['time']
+
+    result['move'] = move.toLongAlgebraic()
+    result['solved'] = isSolution(result['move'])
+    result['nodes'] = iterations[-1]['nodes']
+    result['depth'] = iterations[-1]['depth']
+    return result
+
+def runSuite(records, depth=5, movetime=None, workers=None, hashSize=16, report=None):
+    '''
+    Search each (fen, operations) record to depth, or for movetime milliseconds, and return the results in order.
+    Records are spread over a pool of workers processes (one per core by default); with workers=1 they run in this process.
+    report, if given, is called with each result as it completes.
+    '''
+    tasks = [(index, fen, operations, depth, movetime) for index, (fen, operations) in enumerate(records)]
+    results = []
+
+    if workers == 1:
+        initWorker(hashSize)
+        completed = map(solveRecord, tasks)
+    else:
+        pool = multiprocessing.Pool(workers, initializer=initWorker, initargs=(hashSize,))
+        # One record per task keeps the workers evenly loaded, since search times vary a lot between positions.
+        completed = pool.imap_unordered(solveRecord, tasks, chunksize=1)
+
+    try:
+        for result in completed:
+            results.append(result)
+            if report is not None:
+                report(result)
+    finally:
+        if workers != 1:
+            pool.terminate()
+
+    results.sort(key=lambda result: result['index'])
+    return results
+
+def summarize(results):
+    solved = [result for result in results if result['solved']]
+    totalTime = sum(result['time'] for result in results)
+    return {
+        'positions': len(results),
+        'solved': len(solved),
+        'solveRate': len(solved) / len(results) if results else 0.0,
+        'errors': sum(1 for result in results if 'error' in result),
+        'nodes': sum(result['nodes'] for result in results),
+        'time': totalTime,
+        'meanSolveTime': sum(result['solveTime'] for result in solved) / len(solved) if solved else None
+    }
+
+def formatResult(result):
+    if 'error' in result:
+        return f"{result['id']:<12} error: {result['error']}"
+    if result['solved']:
+        status = f"ok  {result['solveTime']:.3f}s"
+    else:
+        status = f"FAIL (bm {' '.join(result['bm']) or '-'} am {' '.join(result['am']) or '-'})"
+    return (f"{result['id']:<12} {result['move'] or '-':<6} depth {result['depth']:>2}  nodes {result['nodes']:>10}"
+            f"  time {result['time']:7.3f}s  {status}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run an EPD test suite against the engine.')
+    parser.add_argument('path', help='EPD file with bm and/or am operations')
+    parser.add_argument('--depth', type=int, help='search depth per position (default 5, unlimited with --movetime)')
+    parser.add_argument('--movetime', type=int, metavar='MS', help='search time per position in milliseconds')
+    parser.add_argument('--workers', type=int, help='number of worker processes (default: one per core)')
+    parser.add_argument('--hash', type=int, default=16, metavar='MB', help='hash table size per worker (default 16)')
+    parser.add_argument('--json', metavar='PATH', help='also write the results to PATH as JSON')
+    args = parser.parse_args(argv)
+
+    report = lambda result: print(formatResult(result), flush=True)
+    depth = args.depth or (UNLIMITED_DEPTH if args.movetime else 5)
+    results = runSuite(readEpdFile(args.path), depth, args.movetime, args.workers, args.hash, report)
+
+    summary = summarize(results)
+    meanSolveTime = f"{summary['meanSolveTime']:.3f}s" if summary['meanSolveTime'] is not None else '-'
+    print(f"solved {summary['solved']}/{summary['positions']} ({100 * summary['solveRate']:.1f}%)"
+          f"  nodes {summary['nodes']}  time {summary['time']:.3f}s  mean solve time {meanSolveTime}")
+
+    if args.json:
+        summary.update({'revision': gitRevision(), 'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'), 'results': results})
+        with open(args.json, 'w') as f:
+            json.dump(summary, f, indent=2)
+
+    return 0 if summary['errors'] == 0 else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
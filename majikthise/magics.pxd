@@ -0,0 +1,30 @@
+cdef size_t ROOK_MASKS[64]
+cdef size_t ROOK_MAGICS[64]
+cdef unsigned int ROOK_SHIFTS[64]
+cdef size_t *ROOK_ATTACKS[64]
+
+cdef size_t BISHOP_MASKS[64]
+cdef size_t BISHOP_MAGICS[64]
+cdef unsigned int BISHOP_SHIFTS[64]
+cdef size_t *BISHOP_ATTACKS[64]
+
+# Squares strictly between two aligned squares, and the whole line through them.
+# Both are empty when the squares don't share a rank, file or diagonal.
+# https://www.chessprogramming.org/Square_Attacked_By#Pure_Calculation
+cdef size_t BETWEEN[64][64]
+cdef size_t LINE[64][64]
+
+cpdef void initMagics()
+
+# Fancy magic bitboard lookups. The occupancy is masked down to the relevant
+# blockers for the square, hashed with the square's magic and used to index
+# its slice of the shared attack table.
+# https://www.chessprogramming.org/Magic_Bitboards
+cdef inline size_t rookMagicAttacks(int sq, size_t occupied) nogil:
+	return ROOK_ATTACKS[sq][((occupied & ROOK_MASKS[sq]) * ROOK_MAGICS[sq]) >> ROOK_SHIFTS[sq]]
+
+cdef inline size_t bishopMagicAttacks(int sq, size_t occupied) nogil:
+	return BISHOP_ATTACKS[sq][((occupied & BISHOP_MASKS[sq]) * BISHOP_MAGICS[sq]) >> BISHOP_SHIFTS[sq]]
+
+cdef inline size_t queenMagicAttacks(int sq, size_t occupied) nogil:
+	return rookMagicAttacks(sq, occupied) | bishopMagicAttacks(sq, occupied)
@@ -0,0 +1,145 @@
+from bitboard cimport POPCOUNT
+
+# Sliding piece attack tables, indexed by fancy magic bitboards.
+# Everything lives in flat C arrays and is built once when the module is imported.
+# https://www.chessprogramming.org/Magic_Bitboards
+
+cdef size_t ROOK_TABLE[102400]
+cdef size_t BISHOP_TABLE[5248]
+
+cdef size_t EDGE_RANKS = 0xFF000000000000FF
+cdef size_t EDGE_FILES = 0x8181818181818181
+
+# Seeds that find a full set of magics quickly, one per rank.
+cdef size_t SEEDS[8]
+SEEDS[:] = [728, 10316, 55013, 32803, 12281, 15100, 16645, 255]
+
+cdef size_t randomState = 1
+
+cdef size_t rand64():
+	# xorshift64* generator
+	# https://www.chessprogramming.org/Pseudo-Random_Number_Generator
+	global randomState
+	randomState ^= randomState >> 12
+	randomState ^= randomState << 25
+	randomState ^= randomState >> 27
+	return randomState * <size_t> 2685821657736338717
+
+cdef size_t sparseRand():
+	# Magics with few set bits are found much faster.
+	return rand64() & rand64() & rand64()
+
+cdef size_t slidingAttacks(int sq, size_t occupied, bint diagonal):
+	''' Step outwards from sq in each direction until a blocker or the edge is hit. '''
+	cdef int rankSteps[4]
+	cdef int fileSteps[4]
+	cdef int direction, rank, _file
+	cdef size_t attacks = 0
+	cdef size_t bb
+
+	if diagonal:
+		rankSteps[:] = [1, 1, -1, -1]
+		fileSteps[:] = [1, -1, 1, -1]
+	else:
+		rankSteps[:] = [1, -1, 0, 0]
+		fileSteps[:] = [0, 0, 1, -1]
+
+	for direction in range(4):
+		rank = sq // 8 + rankSteps[direction]
+		_file = sq % 8 + fileSteps[direction]
+		while 0 <= rank < 8 and 0 <= _file < 8:
+			bb = <size_t> 1 << (rank * 8 + _file)
+			attacks |= bb
+			if bb & occupied:
+				break
+			rank += rankSteps[direction]
+			_file += fileSteps[direction]
+
+	return attacks
+
+cdef void initSlider(size_t *table, size_t *masks, size_t *magics, unsigned int *shifts, size_t **attacks, bint diagonal):
+	cdef size_t occupancy[4096]
+	cdef size_t reference[4096]
+	cdef int epoch[4096]
+	cdef int attempt = 0
+	cdef int sq, i, size
+	cdef size_t edges, mask, b, magic, idx
+	cdef size_t offset = 0
+	cdef bint found
+	global randomState
+
+	for i in range(4096):
+		epoch[i] = 0
+
+	for sq in range(64):
+		# Blockers on the board edge never shorten a ray, so they are left out of the mask.
+		edges = (EDGE_RANKS & ~(<size_t> 0xFF << (8 * (sq // 8)))) | (EDGE_FILES & ~(<size_t> 0x0101010101010101 << (sq % 8)))
+		mask = slidingAttacks(sq, 0, diagonal) & ~edges
+
+		masks[sq] = mask
+		shifts[sq] = 64 - POPCOUNT(mask)
+		attacks[sq] = table + offset
+
+		# Enumerate every subset of the mask with the Carry-Rippler trick.
+		# https://www.chessprogramming.org/Traversing_Subsets_of_a_Set
+		b = 0
+		size = 0
+		while True:
+			occupancy[size] = b
+			reference[size] = slidingAttacks(sq, b, diagonal)
+			size += 1
+			b = (b - mask) & mask
+			if not b:
+				break
+
+		if sq % 8 == 0:
+			randomState = SEEDS[sq // 8]
+
+		found = False
+		while not found:
+			magic = 0
+			while POPCOUNT((mask * magic) >> 56) < 6:
+				magic = sparseRand()
+
+			# The epoch marks which table slots were written by this attempt,
+			# so the table never has to be cleared between attempts.
+			attempt += 1
+			found = True
+			for i in range(size):
+				idx = ((occupancy[i] & mask) * magic) >> shifts[sq]
+				if epoch[idx] < attempt:
+					epoch[idx] = attempt
+					attacks[sq][idx] = reference[i]
+				elif attacks[sq][idx] != reference[i]:
+					found = False
+					break
+
+		magics[sq] = magic
+		offset += size
+
+cdef void initLines():
+	cdef int a, b
+	cdef size_t aBoard, bBoard
+
+	for a in range(64):
+		aBoard = <size_t> 1 << a
+		for b in range(64):
+			bBoard = <size_t> 1 << b
+			BETWEEN[a][b] = 0
+			LINE[a][b] = 0
+			if a == b:
+				continue
+
+			if bishopMagicAttacks(a, 0) & bBoard:
+				BETWEEN[a][b] = bishopMagicAttacks(a, bBoard) & bishopMagicAttacks(b, aBoard)
+				LINE[a][b] = (bishopMagicAttacks(a, 0) & bishopMagicAttacks(b, 0)) | aBoard | bBoard
+			elif rookMagicAttacks(a, 0) & bBoard:
+				BETWEEN[a][b] = rookMagicAttacks(a, bBoard) & rookMagicAttacks(b, aBoard)
+				LINE[a][b] = (rookMagicAttacks(a, 0) & rookMagicAttacks(b, 0)) | aBoard | bBoard
+
+cpdef void initMagics():
+	initSlider(ROOK_TABLE, ROOK_MASKS, ROOK_MAGICS, ROOK_SHIFTS, ROOK_ATTACKS, False)
+	initSlider(BISHOP_TABLE, BISHOP_MASKS, BISHOP_MAGICS, BISHOP_SHIFTS, BISHOP_ATTACKS, True)
+	initLines()
+
+initMagics()
@@ -1,81 +1,268 @@
-import re
+import argparse
+import logging
+import logging.handlers
+import sys
+import threading
+
+from board import Move
+from engine import Engine, formatInfo
+from timeman import TimeManager, parseGo
 
 # https://wbec-ridderkerk.nl/html/UCIProtocol.html
+#
+# The main thread reads commands and answers them straight away. go starts the search on a
+# worker thread, so stop, isready and quit are handled within milliseconds even mid-search.
+
+# Search clamps deeper requests to its own maximum.
+INFINITE_DEPTH = 64
+
+MAX_THREADS = 512
+
+logger = logging.getLogger('majikthise')
+logger.addHandler(logging.NullHandler())
+
+def enableLog(path, capacity=256):
+    '''
+    Log the UCI traffic to path. Records are buffered and written capacity at a time,
+    or straight away for errors; call logging.shutdown() to flush the rest.
+    '''
+    target = logging.FileHandler(path)
+    target.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+    handler = logging.handlers.MemoryHandler(capacity, flushLevel=logging.ERROR, target=target)
+    logger.addHandler(handler)
+    logger.setLevel(logging.DEBUG)
+    return handler
+
+class Uci:
+
+    def __init__(self, engine=None, output=None):
+        self.engine = engine or Engine()
+        # output receives each line the engine sends; stdout by default.
+        self.output = output or self.print
+        self.outputLock = threading.Lock()
+        self.searchThread = None
+        self.timeManager = None
+        # Set by stop, quit and ponderhit, to release an infinite or ponder search that has already finished.
+        self.stopEvent = threading.Event()
+        # Set by debug on: the engine then explains itself in info string lines.
+        self.debug = False
+        self.moveOverhead = TimeManager.moveOverhead
+        self.handlers = {
+            'uci': self.uci,
+            'debug': self.setDebug,
+            'isready': self.isready,
+            'setoption': self.setoption,
+            'register': self.register,
+            'ucinewgame': self.ucinewgame,
+            'position': self.position,
+            'go': self.go,
+            'stop': self.stop,
+            'ponderhit': self.ponderhit
+        }
+
+    @staticmethod
+    def print(line):
+        sys.stdout.write(line + '\n')
+        sys.stdout.flush()
+
+    def send(self, line):
+        # The search thread streams info lines while the main thread answers commands.
+        with self.outputLock:
+            logger.debug('>> %s', line)
+            self.output(line)
 
-def main():
-    print("We're in\n")
+    def run(self, lines):
+        ''' Handle each command in lines until quit or the end of input. '''
+        for line in lines:
+            if not self.handle(line):
+                break
+        self.quit()
 
-    f = open('/Users/kalebburnham/Workspaces/Majikthise-Python/majikthise/log.txt', 'a+')
-    f.write("We're in!\n")
-    f.close()
+    def handle(self, line):
+        ''' Handle one command. Returns False on quit. '''
+        logger.debug('<< %s', line.rstrip())
+        tokens = line.split()
+        if not tokens:
+            return True
+        if tokens[0] == 'quit':
+            return False
 
-    while True:
-        instruction = "" 
-        
+        handler = self.handlers.get(tokens[0])
+        if handler is None:
+            self.info(f'unknown command {line.strip()}')
+            return True
         try:
-            instruction = input()
-        except:
-            print("EOF")
-
-        if instruction:
-            # This is just creating a ton of new lines. Only write if instruction exists.
-            f = open('/Users/kalebburnham/Workspaces/Majikthise-Python/majikthise/log.txt', 'a')
-            f.write(instruction + '\n')
-            f.close()
-
-        if instruction == 'uci':
-            writeId()
-        elif re.search('debug (on|off)', instruction):
-            pass
-        elif instruction == 'isready':
-            writeReadyOk()
-        elif instruction == 'register':
-            writeRegisterResponse()
-        elif re.search('setoption name .*', instruction):
-            pass
-        elif instruction == 'register':
-            pass
-        elif instruction == 'ucinewgame':
+            handler(tokens[1:])
+        except (ValueError, IndexError) as error:
+            logger.error('bad command %r: %s', line.strip(), error)
+            self.info(f'bad command {line.strip()}: {error}')
+        return True
+
+    def info(self, text):
+        self.send(f'info string {text}')
+
+    def debugInfo(self, text):
+        if self.debug:
+            self.info(text)
+
+    def uci(self, args):
+        self.send('id name majikthise')
+        self.send('id author Kaleb Burnham')
+        self.send(f'option name Hash type spin default {Engine.hash} min 1 max 65536')
+        self.send(f'option name Threads type spin default {Engine.threads} min 1 max {MAX_THREADS}')
+        self.send(f'option name Move Overhead type spin default {TimeManager.moveOverhead} min 0 max 5000')
+        self.send('option name Ponder type check default false')
+        self.send('uciok')
+
+    def setDebug(self, args):
+        self.debug = args[:1] == ['on']
+
+    def isready(self, args):
+        self.send('readyok')
+
+    def setoption(self, args):
+        # setoption name <id> [value <x>]; option names may contain spaces.
+        text = ' '.join(args)
+        name, _, value = text.partition(' value ')
+        name = name.removeprefix('name ').strip()
+        if name.lower() == 'hash':
+            self.waitForSearch()
+            self.engine.setHash(int(value))
+        elif name.lower() == 'threads':
+            self.waitForSearch()
+            self.engine.setThreads(min(int(value), MAX_THREADS))
+        elif name.lower() == 'move overhead':
+            self.moveOverhead = int(value)
+        elif name.lower() == 'ponder':
+            # Only tells us the GUI may send go ponder; nothing to set up.
             pass
-        elif re.search('position .*', instruction):
-            if re.search('position startpos moves *', instruction):
-                pass
-            elif re.search('position fen moves'):
-                pass
+        else:
+            self.info(f'unknown option {name}')
+
+    def register(self, args):
+        self.send('registration checking')
+        self.send('registration ok')
+
+    def ucinewgame(self, args):
+        self.waitForSearch()
+        self.engine.newGame()
+
+    def position(self, args):
+        ''' position [startpos | fen <fen>] [moves <move1> ... <movei>] '''
+        self.waitForSearch()
+        if 'moves' in args:
+            split = args.index('moves')
+            setup, moves = args[:split], args[split + 1:]
+        else:
+            setup, moves = args, []
+
+        if setup[0] == 'startpos':
+            fen = None
+        elif setup[0] == 'fen':
+            fen = ' '.join(setup[1:])
+        else:
+            raise ValueError(f'expected startpos or fen, got {setup[0]}')
+
+        position = self.engine.position
+        position.setFen(fen)
+        for text in moves:
+            move = Move.fromLongAlgebraic(text, position)
+            if move is None:
+                raise ValueError(f'illegal move {text}')
+            position.makeMove(move)
+
+    def go(self, args):
+        self.waitForSearch()
+        limits = parseGo(args)
+        if 'searchmoves' in limits:
+            # Read here rather than on the search thread, so a bad move is reported like any other bad command.
+            searchmoves = [Move.fromLongAlgebraic(text, self.engine.position) for text in limits['searchmoves']]
+            if any(move is None for move in searchmoves):
+                raise ValueError(f"illegal move in searchmoves {' '.join(limits['searchmoves'])}")
+            limits['searchmoves'] = searchmoves
+        self.stopEvent.clear()
+        # Made here rather than on the search thread, so a ponderhit that arrives straight away finds it.
+        self.timeManager = TimeManager(limits, self.engine.position.sideToMove, self.moveOverhead)
+        if self.timeManager.hard is not None:
+            self.debugInfo(f'time soft {self.timeManager.soft * 1000:.0f} hard {self.timeManager.hard * 1000:.0f}')
+        # Likewise, so ponderhit can't mistake the last search for this one.
+        self.engine.searcher = None
+        self.searchThread = threading.Thread(target=self.search, args=(limits, self.timeManager), daemon=True)
+        self.searchThread.start()
+
+    def search(self, limits, timeManager):
+        ''' Runs on the search thread. '''
+        report = lambda iteration: self.send(formatInfo(iteration))
+        searchmoves = limits.get('searchmoves')
+
+        try:
+            if limits.keys() & {'depth', 'nodes', 'mate', 'infinite', 'ponder'} or timeManager.limited():
+                # Search until one of the given limits is reached. A mate in n moves is found within 2n - 1 plies.
+                depth = limits.get('depth', INFINITE_DEPTH)
+                if 'mate' in limits:
+                    depth = min(depth, max(2 * limits['mate'] - 1, 1))
+                move = self.engine.search(depth, 0, limits.get('nodes'), report, timeManager, searchmoves)
             else:
-                print("Uknown command")
-        elif instruction == 'go':
-            pass
-        elif instruction == 'stop':
-            pass
-        elif instruction == 'ponderhit':
-            pass
-        elif instruction == 'quit':
-            pass
+                # A bare go uses the engine's default depth and move time.
+                move = self.engine.search(report=report, searchmoves=searchmoves)
+        except Exception as error:
+            logger.exception('search failed')
+            self.debugInfo(f'search failed: {error}')
+            move = None
         else:
-            pass
+            iterations = self.engine.iterations
+            if iterations:
+                self.debugInfo(f"searched {iterations[-1]['nodes']} nodes to depth {iterations[-1]['depth']}"
+                               f" in {iterations[-1]['time'] * 1000:.0f} ms")
+
+        # In infinite mode and while pondering bestmove waits for stop (or ponderhit), even if the search ended on its own.
+        if limits.get('infinite') or limits.get('ponder'):
+            self.stopEvent.wait()
 
-def writeId():
-    print('id name majikthise')
-    print('id author Kaleb Burnham')
+        if move is None:
+            self.send('bestmove 0000')
+            return
+        pv = self.engine.iterations[-1]['pv']
+        ponder = f' ponder {Move.fromEncoded(pv[1]).toLongAlgebraic()}' if len(pv) > 1 else ''
+        self.send(f'bestmove {move.toLongAlgebraic()}{ponder}')
 
-def writeUciok():
-    print('uciok')
+    def stop(self, args):
+        self.stopEvent.set()
+        thread = self.searchThread
+        # The search might not have started yet, in which case its first stop would be lost. Repeat until it ends.
+        while thread is not None and thread.is_alive():
+            self.engine.stop()
+            thread.join(0.001)
+        self.searchThread = None
 
-def writeReadyOk():
-    print('readyok')
+    def ponderhit(self, args):
+        ''' The opponent played the move we were pondering on, so the ponder search carries on as the real one. '''
+        if self.searchThread is None or not self.timeManager.pondering:
+            return
+        self.engine.ponderhit(self.timeManager)
+        # A ponder search that already finished can answer straight away.
+        self.stopEvent.set()
 
-def writeRegisterResponse():
-    print('later')
+    def waitForSearch(self):
+        ''' Commands that change the engine's state wait for a running search to finish, as the protocol requires. '''
+        if self.searchThread is not None:
+            self.searchThread.join()
+            self.searchThread = None
 
-def writeBestMove():
-    pass
+    def quit(self):
+        self.stop([])
 
-def writeInfo():
-    pass
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Majikthise UCI chess engine.')
+    parser.add_argument('--log', metavar='PATH', help='log the UCI traffic to PATH')
+    args = parser.parse_args(argv)
+    if args.log:
+        enableLog(args.log)
 
-def writeOption():
-    pass
+    try:
+        Uci().run(sys.stdin)
+    finally:
+        logging.shutdown()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
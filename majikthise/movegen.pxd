@@ -0,0 +1,28 @@
+from board cimport CBoard, Position, MoveBuffer, MoveList, move_t
+from tt cimport PerftTable
+
+cdef enum:
+	# Kinds of move, for generating a node's moves in stages. Noisy moves are captures,
+	# en passant included, and promotions; quiet moves are everything else.
+	GEN_NOISY = 1
+	GEN_QUIET = 2
+	GEN_ALL = GEN_NOISY | GEN_QUIET
+
+# What the stages of one node's generation share, worked out once by initMoveGen.
+cdef struct MoveGenState:
+	int us
+	int kingSquare
+	size_t checkers
+	size_t pinned
+	# The squares that resolve a single check, or every square.
+	size_t targetMask
+
+cpdef int generateMovesInto(Position position, MoveList moves) except -1
+cdef int generateLegalMoves(Position position, MoveBuffer *moves) nogil
+cdef void initMoveGen(Position position, MoveGenState *state) nogil
+cdef int addLegalMoves(Position position, MoveGenState *state, MoveBuffer *moves, int genType) nogil
+cdef int addLegalCaptures(Position position, MoveGenState *state, MoveBuffer *moves) nogil
+cdef bint isLegalMove(Position position, MoveGenState *state, move_t move) nogil
+cpdef long bulkPerft(Position position, int depth, PerftTable table=*) except -1
+cpdef bint inCheck(Position position) except -1
+cdef bint sideInCheck(CBoard board, int side) nogil
@@ -1,49 +1,53 @@
 # Cython directive
 # cython: profile=True
 
+from libc.stdint cimport uint64_t
+
 from bitboard cimport *
-from board import *
-from rays import RAYS
-from printer import *
+from magics cimport *
+from board cimport *
+from tt cimport PerftTable
+from board import Move, Square
+from printer import printBitboard, printCBoard, printCBoardDiff, printPositionDiff
 from ctypes import *
 
 from constants import *
 
 # Knight moves
-cpdef noNoEa(size_t b): 
+cpdef size_t noNoEa(size_t b): 
 	return (b << 17) & ~A_FILE
 
-cpdef noEaEa(size_t b):
+cpdef size_t noEaEa(size_t b):
 	return (b << 10) & ~A_FILE & ~B_FILE
 
-cpdef soEaEa(size_t b):
+cpdef size_t soEaEa(size_t b):
 	return (b >> 6) & ~A_FILE & ~B_FILE
 
-cpdef soSoEa(size_t b):
+cpdef size_t soSoEa(size_t b):
 	return (b >> 15) & ~A_FILE
 
-cpdef noNoWe(size_t b):
+cpdef size_t noNoWe(size_t b):
 	return (b << 15) & ~H_FILE
 
-cpdef noWeWe(size_t b):
+cpdef size_t noWeWe(size_t b):
 	return (b << 6) & ~H_FILE & ~G_FILE
 
-cpdef soWeWe(size_t b):
+cpdef size_t soWeWe(size_t b):
 	return (b >> 10) & ~H_FILE & ~G_FILE
 
-cpdef soSoWe(size_t b):
+cpdef size_t soSoWe(size_t b):
 	return (b >> 17) & ~H_FILE
 
-cpdef noWe(size_t b):
+cpdef size_t noWe(size_t b):
 	return (b << 7) & ~H_FILE
 
-cpdef noEa(size_t b):
+cpdef size_t noEa(size_t b):
 	return (b << <size_t> 9) & ~A_FILE
 
-cpdef soWe(size_t b):
+cpdef size_t soWe(size_t b):
 	return (b >> 9) & ~H_FILE
 
-cpdef soEa(size_t b):
+cpdef size_t soEa(size_t b):
 	return (b >> 7) & ~A_FILE
 
 #def northOne(size_t b):
@@ -60,191 +64,571 @@ cpdef southOne(size_t b):
 
 
 def generateAllMoves(position: Position):
-	moves = []
-	# Missing
-	if position.sideToMove == WHITE:
-		# Still missing Pawn Capture And Promotion and En Passant moves.
-		moves.extend(wGeneratePawnPushMoves(position))
-		moves.extend(wGenerateDoublePawnPushMoves(position))
-		moves.extend(wGeneratePawnCaptures(position))
-	else:
-		moves.extend(bGeneratePawnPushMoves(position))
-		moves.extend(bGenerateDoublePawnPushMoves(position))
-		moves.extend(bGeneratePawnCaptures(position))
-	moves.extend(generateBishopMoves(position))
-	moves.extend(generateKnightMoves(position))
-	moves.extend(generateRookMoves(position))
-	moves.extend(generateQueenMoves(position))
-	moves.extend(generateKingMoves(position))
-	
-	
+	return toMoves(generateEncodedMoves(position))
+
+def generateEncodedMoves(position: Position):
+	moves = MoveList()
+	generateMovesInto(position, moves)
 	return moves
 
+cpdef int generateMovesInto(Position position, MoveList moves) except -1:
+	''' Fill the buffer with the legal moves for the side to move and return how many there are. '''
+	return generateLegalMoves(position, &moves.buffer)
+
+cdef int generateLegalMoves(Position position, MoveBuffer *moves) nogil:
+	cdef MoveGenState state
+	moves.count = 0
+	initMoveGen(position, &state)
+	return addLegalMoves(position, &state, moves, GEN_ALL)
+
+def generateNoisyMoves(Position position):
+	''' Legal captures, en passant included, and promotions. '''
+	return generateMovesOfType(position, GEN_NOISY)
+
+def generateQuietMoves(Position position):
+	''' Legal moves that neither capture nor promote. '''
+	return generateMovesOfType(position, GEN_QUIET)
+
+cdef list generateMovesOfType(Position position, int genType):
+	cdef MoveList moves = MoveList()
+	cdef MoveGenState state
+	initMoveGen(position, &state)
+	addLegalMoves(position, &state, &moves.buffer, genType)
+	return toMoves(moves)
+
+cdef void initMoveGen(Position position, MoveGenState *state) nogil:
+	# The checkers, the pinned pieces and the squares that resolve a check are worked out once,
+	# and every piece's targets are masked with them, so no move has to be made to test it.
+	# https://www.chessprogramming.org/Move_Generation#Legal
+	cdef int us = position.side
+	cdef size_t king = position.board.bitboards[us][KING]
+	cdef size_t enemies = position.board.blackBoard if us == WHITE else position.board.whiteBoard
+
+	state.us = us
+	state.kingSquare = NO_SQUARE
+	state.checkers = 0
+	state.pinned = 0
+	state.targetMask = ~(<size_t> 0)
+	if king:
+		state.kingSquare = BSF(king)
+		state.checkers = position.board.attackers(state.kingSquare, position.board.occupied) & enemies
+		state.pinned = pinnedPieces(position.board, us, state.kingSquare)
+
+	# Out of a single check, capture the checker or block the line between it and the king.
+	if state.checkers and not state.checkers & (state.checkers - 1):
+		state.targetMask = state.checkers | BETWEEN[state.kingSquare][BSF(state.checkers)]
+
+cdef int addLegalMoves(Position position, MoveGenState *state, MoveBuffer *moves, int genType) nogil:
+	# Appends to moves rather than starting over, so the stages of one node can share a buffer.
+	# Captures land on enemy pieces and quiet moves on empty squares, so the pieces' targets
+	# are split by one more mask. Pawns sort their own moves out, since a promotion is noisy either way.
+	cdef int us = state.us
+	cdef size_t targetMask = state.targetMask
+
+	if state.checkers & (state.checkers - 1):
+		# In double check only the king can move.
+		addLegalKingMoves(position.board, moves, us, position.castling, state.kingSquare, state.checkers, genType)
+		return moves.count
+
+	if genType == GEN_NOISY:
+		targetMask &= position.board.blackBoard if us == WHITE else position.board.whiteBoard
+	elif genType == GEN_QUIET:
+		targetMask &= ~position.board.occupied
+
+	addLegalPawnMoves(position.board, moves, us, position.epSquare, state.kingSquare, state.targetMask, state.pinned, genType)
+	addLegalPieceMoves(position.board, moves, us, BISHOP, state.kingSquare, targetMask, state.pinned)
+	addLegalPieceMoves(position.board, moves, us, KNIGHT, state.kingSquare, targetMask, state.pinned)
+	addLegalPieceMoves(position.board, moves, us, ROOK, state.kingSquare, targetMask, state.pinned)
+	addLegalPieceMoves(position.board, moves, us, QUEEN, state.kingSquare, targetMask, state.pinned)
+	if state.kingSquare != NO_SQUARE:
+		addLegalKingMoves(position.board, moves, us, position.castling, state.kingSquare, state.checkers, genType)
+
+	return moves.count
+
+def generateCaptures(Position position):
+	''' Legal captures and promotions, from the quiescence search's generator. '''
+	cdef MoveList moves = MoveList()
+	cdef MoveGenState state
+	initMoveGen(position, &state)
+	addLegalCaptures(position, &state, &moves.buffer)
+	return toMoves(moves)
+
+cdef int addLegalCaptures(Position position, MoveGenState *state, MoveBuffer *moves) nogil:
+	# The same moves as addLegalMoves with GEN_NOISY, but this runs at every quiescence node,
+	# so it is the fastest path: targets are masked to the enemy board before anything is
+	# looked at, unpinned pawns capture set-wise, and captured pieces are read from the mailbox.
+	# https://www.chessprogramming.org/Quiescence_Search
+	cdef int us = state.us, kingSquare = state.kingSquare
+	cdef size_t enemies = position.board.blackBoard if us == WHITE else position.board.whiteBoard
+	cdef size_t targetMask = state.targetMask & enemies
+	cdef size_t pieces, targets
+	cdef int piece, origin, destination
+
+	if state.checkers & (state.checkers - 1):
+		addLegalKingMoves(position.board, moves, us, position.castling, kingSquare, state.checkers, GEN_NOISY)
+		return moves.count
+
+	addPawnCaptures(position, moves, us, kingSquare, state.targetMask, state.pinned)
+
+	for piece in range(KNIGHT, KING):
+		pieces = position.board.bitboards[us][piece]
+		while pieces:
+			origin = BSF(pieces)
+			pieces &= pieces - 1
+			if piece == KNIGHT:
+				targets = knightAttacks(origin)
+			elif piece == BISHOP:
+				targets = bishopMagicAttacks(origin, position.board.occupied)
+			elif piece == ROOK:
+				targets = rookMagicAttacks(origin, position.board.occupied)
+			else:
+				targets = queenMagicAttacks(origin, position.board.occupied)
+			targets &= targetMask
+			if state.pinned & SQUARE_TO_BITBOARD[origin]:
+				targets &= LINE[kingSquare][origin]
+			while targets:
+				destination = BSF(targets)
+				targets &= targets - 1
+				addMove(moves, encodeMove(origin, destination, CAPTURE, position.board.pieceOn(destination)))
+
+	if kingSquare != NO_SQUARE:
+		targets = kingAttacks(kingSquare) & enemies
+		while targets:
+			destination = BSF(targets)
+			targets &= targets - 1
+			# Take the king off the board so a slider that checks it also covers the square behind it.
+			if not position.board.attackers(destination, position.board.occupied ^ SQUARE_TO_BITBOARD[kingSquare]) & enemies:
+				addMove(moves, encodeMove(kingSquare, destination, CAPTURE, position.board.pieceOn(destination)))
+
+	return moves.count
+
+cdef void addPawnCaptures(Position position, MoveBuffer *moves, int us, int kingSquare, size_t targetMask, size_t pinned) nogil:
+	# Pawn captures and promotions. Unpinned pawns move set-wise, one shift per direction;
+	# the rare pinned ones are taken one at a time and kept on the line of the pin.
+	cdef int forward = 8 if us == WHITE else -8
+	cdef size_t enemies = position.board.blackBoard if us == WHITE else position.board.whiteBoard
+	cdef size_t empty = ~position.board.occupied
+	cdef size_t pawns = position.board.bitboards[us][PAWN]
+	cdef size_t free = pawns & ~pinned
+	cdef size_t lastRank = 0xFF00000000000000 if us == WHITE else 0xFF
+	cdef size_t west, east, pushes, targets, allowed
+	cdef int origin, destination, epSquare = position.epSquare
+
+	if us == WHITE:
+		west = (free & ~A_FILE) << 7
+		east = (free & ~H_FILE) << 9
+		pushes = free << 8
+	else:
+		west = (free & ~A_FILE) >> 9
+		east = (free & ~H_FILE) >> 7
+		pushes = free >> 8
+
+	targets = west & enemies & targetMask
+	while targets:
+		destination = BSF(targets)
+		targets &= targets - 1
+		addPawnMove(moves, destination - forward + 1, destination, position.board.pieceOn(destination))
+	targets = east & enemies & targetMask
+	while targets:
+		destination = BSF(targets)
+		targets &= targets - 1
+		addPawnMove(moves, destination - forward - 1, destination, position.board.pieceOn(destination))
+	targets = pushes & empty & lastRank & targetMask
+	while targets:
+		destination = BSF(targets)
+		targets &= targets - 1
+		addPawnMove(moves, destination - forward, destination, NO_PIECE)
+
+	pawns &= pinned
+	while pawns:
+		origin = BSF(pawns)
+		pawns &= pawns - 1
+		allowed = targetMask & LINE[kingSquare][origin]
+		targets = PAWN_ATTACKS[us][origin] & enemies & allowed
+		while targets:
+			destination = BSF(targets)
+			targets &= targets - 1
+			addPawnMove(moves, origin, destination, position.board.pieceOn(destination))
+		destination = origin + forward
+		if SQUARE_TO_BITBOARD[destination] & empty & lastRank & allowed:
+			addPawnMove(moves, origin, destination, NO_PIECE)
+
+	if epSquare != NO_SQUARE:
+		# legalEnPassant sees pins as well as the discovered checks along the rank.
+		targets = PAWN_ATTACKS[INVERT(us)][epSquare] & position.board.bitboards[us][PAWN]
+		while targets:
+			origin = BSF(targets)
+			targets &= targets - 1
+			if legalEnPassant(position.board, us, origin, epSquare, kingSquare):
+				addMove(moves, encodeMove(origin, epSquare, EP_CAPTURE, PAWN))
+
+cdef bint isLegalMove(Position position, MoveGenState *state, move_t move) nogil:
+	# For a move from somewhere else, such as the transposition table. Only the moves of the
+	# moving piece's type onto the destination square are generated, and move is looked for among them.
+	cdef MoveBuffer moves
+	cdef int origin = moveOrigin(move), piece = position.board.pieceOn(origin), i
+	cdef size_t own = position.board.whiteBoard if state.us == WHITE else position.board.blackBoard
+	cdef size_t targetMask = state.targetMask & SQUARE_TO_BITBOARD[moveDestination(move)]
+
+	if move == NULL_MOVE or piece == NO_PIECE or not own & SQUARE_TO_BITBOARD[origin]:
+		return False
+
+	moves.count = 0
+	if piece == KING:
+		addLegalKingMoves(position.board, &moves, state.us, position.castling, state.kingSquare, state.checkers, GEN_ALL)
+	elif state.checkers & (state.checkers - 1):
+		return False
+	elif piece == PAWN:
+		addLegalPawnMoves(position.board, &moves, state.us, position.epSquare, state.kingSquare, targetMask, state.pinned, GEN_ALL)
+	else:
+		addLegalPieceMoves(position.board, &moves, state.us, piece, state.kingSquare, targetMask, state.pinned)
+
+	for i in range(moves.count):
+		if moves.moves[i] == move:
+			return True
+	return False
+
+def generatePseudolegalMoves(Position position):
+	''' Moves that follow the piece movement rules but may leave the king in check. '''
+	cdef MoveList moves = MoveList()
+	if position.side == WHITE:
+		addWPawnPushMoves(position.board, &moves.buffer)
+		addWDoublePawnPushMoves(position.board, &moves.buffer)
+		addWPawnCaptures(position.board, &moves.buffer)
+	else:
+		addBPawnPushMoves(position.board, &moves.buffer)
+		addBDoublePawnPushMoves(position.board, &moves.buffer)
+		addBPawnCaptures(position.board, &moves.buffer)
+	addBishopMoves(position, &moves.buffer)
+	addKnightMoves(position, &moves.buffer)
+	addRookMoves(position, &moves.buffer)
+	addQueenMoves(position, &moves.buffer)
+	addKingMoves(position, &moves.buffer)
+	return toMoves(moves)
+
+cpdef bint inCheck(Position position) except -1:
+	return sideInCheck(position.board, position.side)
+
+cdef bint sideInCheck(CBoard board, int side) nogil:
+	cdef size_t king = board.bitboards[side][KING]
+	return king != 0 and board.attacked(BSF(king), INVERT(side))
+
+cdef size_t pinnedPieces(CBoard board, int us, int kingSquare) nogil:
+	''' Our pieces that are the only thing between the king and an enemy slider. '''
+	cdef int them = INVERT(us)
+	cdef size_t own = board.whiteBoard if us == WHITE else board.blackBoard
+	cdef size_t enemies = board.blackBoard if us == WHITE else board.whiteBoard
+	cdef uint64_t *theirs = board.bitboards[them]
+	cdef size_t pinned = 0, between
+	# Enemy sliders that would attack the king if none of our pieces were in the way.
+	cdef size_t snipers = ((rookMagicAttacks(kingSquare, enemies) & (theirs[ROOK] | theirs[QUEEN]))
+						| (bishopMagicAttacks(kingSquare, enemies) & (theirs[BISHOP] | theirs[QUEEN])))
+
+	while snipers:
+		between = BETWEEN[kingSquare][BSF(snipers)] & board.occupied
+		snipers &= snipers - 1
+		if between and not (between & (between - 1)) and between & own:
+			pinned |= between
+
+	return pinned
+
+cdef void addLegalPieceMoves(CBoard board, MoveBuffer *moves, int us, int piece, int kingSquare, size_t targetMask, size_t pinned) nogil:
+	cdef size_t own = board.whiteBoard if us == WHITE else board.blackBoard
+	cdef size_t pieces = board.bitboards[us][piece]
+	cdef size_t targets
+	cdef int origin
+
+	while pieces:
+		origin = BSF(pieces)
+		pieces &= pieces - 1
+		if piece == KNIGHT:
+			targets = knightAttacks(origin)
+		elif piece == BISHOP:
+			targets = bishopMagicAttacks(origin, board.occupied)
+		elif piece == ROOK:
+			targets = rookMagicAttacks(origin, board.occupied)
+		else:
+			targets = queenMagicAttacks(origin, board.occupied)
+
+		targets &= ~own & targetMask
+		# A pinned piece can only slide along the pin.
+		if pinned & SQUARE_TO_BITBOARD[origin]:
+			targets &= LINE[kingSquare][origin]
+		addTargets(board, moves, origin, targets, INVERT(us))
+
+cdef void addPawnMove(MoveBuffer *moves, int origin, int destination, int captured) nogil:
+	cdef int flag = QUIET if captured == NO_PIECE else CAPTURE
+	cdef int promotion
+
+	# Reaching the last rank promotes, to each of the four pieces.
+	if destination >= 56 or destination < 8:
+		for promotion in range(QUEEN, PAWN, -1):
+			addMove(moves, encodePromotion(origin, destination, flag | KNIGHT_PROMOTION | (promotion - KNIGHT), captured, promotion))
+	else:
+		addMove(moves, encodeMove(origin, destination, flag, captured))
+
+cdef void addLegalPawnMoves(CBoard board, MoveBuffer *moves, int us, int epSquare, int kingSquare, size_t targetMask, size_t pinned, int genType) nogil:
+	cdef int them = INVERT(us)
+	cdef int forward = 8 if us == WHITE else -8
+	cdef int startRank = 1 if us == WHITE else 6
+	cdef size_t enemies = board.blackBoard if us == WHITE else board.whiteBoard
+	cdef size_t pawns = board.bitboards[us][PAWN]
+	cdef size_t allowed, targets, pawn
+	cdef int origin, destination
+
+	while pawns:
+		origin = BSF(pawns)
+		pawns &= pawns - 1
+		pawn = SQUARE_TO_BITBOARD[origin]
+
+		allowed = targetMask
+		if pinned & pawn:
+			allowed &= LINE[kingSquare][origin]
+
+		# Pushes. One onto the last rank promotes, which makes it noisy.
+		destination = origin + forward
+		if not SQUARE_TO_BITBOARD[destination] & board.occupied:
+			if SQUARE_TO_BITBOARD[destination] & allowed \
+					and genType & (GEN_NOISY if destination >= 56 or destination < 8 else GEN_QUIET):
+				addPawnMove(moves, origin, destination, NO_PIECE)
+			if genType & GEN_QUIET and origin // 8 == startRank \
+					and not SQUARE_TO_BITBOARD[destination + forward] & board.occupied \
+					and SQUARE_TO_BITBOARD[destination + forward] & allowed:
+				addMove(moves, encodeMove(origin, destination + forward, DOUBLE_PAWN_PUSH, NO_PIECE))
+
+		# Captures
+		if not genType & GEN_NOISY:
+			continue
+		targets = PAWN_ATTACKS[us][origin] & enemies & allowed
+		while targets:
+			destination = BSF(targets)
+			targets &= targets - 1
+			addPawnMove(moves, origin, destination, board.pieceTypeOn(them, destination))
+
+		if epSquare != NO_SQUARE and PAWN_ATTACKS[us][origin] & SQUARE_TO_BITBOARD[epSquare]:
+			if legalEnPassant(board, us, origin, epSquare, kingSquare):
+				addMove(moves, encodeMove(origin, epSquare, EP_CAPTURE, PAWN))
+
+cdef bint legalEnPassant(CBoard board, int us, int origin, int epSquare, int kingSquare) nogil:
+	# En passant empties two squares on one rank, which the pin mask can't see,
+	# so play it out on the occupancy and look for any attack on the king.
+	cdef int captured = epSquare - 8 if us == WHITE else epSquare + 8
+	cdef size_t enemies = board.blackBoard if us == WHITE else board.whiteBoard
+	cdef size_t occupied
+
+	if kingSquare == NO_SQUARE:
+		return True
+	occupied = (board.occupied ^ SQUARE_TO_BITBOARD[origin] ^ SQUARE_TO_BITBOARD[captured]) | SQUARE_TO_BITBOARD[epSquare]
+	return not (board.attackers(kingSquare, occupied) & enemies & ~SQUARE_TO_BITBOARD[captured])
+
+cdef void addLegalKingMoves(CBoard board, MoveBuffer *moves, int us, int castling, int kingSquare, size_t checkers, int genType) nogil:
+	cdef size_t own = board.whiteBoard if us == WHITE else board.blackBoard
+	cdef size_t enemies = board.blackBoard if us == WHITE else board.whiteBoard
+	cdef size_t rooks = board.bitboards[us][ROOK]
+	# Take the king off the board so sliders that check it also cover the squares behind it.
+	cdef size_t occupied = board.occupied ^ SQUARE_TO_BITBOARD[kingSquare]
+	cdef size_t targets = kingAttacks(kingSquare) & ~own
+	cdef size_t safe = 0
+	cdef int destination
+
+	if genType == GEN_NOISY:
+		targets &= enemies
+	elif genType == GEN_QUIET:
+		targets &= ~board.occupied
+
+	while targets:
+		destination = BSF(targets)
+		targets &= targets - 1
+		if not board.attackers(destination, occupied) & enemies:
+			safe |= SQUARE_TO_BITBOARD[destination]
+	addTargets(board, moves, kingSquare, safe, INVERT(us))
+
+	# Castle moves. The king may not castle out of, through or into check.
+	if checkers or not genType & GEN_QUIET:
+		return
+	if us == WHITE and kingSquare == E1:
+		if (castling & WHITE_KINGSIDE and rooks & SQUARE_TO_BITBOARD[H1]
+				and not BETWEEN[E1][H1] & board.occupied
+				and safe & SQUARE_TO_BITBOARD[F1] and not board.attacked(G1, BLACK)):
+			addMove(moves, encodeMove(kingSquare, G1, KING_CASTLE, NO_PIECE))
+		if (castling & WHITE_QUEENSIDE and rooks & SQUARE_TO_BITBOARD[A1]
+				and not BETWEEN[E1][A1] & board.occupied
+				and safe & SQUARE_TO_BITBOARD[D1] and not board.attacked(C1, BLACK)):
+			addMove(moves, encodeMove(kingSquare, C1, QUEEN_CASTLE, NO_PIECE))
+	elif us == BLACK and kingSquare == E8:
+		if (castling & BLACK_KINGSIDE and rooks & SQUARE_TO_BITBOARD[H8]
+				and not BETWEEN[E8][H8] & board.occupied
+				and safe & SQUARE_TO_BITBOARD[F8] and not board.attacked(G8, WHITE)):
+			addMove(moves, encodeMove(kingSquare, G8, KING_CASTLE, NO_PIECE))
+		if (castling & BLACK_QUEENSIDE and rooks & SQUARE_TO_BITBOARD[A8]
+				and not BETWEEN[E8][A8] & board.occupied
+				and safe & SQUARE_TO_BITBOARD[D8] and not board.attacked(C8, WHITE)):
+			addMove(moves, encodeMove(kingSquare, C8, QUEEN_CASTLE, NO_PIECE))
+
+
+cpdef long bulkPerft(Position position, int depth, PerftTable table=None) except -1:
+	'''
+	Perft that counts the moves generated at the last ply instead of making them,
+	and looks up subtrees it has already counted in table when one is given.
+	https://www.chessprogramming.org/Perft#Bulk-counting
+	'''
+	cdef MoveList moves
+	cdef long nodes = 0
+	cdef size_t key = 0
+	cdef int i
+
+	if depth == 0:
+		return 1
+
+	if table is not None and depth > 1:
+		key = positionKey(position)
+		nodes = table.probe(key, depth)
+		if nodes >= 0:
+			return nodes
+		nodes = 0
+
+	moves = position.moveListAt(depth)
+	generateLegalMoves(position, &moves.buffer)
+	if depth == 1:
+		return moves.buffer.count
+
+	for i in range(moves.buffer.count):
+		position.doMove(moves.buffer.moves[i])
+		nodes += bulkPerft(position, depth - 1, table)
+		position.undoMove(moves.buffer.moves[i])
+
+	if table is not None:
+		table.store(key, depth, nodes)
+	return nodes
+
+cdef list toMoves(MoveList moves):
+	return [Move.fromEncoded(move) for move in moves]
+
+cdef void addTargets(CBoard board, MoveBuffer *moves, int origin, size_t targets, int enemy) nogil:
+	# Destinations holding an enemy piece become captures, the rest are quiet moves.
+	cdef size_t enemies = board.whiteBoard if enemy == WHITE else board.blackBoard
+	cdef int destination
+	while targets:
+		destination = BSF(targets)
+		targets &= targets - 1
+		if SQUARE_TO_BITBOARD[destination] & enemies:
+			addMove(moves, encodeMove(origin, destination, CAPTURE, board.pieceTypeOn(enemy, destination)))
+		else:
+			addMove(moves, encodeMove(origin, destination, QUIET, NO_PIECE))
+
 def wGenerateAllPawnMoves(position: Position):
 	pass
 
 def wGeneratePawnPushMoves(position: Position) -> list:
-	board = position.board
-	cdef size_t toBoard = northOne(board.pieceBoards[WHITE][PAWN]) & ~board.occupied & ~EIGHTH_RANK
+	cdef MoveList moves = MoveList()
+	addWPawnPushMoves(position.board, &moves.buffer)
+	return toMoves(moves)
 
+cdef void addWPawnPushMoves(CBoard board, MoveBuffer *moves) except *:
 	# Promotions are handled elsewhere, so pawns on the seventh rank are ignored.
-	#eligiblePawns = southOne(toBoard) & ~SEVENTH_RANK
-
-	moves = []
-	while toBoard > 0:
-		destination = Square(BSF(toBoard))
-		origin = Square(destination.value - 8)
-		moves.append(Move(origin, destination))
-		toBoard ^= SQUARE_TO_BITBOARD[destination.value]
-
-	""" 
-	while eligiblePawns > 0:
-		origin = np.uint64(BSF(eligiblePawns))
-		eligiblePawns ^= SQUARE_TO_BITBOARD[origin]
-		#eligiblePawns ^= np.uint64(0x01) << origin
+	cdef size_t toBoard = northOne(board.bitboards[WHITE][PAWN]) & ~board.occupied & ~<size_t> EIGHTH_RANK
+	cdef int destination
 
-		destination =  np.uint64(BSF(toBoard))
-		toBoard ^= SQUARE_TO_BITBOARD[destination]
-		#toBoard ^= np.uint64(0x01) << destination
-
-		moves.append(Move(origin=Square(origin), destination=Square(destination))) """
-
-	return moves
+	while toBoard:
+		destination = BSF(toBoard)
+		toBoard &= toBoard - 1
+		addMove(moves, encodeMove(destination - 8, destination, QUIET, NO_PIECE))
 
 def bGeneratePawnPushMoves(position: Position) -> list:
-	board = position.board
-	cdef size_t toBoard = southOne(board.pieceBoards[BLACK][PAWN]) & ~board.occupied & ~FIRST_RANK
-	# Promotions are handled elsewhere, so pawns on the second rank are ignored.
-	#eligiblePawns = northOne(toBoard) & ~SECOND_RANK
-	
-	moves = []
-	
-	while toBoard > 0:
-		destination = Square(BSF(toBoard))
-		origin = Square(destination.value + 8)
-		moves.append(Move(origin, destination))
-		##print(SQUARE_TO_BITBOARD[destination.value])
-		
-		toBoard ^= SQUARE_TO_BITBOARD[destination.value]
-	
-	"""
-	for i in reversed(range(8, 56)):
-		if position.board.pieceLocations[i] != PAWN:
-			continue
-
-		if SQUARE_TO_BITBOARD[i] & position.board.pieceBoards[BLACK][PAWN]:
-			if position.board.pieceLocations[i-8] == None:
-				moves.append(Move(Square(i), Square(i-8)))
-
-	
-	"""
-
+	cdef MoveList moves = MoveList()
+	addBPawnPushMoves(position.board, &moves.buffer)
+	return toMoves(moves)
 
-	"""
-	moves = []
-	while eligiblePawns > 0:
-		origin = np.uint64(BSF(eligiblePawns))
-		eligiblePawns ^= np.uint64(0x01) << origin
-
-		destination =  np.uint64(BSF(toBoard))
-		toBoard ^= np.uint64(0x01) << destination
-
-		moves.append(Move(origin=Square(origin), destination=Square(destination)))"""
+cdef void addBPawnPushMoves(CBoard board, MoveBuffer *moves) except *:
+	# Promotions are handled elsewhere, so pawns on the second rank are ignored.
+	cdef size_t toBoard = southOne(board.bitboards[BLACK][PAWN]) & ~board.occupied & ~<size_t> FIRST_RANK
+	cdef int destination
 
-	return moves
+	while toBoard:
+		destination = BSF(toBoard)
+		toBoard &= toBoard - 1
+		addMove(moves, encodeMove(destination + 8, destination, QUIET, NO_PIECE))
 
 def wGenerateDoublePawnPushMoves(position: Position) -> list:
-	board = position.board
-	toBoard = northOne(northOne(SECOND_RANK & board.pieceBoards[WHITE][PAWN]) & ~board.occupied) & ~board.occupied
-	eligiblePawns = southOne(southOne(toBoard))
-
-	fromSingles = singularize(eligiblePawns)
-	toSingles = singularize(toBoard)
-
-	if (Square.A2.bitboard() | position.board.pieceBoards[WHITE][PAWN]) and not (Square.A3.bitboard() | Square.A4.bitboard()) & board.occupied:
-		pass
-
-	moves = []
-	while eligiblePawns > 0:
-		origin = BSF(eligiblePawns)
-		eligiblePawns ^= 1 << origin
-
-		destination =  BSF(toBoard)
-		toBoard ^= 1 << destination
+	cdef MoveList moves = MoveList()
+	addWDoublePawnPushMoves(position.board, &moves.buffer)
+	return toMoves(moves)
 
-		moves.append(Move(origin=Square(origin), destination=Square(destination), flag=0x01))
+cdef void addWDoublePawnPushMoves(CBoard board, MoveBuffer *moves) except *:
+	cdef size_t toBoard = northOne(northOne(<size_t> SECOND_RANK & board.bitboards[WHITE][PAWN]) & ~board.occupied) & ~board.occupied
+	cdef int destination
 
-	return moves
+	while toBoard:
+		destination = BSF(toBoard)
+		toBoard &= toBoard - 1
+		addMove(moves, encodeMove(destination - 16, destination, DOUBLE_PAWN_PUSH, NO_PIECE))
 
 def bGenerateDoublePawnPushMoves(position: Position) -> list:
-	board = position.board
-	toBoard = southOne(southOne(SECOND_RANK & board.pieceBoards[BLACK][PAWN]) & ~board.occupied) & ~board.occupied
-	eligiblePawns = northOne(northOne(toBoard))
-
-	moves = []
-	while eligiblePawns > 0:
-		origin = BSF(eligiblePawns)
-		eligiblePawns ^= 0x01 << origin
-
-		destination =  BSF(toBoard)
-		toBoard ^= 0x01 << destination
+	cdef MoveList moves = MoveList()
+	addBDoublePawnPushMoves(position.board, &moves.buffer)
+	return toMoves(moves)
 
-		moves.append(Move(origin=Square(origin), destination=Square(destination), flag=0x01))
+cdef void addBDoublePawnPushMoves(CBoard board, MoveBuffer *moves) except *:
+	cdef size_t toBoard = southOne(southOne(<size_t> SEVENTH_RANK & board.bitboards[BLACK][PAWN]) & ~board.occupied) & ~board.occupied
+	cdef int destination
 
-	return moves
+	while toBoard:
+		destination = BSF(toBoard)
+		toBoard &= toBoard - 1
+		addMove(moves, encodeMove(destination + 16, destination, DOUBLE_PAWN_PUSH, NO_PIECE))
 
 def wGeneratePawnCaptures(position: Position) -> list:
-	board = position.board
-	
+	cdef MoveList moves = MoveList()
+	addWPawnCaptures(position.board, &moves.buffer)
+	return toMoves(moves)
+
+cdef void addWPawnCaptures(CBoard board, MoveBuffer *moves) except *:
 	# Eigth-rank pawn captures are handled in wGeneratePromotionAndCaptureMoves
-	singlePawns = singularize(board.pieceBoards[WHITE][PAWN] & ~SEVENTH_RANK)
+	cdef size_t pawns = board.bitboards[WHITE][PAWN] & ~<size_t> SEVENTH_RANK
+	cdef size_t pawn
+	cdef int origin
 
-	moves = []
-	for i in range(len(singlePawns)):
-		if noWe(singlePawns[i]) & board.blackBoard:
-			origin = Square(BSF(singlePawns[i]))
-			destination = Square(origin + 7)
-			capturedPieceType = position.board.pieceTypeAtSquare(destination)
-			moves.append(Move(origin, destination, flag=0x04, capturedPieceType=capturedPieceType))
-
-		if noEa(singlePawns[i]) & board.blackBoard:
-			origin = Square(BSF(singlePawns[i]))
-			destination = Square(origin + 9)
-			capturedPieceType = position.board.pieceTypeAtSquare(destination)
-			moves.append(Move(origin, destination, flag=0x04, capturedPieceType=capturedPieceType))
+	while pawns:
+		origin = BSF(pawns)
+		pawn = SQUARE_TO_BITBOARD[origin]
+		pawns ^= pawn
 
-	return moves
+		if noWe(pawn) & board.blackBoard:
+			addMove(moves, encodeMove(origin, origin + 7, CAPTURE, board.pieceTypeOn(BLACK, origin + 7)))
+
+		if noEa(pawn) & board.blackBoard:
+			addMove(moves, encodeMove(origin, origin + 9, CAPTURE, board.pieceTypeOn(BLACK, origin + 9)))
 
 def bGeneratePawnCaptures(position: Position) -> list:
-	board = position.board
+	cdef MoveList moves = MoveList()
+	addBPawnCaptures(position.board, &moves.buffer)
+	return toMoves(moves)
 
+cdef void addBPawnCaptures(CBoard board, MoveBuffer *moves) except *:
 	# First-rank pawn captures are handled in bGeneratePromotionAndCaptureMoves
-	singlePawns = singularize(board.pieceBoards[BLACK][PAWN] & ~SECOND_RANK)
-	moves = []
-	for i in range(len(singlePawns)):
-		if soWe(singlePawns[i]) & board.whiteBoard:
-			origin = Square(BSF(singlePawns[i]))
-			destination = Square(origin - 9)
-			capturedPieceType = position.board.pieceTypeAtSquare(destination)
-			moves.append(Move(origin, destination, flag=0x04, capturedPieceType=capturedPieceType))
-
-		if soEa(singlePawns[i]) & board.whiteBoard:
-			origin = Square(BSF(singlePawns[i]))
-			destination = Square(origin - 7)
-			capturedPieceType = position.board.pieceTypeAtSquare(destination)
-			moves.append(Move(origin, destination, flag=0x04, capturedPieceType=capturedPieceType))
+	cdef size_t pawns = board.bitboards[BLACK][PAWN] & ~<size_t> SECOND_RANK
+	cdef size_t pawn
+	cdef int origin
 
-	return moves
+	while pawns:
+		origin = BSF(pawns)
+		pawn = SQUARE_TO_BITBOARD[origin]
+		pawns ^= pawn
+
+		if soWe(pawn) & board.whiteBoard:
+			addMove(moves, encodeMove(origin, origin - 9, CAPTURE, board.pieceTypeOn(WHITE, origin - 9)))
+
+		if soEa(pawn) & board.whiteBoard:
+			addMove(moves, encodeMove(origin, origin - 7, CAPTURE, board.pieceTypeOn(WHITE, origin - 7)))
 
-cpdef size_t knightAttacks(sq: Square):
-	board = 1 << sq.value
-	return noNoEa(board) | noEaEa(board) | soEaEa(board) | soSoEa(board) | noNoWe(board) | noWeWe(board) | soWeWe(board) | soSoWe(board)
+cpdef size_t knightAttacks(int sq) nogil:
+	return KNIGHT_ATTACKS[sq]
 
 # Generate the moves for a board with a single knight.
 cpdef list knightMoves(size_t board):
 	assert POPCOUNT(board) == 1
 	origin = BSF(board)
-	toBoard = knightAttacks(Square(origin))
+	toBoard = knightAttacks(origin)
 
 	moves = []
 	while toBoard:
@@ -256,235 +640,118 @@ cpdef list knightMoves(size_t board):
 		
 	return moves
 
-cpdef list generateKnightMoves(position: Position):
-	if not position.board.pieceBoards[WHITE][KNIGHT] and position.sideToMove == BLACK:
-		return []
+cpdef list generateKnightMoves(Position position):
+	cdef MoveList moves = MoveList()
+	addKnightMoves(position, &moves.buffer)
+	return toMoves(moves)
 
-	if not position.board.pieceBoards[BLACK][KNIGHT] and position.sideToMove == BLACK:
-		return []
+cdef void addKnightMoves(Position position, MoveBuffer *moves) except *:
+	cdef CBoard board = position.board
+	cdef size_t own = board.whiteBoard if position.side == WHITE else board.blackBoard
+	cdef size_t knights = board.bitboards[position.side][KNIGHT]
+	cdef int origin
 
-	cdef size_t origin
-	cdef size_t knights
-	cdef size_t one
+	while knights:
+		origin = BSF(knights)
+		knights &= knights - 1
+		addTargets(board, moves, origin, knightAttacks(origin) & ~own, INVERT(position.side))
 
-	# Make copy to avoid modifying the actual board.
-	knights = position.board.pieceBoards[WHITE][KNIGHT] if position.sideToMove == WHITE else position.board.pieceBoards[BLACK][KNIGHT]
-	pseudolegalMoves = []
-	loop = 0
-	while knights > 0:
-
-		origin = <size_t> 1 << BSF(knights)
-		knights ^= origin
-		
-		possibleMoves = knightMoves(origin)
-		for move in possibleMoves:
-			destination: Square = move.destination
-			bb = 1 << destination.value
-			if bb & position.board.whiteBoard and position.sideToMove == WHITE:
-				# Intersects own pieces, ignore move.
-				continue
-			elif bb & position.board.whiteBoard and position.sideToMove == BLACK:
-				# Capture
-				move.flag=0x04
-				move.capturedPieceType = position.board.pieceTypeAtSquare(move.destination)
-				pseudolegalMoves.append(move)
-			elif bb & position.board.blackBoard and position.sideToMove == BLACK:
-				# Intersects own pieces, ignore move.
-				continue
-			elif bb & position.board.blackBoard and position.sideToMove == WHITE:
-				move.flag=0x04
-				move.capturedPieceType = position.board.pieceTypeAtSquare(move.destination)
-				pseudolegalMoves.append(move)
-			else:
-				# Quiet move.
-				pseudolegalMoves.append(move)
-
-	return pseudolegalMoves
-
-cdef size_t kingAttacks(sq: Square):
+cdef size_t kingAttacks(int sq) nogil:
 	''' Return a bitboard of the squares a king can move to from the given square. '''
-	cdef size_t board = 1 << sq.value
-	return ((board << 1) & ~A_FILE) | ((board >> 1) & ~H_FILE) | board << 8 | board >> 8 | noWe(board) | noEa(board) | soWe(board) | soEa(board);
+	return KING_ATTACKS[sq]
 
 def generateKingMoves(position: Position):
 	'''
 	Returns a pseudolegal list of Moves for the king.
 	This method does not check for legality of a move.
 	'''
-	if position.sideToMove == WHITE:
-		sqOrigin = Square(BSF(position.board.pieceBoards[WHITE][KING]))
-	else:
-		sqOrigin = Square(BSF(position.board.pieceBoards[BLACK][KING]))
-
-	bbToBoard = kingAttacks(sqOrigin)
-	pseudolegalMoves = []
-	while bbToBoard:
-		sqDestination: Square = Square(BSF(bbToBoard))
-		bbDestination = sqDestination.bitboard()
-		bbToBoard ^= bbDestination
-		if bbDestination & position.board.whiteBoard and position.sideToMove == WHITE:
-			# Intersects own pieces. Ignore move.
-			continue
-		elif bbDestination & position.board.blackBoard and position.sideToMove == WHITE:
-			# Capture
-			pseudolegalMoves.append(Move(sqOrigin, sqDestination, flag=0x04, capturedPieceType=position.board.pieceTypeAtSquare(sqDestination)))
-		elif bbDestination & position.board.whiteBoard and position.sideToMove == BLACK:
-			# Capture
-			pseudolegalMoves.append(Move(sqOrigin, sqDestination, 0x04, capturedPieceType=position.board.pieceTypeAtSquare(sqDestination)))
-		elif bbDestination & position.board.blackBoard and position.sideToMove == BLACK:
-			# Intersects own pieces. Ignore move.
-			continue
-		else:
-			# Quiet move
-			pseudolegalMoves.append(Move(sqOrigin, sqDestination))
-
-	# Castle moves
-	if position.sideToMove == WHITE:
-		if position.wkCastle and Square.F1.isEmpty(position.board) and Square.G1.isEmpty(position.board):
-			pseudolegalMoves.append(Move(origin=sqOrigin, destination=Square.G1, flag=0x02))
-		if position.wqCastle and Square.D1.isEmpty(position.board) and Square.C1.isEmpty(position.board) and Square.B1.isEmpty(position.board):
-			pseudolegalMoves.append(Move(origin=sqOrigin, destination=Square.C1, flag=0x03))
-
-	else:
-		if position.bkCastle and Square.F8.isEmpty(position.board) and Square.G8.isEmpty(position.board):
-			pseudolegalMoves.append(Move(origin=sqOrigin, destination=Square.G8, flag=0x02))
-		if position.bqCastle and Square.D8.isEmpty(position.board) and Square.C8.isEmpty(position.board) and Square.B8.isEmpty(position.board):
-			pseudolegalMoves.append(Move(origin=sqOrigin, destination=Square.C8, flag=0x03))
-
-	return pseudolegalMoves
-
-def rookAttacks(sq: Square, blockers: np.uint64()):
-	north_attacks = RAYS[Dir.NORTH][sq.value]
-	if north_attacks & blockers:
-		blockerIdx = BSF(north_attacks & blockers)
-		north_attacks &= ~RAYS[Dir.NORTH][blockerIdx]
+	cdef MoveList moves = MoveList()
+	addKingMoves(position, &moves.buffer)
+	return toMoves(moves)
 
-	east_attacks = RAYS[Dir.EAST][sq]
-	if east_attacks & blockers:
-		blockerIdx = BSF(east_attacks & blockers)
-		east_attacks &= ~RAYS[Dir.EAST][blockerIdx]
+cdef void addKingMoves(Position position, MoveBuffer *moves) except *:
+	cdef CBoard board = position.board
+	cdef size_t own = board.whiteBoard if position.side == WHITE else board.blackBoard
+	cdef int origin = BSF(board.bitboards[position.side][KING])
 
-	south_attacks = RAYS[Dir.SOUTH][sq.value]
-	if south_attacks & blockers:
-		blockerIdx = BSR(south_attacks & blockers)
-		south_attacks &= ~RAYS[Dir.SOUTH][blockerIdx]
+	addTargets(board, moves, origin, kingAttacks(origin) & ~own, INVERT(position.side))
 
-	west_attacks = RAYS[Dir.WEST][sq]
-	if west_attacks & blockers:
-		blockerIdx = BSR(west_attacks & blockers)
-		west_attacks &= ~RAYS[Dir.WEST][blockerIdx]
-
-	return north_attacks | east_attacks | south_attacks | west_attacks
+	# Castle moves
+	# Rights are not yet cleared when the king or a rook moves or is captured, so check they are still at home.
+	cdef size_t rooks = board.bitboards[position.side][ROOK]
+	if position.side == WHITE:
+		if origin != Square.E1:
+			return
+		if (position.castling & WHITE_KINGSIDE and rooks & SQUARE_TO_BITBOARD[Square.H1]
+				and not (SQUARE_TO_BITBOARD[Square.F1] | SQUARE_TO_BITBOARD[Square.G1]) & board.occupied):
+			addMove(moves, encodeMove(origin, Square.G1, KING_CASTLE, NO_PIECE))
+		if (position.castling & WHITE_QUEENSIDE and rooks & SQUARE_TO_BITBOARD[Square.A1]
+				and not (SQUARE_TO_BITBOARD[Square.D1] | SQUARE_TO_BITBOARD[Square.C1] | SQUARE_TO_BITBOARD[Square.B1]) & board.occupied):
+			addMove(moves, encodeMove(origin, Square.C1, QUEEN_CASTLE, NO_PIECE))
 
-def generateRookMoves(position: Position):
-	if position.sideToMove == WHITE:
-		rooks = position.board.pieceBoards[WHITE][ROOK]
 	else:
-		rooks = position.board.pieceBoards[BLACK][ROOK]
-
-	moves = []
-	while rooks:
-		sqOrigin = Square(BSF(rooks))
-		rooks ^= sqOrigin.bitboard()
-
-		blockers = position.board.occupied ^ sqOrigin.bitboard()
-		bbDestinations = rookAttacks(sqOrigin, blockers)
-		while bbDestinations:
-			sqDestination = Square(BSF(bbDestinations))
-			
-			bbDestinations ^= sqDestination.bitboard()
-
-			if sqDestination.isEmpty(position.board):
-				moves.append(Move(sqOrigin, sqDestination))
-			elif sqDestination.bitboard() & position.board.whiteBoard:
-				if position.sideToMove == BLACK:
-					moves.append(Move(sqOrigin, sqDestination, flag=0x04, capturedPieceType=position.board.pieceTypeAtSquare(sqDestination)))
-			else:
-				if position.sideToMove == WHITE:
-					moves.append(Move(sqOrigin, sqDestination, flag=0x04, capturedPieceType=position.board.pieceTypeAtSquare(sqDestination)))
-
-	return moves
+		if origin != Square.E8:
+			return
+		if (position.castling & BLACK_KINGSIDE and rooks & SQUARE_TO_BITBOARD[Square.H8]
+				and not (SQUARE_TO_BITBOARD[Square.F8] | SQUARE_TO_BITBOARD[Square.G8]) & board.occupied):
+			addMove(moves, encodeMove(origin, Square.G8, KING_CASTLE, NO_PIECE))
+		if (position.castling & BLACK_QUEENSIDE and rooks & SQUARE_TO_BITBOARD[Square.A8]
+				and not (SQUARE_TO_BITBOARD[Square.D8] | SQUARE_TO_BITBOARD[Square.C8] | SQUARE_TO_BITBOARD[Square.B8]) & board.occupied):
+			addMove(moves, encodeMove(origin, Square.C8, QUEEN_CASTLE, NO_PIECE))
+
+cpdef size_t rookAttacks(int sq, size_t blockers):
+	return rookMagicAttacks(sq, blockers)
 
-cpdef size_t bishopAttacks(sq: Square, size_t blockers):
-	nw_attacks = RAYS[Dir.NORTH_WEST][sq]
-	if RAYS[Dir.NORTH_WEST][sq] & blockers:
-		blockerIdx = BSF(RAYS[Dir.NORTH_WEST][sq] & blockers)
-		nw_attacks &= ~RAYS[Dir.NORTH_WEST][blockerIdx]
+def generateRookMoves(position: Position):
+	cdef MoveList moves = MoveList()
+	addRookMoves(position, &moves.buffer)
+	return toMoves(moves)
 
-	ne_attacks = RAYS[Dir.NORTH_EAST][sq]
-	if RAYS[Dir.NORTH_EAST][sq] & blockers:
-		blockerIdx = BSF(RAYS[Dir.NORTH_EAST][sq] & blockers)
-		ne_attacks &= ~RAYS[Dir.NORTH_EAST][blockerIdx]
+cdef void addRookMoves(Position position, MoveBuffer *moves) except *:
+	cdef CBoard board = position.board
+	cdef size_t own = board.whiteBoard if position.side == WHITE else board.blackBoard
+	cdef size_t rooks = board.bitboards[position.side][ROOK]
+	cdef int origin
 
-	se_attacks = RAYS[Dir.SOUTH_EAST][sq]
-	if se_attacks & blockers:
-		blockerIdx = BSR(se_attacks & blockers)
-		se_attacks &= ~RAYS[Dir.SOUTH_EAST][blockerIdx]
+	while rooks:
+		origin = BSF(rooks)
+		rooks &= rooks - 1
+		addTargets(board, moves, origin, rookMagicAttacks(origin, board.occupied) & ~own, INVERT(position.side))
 
-	sw_attacks = RAYS[Dir.SOUTH_WEST][sq]
-	if RAYS[Dir.SOUTH_WEST][sq] & blockers:
-		blockerIdx = BSR(RAYS[Dir.SOUTH_WEST][sq] & blockers)
-		sw_attacks &= ~RAYS[Dir.SOUTH_WEST][blockerIdx]
-	return nw_attacks | ne_attacks | se_attacks | sw_attacks
+cpdef size_t bishopAttacks(int sq, size_t blockers):
+	return bishopMagicAttacks(sq, blockers)
 
-cpdef list generateBishopMoves(position: Position):
-	cdef size_t bbDestinations
-	cdef size_t blockers
-	cdef size_t bishops
-	cdef list moves
+cpdef list generateBishopMoves(Position position):
+	cdef MoveList moves = MoveList()
+	addBishopMoves(position, &moves.buffer)
+	return toMoves(moves)
 
-	bishops = position.board.pieceBoards[position.sideToMove][BISHOP]
+cdef void addBishopMoves(Position position, MoveBuffer *moves) except *:
+	cdef CBoard board = position.board
+	cdef size_t own = board.whiteBoard if position.side == WHITE else board.blackBoard
+	cdef size_t bishops = board.bitboards[position.side][BISHOP]
+	cdef int origin
 
-	moves = []
 	while bishops:
-		sqOrigin = Square(BSF(bishops))
-		bishops ^= <size_t> 1 << sqOrigin.value
-
-		blockers = <size_t> position.board.occupied ^ <size_t> 1 << sqOrigin.value
-
-		bbDestinations = bishopAttacks(sqOrigin, <size_t> blockers)
-
-		while bbDestinations:
-			
-			sqDestination = Square(BSF(bbDestinations))
-			
-			bbDestinations ^= sqDestination.bitboard()
-			if sqDestination.isEmpty(position.board):
-				moves.append(Move(sqOrigin, sqDestination))
-			elif sqDestination.bitboard() & position.board.whiteBoard:
-				if position.sideToMove == BLACK:
-					moves.append(Move(sqOrigin, sqDestination, flag=0x04, capturedPieceType=position.board.pieceTypeAtSquare(sqDestination)))
-			else:
-				if position.sideToMove == WHITE:
-					moves.append(Move(sqOrigin, sqDestination, flag=0x04, capturedPieceType=position.board.pieceTypeAtSquare(sqDestination)))
-	
-	return moves
-		
+		origin = BSF(bishops)
+		bishops &= bishops - 1
+		addTargets(board, moves, origin, bishopMagicAttacks(origin, board.occupied) & ~own, INVERT(position.side))
+
 def generateQueenMoves(position):
-	if position.sideToMove == WHITE:
-		queens = position.board.pieceBoards[WHITE][QUEEN]
-	else:
-		queens = position.board.pieceBoards[BLACK][QUEEN]
+	cdef MoveList moves = MoveList()
+	addQueenMoves(position, &moves.buffer)
+	return toMoves(moves)
+
+cdef void addQueenMoves(Position position, MoveBuffer *moves) except *:
+	cdef CBoard board = position.board
+	cdef size_t own = board.whiteBoard if position.side == WHITE else board.blackBoard
+	cdef size_t queens = board.bitboards[position.side][QUEEN]
+	cdef int origin
 
-	moves = []
 	while queens:
-		sqOrigin = Square(BSF(queens))
-		queens ^= sqOrigin.bitboard()
-		blockers = position.board.occupied ^ sqOrigin.bitboard()
-		bbDestinations = bishopAttacks(sqOrigin, blockers) | rookAttacks(sqOrigin, blockers)
-		while bbDestinations:
-			sqDestination = Square(BSF(bbDestinations))
-			
-			bbDestinations ^= sqDestination.bitboard()
-			if sqDestination.isEmpty(position.board):
-				moves.append(Move(sqOrigin, sqDestination))
-			elif sqDestination.bitboard() & position.board.whiteBoard:
-				if position.sideToMove == BLACK:
-					moves.append(Move(sqOrigin, sqDestination, flag=0x04, capturedPieceType=position.board.pieceTypeAtSquare(sqDestination)))
-			else:
-				if position.sideToMove == WHITE:
-					moves.append(Move(sqOrigin, sqDestination, flag=0x04, capturedPieceType=position.board.pieceTypeAtSquare(sqDestination)))
-	return moves
+		origin = BSF(queens)
+		queens &= queens - 1
+		addTargets(board, moves, origin, queenMagicAttacks(origin, board.occupied) & ~own, INVERT(position.side))
 
 # Given any bitboard, return a list of bitboards with only one piece per board.
 cpdef list singularize(size_t b):
@@ -0,0 +1,180 @@
+import argparse
+import concurrent.futures
+import sys
+import time
+
+from board import Move, Position
+from constants import *
+from engine import Engine, formatInfo
+from movegen import bulkPerft, generateAllMoves, inCheck
+from search import Search
+from tt import PerftTable
+
+# Root splitting over worker processes, for long offline runs.
+# https://www.chessprogramming.org/Parallel_Search#Root_Splitting
+#
+# Positions can't be pickled, so each task names its position as a FEN plus the moves played
+# from it, and the worker rebuilds it. Every root move is its own task, and nothing is shared
+# between them, so this scales with the number of cores even for code that holds the GIL.
+#
+#   python parallel.py --depth 7                  every root move of the starting position, one worker per core
+#   python parallel.py --moves e2e4 e7e5 --workers 8 --depth 7
+
+def rebuildPosition(fen, moves=(), copyMake=False):
+    '''
+    The position fen (the starting position if None) with moves, in long algebraic notation, played on it.
+    copyMake is passed on to Position.
+    '''
+    position = Position(fen, copyMake=copyMake)
+    for text in moves:
+        move = Move.fromLongAlgebraic(text, position)
+        if move is None:
+            raise ValueError(f'illegal move {text}')
+        position.makeMove(move)
+    return position
+
+def runTask(fen, moves, task, args, copyMake=False):
+    ''' Runs in a worker: task(position, *args) on the rebuilt position. '''
+    return task(rebuildPosition(fen, moves, copyMake), *args)
+
+def runRootMoves(fen, task, args=(), prefix=(), workers=None, initializer=None, initargs=(), report=None,
+                 copyMake=False):
+    '''
+    Call task(position, *args) once for each legal move of the position fen plus prefix,
+    with that move played, and return a list of (move, result) pairs in move generation order.
+    task must be a module-level function (or a method such as Position.traverse) so it can be
+    pickled. The moves are spread over a process pool of workers processes (one per core by
+    default); with workers=1 they run in this process. initializer(*initargs) sets up each worker.
+    report, if given, is called with each (move, result) pair as it completes.
+    With copyMake the positions undo moves by restoring snapshots (see Position).
+    '''
+    rootMoves = [move.toLongAlgebraic() for move in generateAllMoves(rebuildPosition(fen, prefix))]
+    results = {}
+
+    def completed(move, result):
+        results[move] = result
+        if report is not None:
+            report((move, result))
+
+    if workers == 1:
+        if initializer is not None:
+            initializer(*initargs)
+        for move in rootMoves:
+            completed(move, runTask(fen, (*prefix, move), task, args, copyMake))
+    else:
+        with concurrent.futures.ProcessPoolExecutor(workers, initializer=initializer, initargs=initargs) as pool:
+            futures = {pool.submit(runTask, fen, (*prefix, move), task, args, copyMake): move for move in rootMoves}
+            try:
+                for future in concurrent.futures.as_completed(futures):
+                    completed(futures[future], future.result())
+            except BaseException:
+                pool.shutdown(wait=False, cancel_futures=True)
+                raise
+
+    return [(move, results[move]) for move in rootMoves]
+
+def countNodes(position, depth, bulk=False, hashSize=0):
+    ''' Perft below one root move. hashSize (in MB) gives bulk counting its own cache. '''
+    if bulk:
+        return bulkPerft(position, depth, PerftTable(hashSize) if hashSize else None)
+    return position.perft(depth)
+
+def divide(fen, depth, prefix=(), workers=None, bulk=False, hashSize=0, report=None, copyMake=False):
+    '''
+    Perft split by root move, counted in parallel. Returns a dict from each root move,
+    in long algebraic notation, to the number of leaf nodes depth - 1 plies below it.
+    '''
+    return dict(runRootMoves(fen, countNodes, (depth - 1, bulk, hashSize), prefix, workers, report=report,
+                             copyMake=copyMake))
+
+# Each worker process builds one Engine and keeps its hash table across the root moves it searches.
+workerEngine = None
+
+def initWorker(hashSize):
+    global workerEngine
+    workerEngine = Engine()
+    workerEngine.setHash(hashSize)
+
+def searchMove(position, depth):
+    '''
+    Runs in a worker: search the position after a root move, depth - 1 plies deep, and return
+    the result from the root's point of view as a dict with score, nodes and pv (packed moves, after the root move).
+    '''
+    engine = workerEngine
+    if depth <= 1:
+        # Nothing is left of the depth below the root move, so only the captures are played out.
+        searcher = Search(position, engine.tt)
+        score, nodes, pv = searcher.quiescence(), searcher.nodes, []
+    else:
+        engine.position = position
+        # movetime 0 leaves only the depth limit.
+        engine.search(depth - 1, 0)
+        iteration = engine.iterations[-1]
+        score, nodes, pv = iteration['score'], iteration['nodes'], iteration['pv']
+
+    # The worker's root is one ply below ours, so mates are one ply further away.
+    if score > MATE_BOUND:
+        score -= 1
+    elif score < -MATE_BOUND:
+        score += 1
+    return {'score': -score, 'nodes': nodes, 'pv': pv}
+
+def analyse(fen=None, depth=5, prefix=(), workers=None, hashSize=16, report=None):
+    '''
+    Search every root move of the position fen plus prefix to depth on a pool of worker
+    processes, and merge the results. Returns a dict shaped like a Search iteration
+    (depth, score, nodes, time, nps and pv, so formatInfo can print it), plus moves:
+    a list with the move, score, nodes and pv of each root move, best first.
+    Each root move gets a full window, so the total is more nodes than one alpha-beta
+    search, but they all run at once. report, if given, is called with each root move's entry.
+    Without legal moves the score is a mate or a draw and pv is empty.
+    '''
+    start = time.perf_counter()
+    position = rebuildPosition(fen, prefix)
+    encoded = {move.toLongAlgebraic(): move.encode() for move in generateAllMoves(position)}
+
+    def entry(move, result):
+        return {'move': move, 'score': result['score'], 'nodes': result['nodes'], 'pv': [encoded[move]] + result['pv']}
+
+    relay = None
+    if report is not None:
+        relay = lambda completed: report(entry(*completed))
+
+    moves = [entry(move, result) for move, result in
+             runRootMoves(fen, searchMove, (depth,), prefix, workers, initWorker, (hashSize,), relay)]
+    # The sort is stable, so equal scores keep move generation order.
+    moves.sort(key=lambda move: -move['score'])
+
+    elapsed = time.perf_counter() - start
+    nodes = sum(move['nodes'] for move in moves)
+    if moves:
+        score = moves[0]['score']
+    else:
+        score = -MATE_SCORE if inCheck(position) else 0
+    return {
+        'depth': depth,
+        'score': score,
+        'nodes': nodes,
+        'time': elapsed,
+        'nps': int(nodes / elapsed) if elapsed > 0 else 0,
+        'pv': moves[0]['pv'] if moves else [],
+        'moves': moves
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Search every root move of a position on a pool of worker processes.')
+    parser.add_argument('fen', nargs='?', help='position to analyse (default: the starting position)')
+    parser.add_argument('--moves', nargs='*', default=[], metavar='MOVE',
+                        help='moves to play first, in long algebraic notation')
+    parser.add_argument('--depth', type=int, default=5, help='search depth, counting the root move (default 5)')
+    parser.add_argument('--workers', type=int, help='number of worker processes (default: one per core)')
+    parser.add_argument('--hash', type=int, default=16, metavar='MB', help='hash table size per worker (default 16)')
+    args = parser.parse_args(argv)
+
+    report = lambda move: print(f"{move['move']:<6} score cp {move['score']:>6}  nodes {move['nodes']:>10}", flush=True)
+    result = analyse(args.fen, args.depth, args.moves, args.workers, args.hash, report)
+    print(formatInfo(result))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,13 @@
+from libc.stdint cimport uint64_t
+
+# Everything a FEN string describes, indexed the same way as CBoard and Position.
+# https://www.chessprogramming.org/Forsyth-Edwards_Notation
+cdef struct FenState:
+	uint64_t bitboards[2][6]
+	int side
+	int castling
+	int epSquare
+	int halfmoveClock
+	int fullmoveNumber
+
+cdef int parseFen(str fen, FenState *state) except -1
@@ -0,0 +1,135 @@
+# Single-pass FEN parser. It walks the string once and fills a FenState,
+# which CBoard and Position copy into their own fields.
+# https://www.chessprogramming.org/Forsyth-Edwards_Notation
+#
+# This module doesn't cimport board, since board cimports it. The values below
+# follow the enums in board.pxd.
+
+from libc.string cimport memset
+
+STARTING_FEN = 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1'
+
+cdef enum:
+	NO_SQUARE = 64
+
+# color * 6 + piece for each piece letter, -1 for every other character.
+cdef int PIECE_INDEX[256]
+
+cdef void initPieceIndex():
+	cdef int i
+	for i in range(256):
+		PIECE_INDEX[i] = -1
+	for i, char in enumerate(b'PNBRQKpnbrqk'):
+		PIECE_INDEX[char] = i
+
+initPieceIndex()
+
+cdef int skipSpaces(const unsigned char *text, int i, int length):
+	while i < length and text[i] == c' ':
+		i += 1
+	return i
+
+cdef int parseFen(str fen, FenState *state) except -1:
+	''' Fill state from fen. The clocks are optional, as in EPD, and default to 0 and 1. '''
+	cdef bytes data = fen.encode('ascii')
+	cdef const unsigned char *text = data
+	cdef int length = len(data)
+	cdef int i = 0
+	cdef int rank = 7
+	cdef int file = 0
+	cdef int index
+	cdef unsigned char char
+
+	memset(state, 0, sizeof(FenState))
+	state.epSquare = NO_SQUARE
+	state.fullmoveNumber = 1
+
+	# Piece placement, from a8 to h1.
+	while i < length and text[i] != c' ':
+		char = text[i]
+		if char == c'/':
+			if file != 8 or rank == 0:
+				raise ValueError(f'invalid FEN: {fen}')
+			rank -= 1
+			file = 0
+		elif c'1' <= char <= c'8':
+			file += char - c'0'
+		else:
+			index = PIECE_INDEX[char]
+			if index < 0 or file > 7:
+				raise ValueError(f'invalid FEN: {fen}')
+			state.bitboards[index // 6][index % 6] |= (<uint64_t> 1) << (rank * 8 + file)
+			file += 1
+		if file > 8:
+			raise ValueError(f'invalid FEN: {fen}')
+		i += 1
+	if rank != 0 or file != 8:
+		raise ValueError(f'invalid FEN: {fen}')
+
+	# Side to move.
+	i = skipSpaces(text, i, length)
+	if i < length and text[i] == c'w':
+		state.side = 0
+	elif i < length and text[i] == c'b':
+		state.side = 1
+	else:
+		raise ValueError(f'invalid FEN: {fen}')
+	i += 1
+
+	# Castling rights, as the bits in board.pxd.
+	i = skipSpaces(text, i, length)
+	if i < length and text[i] == c'-':
+		i += 1
+	else:
+		while i < length and text[i] != c' ':
+			char = text[i]
+			if char == c'K':
+				state.castling |= 1
+			elif char == c'Q':
+				state.castling |= 2
+			elif char == c'k':
+				state.castling |= 4
+			elif char == c'q':
+				state.castling |= 8
+			else:
+				raise ValueError(f'invalid FEN: {fen}')
+			i += 1
+
+	# En passant target square.
+	i = skipSpaces(text, i, length)
+	if i < length and text[i] == c'-':
+		i += 1
+	elif i + 1 < length and c'a' <= text[i] <= c'h' and (text[i + 1] == c'3' or text[i + 1] == c'6'):
+		state.epSquare = (text[i + 1] - c'1') * 8 + (text[i] - c'a')
+		i += 2
+	else:
+		raise ValueError(f'invalid FEN: {fen}')
+
+	# Halfmove clock and fullmove number. Anything that follows, like EPD operations, is left alone.
+	i = skipSpaces(text, i, length)
+	if i < length and c'0' <= text[i] <= c'9':
+		state.halfmoveClock = 0
+		while i < length and c'0' <= text[i] <= c'9':
+			state.halfmoveClock = state.halfmoveClock * 10 + text[i] - c'0'
+			i += 1
+		i = skipSpaces(text, i, length)
+		if i < length and c'0' <= text[i] <= c'9':
+			state.fullmoveNumber = 0
+			while i < length and c'0' <= text[i] <= c'9':
+				state.fullmoveNumber = state.fullmoveNumber * 10 + text[i] - c'0'
+				i += 1
+
+	return 0
+
+def readFen(str fen):
+	''' Parse fen into a dict, mostly for tests and tools that don't need a Position. '''
+	cdef FenState state
+	parseFen(fen, &state)
+	return {
+		'bitboards': [[state.bitboards[color][piece] for piece in range(6)] for color in range(2)],
+		'side': state.side,
+		'castling': state.castling,
+		'epSquare': state.epSquare,
+		'halfmoveClock': state.halfmoveClock,
+		'fullmoveNumber': state.fullmoveNumber
+	}
@@ -0,0 +1,200 @@
+import argparse
+import json
+import platform
+import sys
+import time
+
+from board import Position
+from constants import *
+from movegen import bulkPerft, generateAllMoves
+from parallel import divide as parallelDivide
+from revision import gitRevision
+from tt import PerftTable
+
+# Perft benchmark over the standard reference positions.
+# Node counts are from https://www.chessprogramming.org/Perft_Results
+#
+#   python perft.py                         all positions at their default depth
+#   python perft.py --depth 5 initial       one position, deeper
+#   python perft.py --divide --json out.json
+#   python perft.py --bulk --hash 256 --depth 6 initial
+#   python perft.py --workers 8 --bulk --depth 6 kiwipete
+
+POSITIONS = {
+    'initial': {
+        'fen': 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1',
+        'nodes': [20, 400, 8902, 197281, 4865609, 119060324],
+        'depth': 4
+    },
+    'kiwipete': {
+        'fen': 'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1',
+        'nodes': [48, 2039, 97862, 4085603, 193690690],
+        'depth': 3
+    },
+    'position3': {
+        'fen': '8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1',
+        'nodes': [14, 191, 2812, 43238, 674624, 11030083],
+        'depth': 4
+    },
+    'position4': {
+        'fen': 'r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1',
+        'nodes': [6, 264, 9467, 422333, 15833292],
+        'depth': 3
+    },
+    'position5': {
+        'fen': 'rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8',
+        'nodes': [44, 1486, 62379, 2103487, 89941194],
+        'depth': 3
+    },
+    'position6': {
+        'fen': 'r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10',
+        'nodes': [46, 2079, 89890, 3894594, 164075551],
+        'depth': 3
+    }
+}
+
+def loadPosition(fen, copyMake=False):
+    return Position(fen, copyMake=copyMake)
+
+def countNodes(position, depth, bulk, table):
+    if bulk:
+        return bulkPerft(position, depth, table)
+    return position.perft(depth)
+
+def runPerft(name, fen, depth, expected=None, divide=False, bulk=False, table=None, copyMake=False, workers=None):
+    '''
+    Run perft on one position and return the result as a dict.
+    expected is the known node count, or None if there isn't one.
+    With divide, the result also holds the node count below each root move.
+    With bulk, the last ply is counted without making its moves, and table
+    (a PerftTable) caches subtree counts across transpositions.
+    copyMake undoes moves by restoring snapshots instead of unmaking them, in the workers too.
+    workers splits the root moves over that many processes (see parallel.py), and implies divide.
+    Each worker counts with its own cache, the size of table.
+    '''
+    position = loadPosition(fen, copyMake)
+
+    start = time.perf_counter()
+    if workers:
+        split = list(parallelDivide(fen, depth, workers=workers, bulk=bulk,
+                                    hashSize=table.megabytes if table is not None else 0, copyMake=copyMake).items())
+        nodes = sum(count for move, count in split)
+    elif divide and bulk:
+        split = []
+        for move in generateAllMoves(position):
+            position.makeMove(move)
+            split.append((move.toLongAlgebraic(), countNodes(position, depth - 1, bulk, table)))
+            position.unmakeMove(move)
+        nodes = sum(count for move, count in split)
+    elif divide:
+        split = [(move.toLongAlgebraic(), count) for move, count in position.divide(depth)]
+        nodes = sum(count for move, count in split)
+    else:
+        nodes = countNodes(position, depth, bulk, table)
+    elapsed = time.perf_counter() - start
+
+    result = {
+        'name': name,
+        'fen': fen,
+        'depth': depth,
+        'nodes': nodes,
+        'expected': expected,
+        'ok': expected is None or nodes == expected,
+        'time': elapsed,
+        'nps': int(nodes / elapsed) if elapsed > 0 else 0,
+        'bulk': bulk,
+        'copyMake': copyMake
+    }
+    if divide or workers:
+        result['divide'] = dict(split)
+    return result
+
+def runSuite(names=None, depth=None, divide=False, report=None, bulk=False, hashSize=0, copyMake=False, workers=None):
+    '''
+    Run the reference positions in names (all of them by default), each to depth or its default depth.
+    report, if given, is called with each result as it completes.
+    bulk, hashSize (in MB, 0 for no cache), copyMake and workers are passed on to runPerft.
+    '''
+    results = []
+    for name in names or POSITIONS:
+        reference = POSITIONS[name]
+        positionDepth = depth or reference['depth']
+        expected = reference['nodes'][positionDepth - 1] if positionDepth <= len(reference['nodes']) else None
+
+        # Each position gets an empty cache, so its timing doesn't depend on the ones before it.
+        table = PerftTable(hashSize) if bulk and hashSize else None
+        result = runPerft(name, reference['fen'], positionDepth, expected, divide, bulk, table, copyMake, workers)
+        results.append(result)
+        if report is not None:
+            report(result)
+
+    return results
+
+def formatResult(result):
+    if result['expected'] is None:
+        status = 'n/a'
+    else:
+        status = 'ok' if result['ok'] else f"FAIL (expected {result['expected']})"
+
+    lines = []
+    for move, count in sorted(result.get('divide', {}).items()):
+        lines.append(f'{move}: {count}')
+    lines.append(f"{result['name']:<10} depth {result['depth']}  nodes {result['nodes']:>10}"
+                 f"  time {result['time']:8.3f}s  nps {result['nps']:>9}  {status}")
+    return '\n'.join(lines)
+
+def writeJson(path, results):
+    ''' Save the results with enough context to compare runs across commits. '''
+    totalNodes = sum(result['nodes'] for result in results)
+    totalTime = sum(result['time'] for result in results)
+    summary = {
+        'revision': gitRevision(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'nodes': totalNodes,
+        'time': totalTime,
+        'nps': int(totalNodes / totalTime) if totalTime > 0 else 0,
+        'results': results
+    }
+    with open(path, 'w') as f:
+        json.dump(summary, f, indent=2)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Perft benchmark over the standard reference positions.')
+    parser.add_argument('positions', nargs='*', metavar='position',
+                        help=f"reference positions to run ({', '.join(POSITIONS)}); all by default")
+    parser.add_argument('--depth', type=int, help='search depth, instead of each position\'s default')
+    parser.add_argument('--fen', help='run a custom position instead of the reference positions')
+    parser.add_argument('--divide', action='store_true', help='print the node count below each root move')
+    parser.add_argument('--bulk', action='store_true', help='count the last ply without making its moves')
+    parser.add_argument('--hash', type=int, default=16, metavar='MB',
+                        help='size of the perft cache used with --bulk, 0 to disable (default 16)')
+    parser.add_argument('--copy-make', action='store_true', help='undo moves by restoring position snapshots')
+    parser.add_argument('--workers', type=int, help='split the root moves over this many processes (implies --divide)')
+    parser.add_argument('--json', metavar='PATH', help='also write the results to PATH as JSON')
+    args = parser.parse_args(argv)
+    for name in args.positions:
+        if name not in POSITIONS:
+            parser.error(f'unknown position {name}')
+
+    report = lambda result: print(formatResult(result), flush=True)
+    if args.fen:
+        table = PerftTable(args.hash) if args.bulk and args.hash else None
+        results = [runPerft('fen', args.fen, args.depth or 1, divide=args.divide, bulk=args.bulk, table=table,
+                            copyMake=args.copy_make, workers=args.workers)]
+        report(results[0])
+    else:
+        results = runSuite(args.positions, args.depth, args.divide, report, args.bulk, args.hash, args.copy_make,
+                           args.workers)
+
+    totalNodes = sum(result['nodes'] for result in results)
+    totalTime = sum(result['time'] for result in results)
+    print(f'total nodes {totalNodes}  time {totalTime:.3f}s  nps {int(totalNodes / totalTime) if totalTime > 0 else 0}')
+
+    if args.json:
+        writeJson(args.json, results)
+
+    return 0 if all(result['ok'] for result in results) else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
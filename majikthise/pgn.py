@@ -0,0 +1,117 @@
+import mmap
+import re
+
+from board import Position
+from san import fromSan
+
+# Streaming PGN reader. Files are read a line at a time, so memory use doesn't grow with the file.
+# https://www.chessprogramming.org/Portable_Game_Notation
+#
+#   for headers, position, move in replayGames(readPgnFile('games.pgn')):
+#       ...
+
+TAG_PATTERN = re.compile(r'\[\s*(\w+)\s+"((?:[^"\\]|\\.)*)"\s*\]')
+# Outside comments a movetext line is made of these: comments, variation brackets, NAGs,
+# move numbers and everything else (moves and results).
+TOKEN_PATTERN = re.compile(r'\{|;|\(|\)|\$\d+|\d+\.+|[^\s{;()$]+')
+RESULTS = {'1-0', '0-1', '1/2-1/2', '*'}
+
+def readPgnFile(path):
+    '''
+    Yield the lines of a PGN file through a memory map, so the operating system pages the file
+    in as it is read. Lines are decoded as UTF-8, falling back to Latin-1 for older databases.
+    '''
+    with open(path, 'rb') as f:
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files can't be mapped.
+            return
+        with mapped:
+            for line in iter(mapped.readline, b''):
+                try:
+                    yield line.decode('utf-8')
+                except UnicodeDecodeError:
+                    yield line.decode('latin-1')
+
+def readGames(lines):
+    '''
+    Yield (headers, moves) for each game in lines, where headers is a dict of tag pairs and moves
+    the mainline in SAN. Comments, variations, NAGs and move numbers are dropped.
+    '''
+    headers = {}
+    moves = []
+    comment = False
+    variationDepth = 0
+
+    for line in lines:
+        if comment:
+            end = line.find('}')
+            if end < 0:
+                continue
+            line = line[end + 1:]
+            comment = False
+        elif line.startswith('%'):
+            continue
+
+        stripped = line.strip()
+        if stripped.startswith('[') and variationDepth == 0:
+            match = TAG_PATTERN.match(stripped)
+            if match:
+                # A tag after movetext starts the next game, even if the result was missing.
+                if moves:
+                    yield headers, moves
+                    headers, moves = {}, []
+                headers[match.group(1)] = match.group(2).replace('\\"', '"').replace('\\\\', '\\')
+                continue
+
+        offset = 0
+        while True:
+            match = TOKEN_PATTERN.search(line, offset)
+            if match is None:
+                break
+            token = match.group()
+            offset = match.end()
+
+            if token == '{':
+                end = line.find('}', offset)
+                if end < 0:
+                    comment = True
+                    break
+                offset = end + 1
+            elif token == ';':
+                break
+            elif token == '(':
+                variationDepth += 1
+            elif token == ')':
+                variationDepth = max(variationDepth - 1, 0)
+            elif variationDepth or token[0] == '$' or token[0].isdigit() and token[-1] == '.':
+                continue
+            elif token in RESULTS:
+                yield headers, moves
+                headers, moves = {}, []
+            else:
+                moves.append(token)
+
+    if moves or headers:
+        yield headers, moves
+
+def replayGames(lines, strict=True):
+    '''
+    Play through each game in lines, yielding (headers, position, move) before every move is made.
+    The same Position is reused for every move of every game, so copy whatever you need from it
+    (its key or toFen(), say) before asking for the next move.
+    With strict, a move that can't be resolved raises ValueError; otherwise the rest of that game is skipped.
+    '''
+    position = Position()
+    for number, (headers, moves) in enumerate(readGames(lines), 1):
+        position.setFen(headers.get('FEN'))
+        for san in moves:
+            try:
+                move = fromSan(position, san)
+            except ValueError as error:
+                if strict:
+                    raise ValueError(f'game {number}: {error}') from None
+                break
+            yield headers, position, move
+            position.makeMove(move)
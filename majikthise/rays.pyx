@@ -52,4 +52,45 @@ cpdef initRays():
 		for _file in range(8):
 			diag2 = (diag2 << 1) & ~A_FILE
 			RAYS[Dir.SOUTH_EAST][rank*8+_file] = <size_t> diag2
-	
\ No newline at end of file
+	
+# Ray-scan slider attacks. Move generation now uses the magic bitboard tables in magics.pyx;
+# these are kept as the reference implementation the tables are checked against.
+cpdef size_t rayRookAttacks(int sq, size_t blockers):
+	cdef size_t north_attacks = RAYS[Dir.NORTH][sq]
+	cdef size_t east_attacks = RAYS[Dir.EAST][sq]
+	cdef size_t south_attacks = RAYS[Dir.SOUTH][sq]
+	cdef size_t west_attacks = RAYS[Dir.WEST][sq]
+
+	if north_attacks & blockers:
+		north_attacks &= ~<size_t> RAYS[Dir.NORTH][BSF(north_attacks & blockers)]
+
+	if east_attacks & blockers:
+		east_attacks &= ~<size_t> RAYS[Dir.EAST][BSF(east_attacks & blockers)]
+
+	if south_attacks & blockers:
+		south_attacks &= ~<size_t> RAYS[Dir.SOUTH][BSR(south_attacks & blockers)]
+
+	if west_attacks & blockers:
+		west_attacks &= ~<size_t> RAYS[Dir.WEST][BSR(west_attacks & blockers)]
+
+	return north_attacks | east_attacks | south_attacks | west_attacks
+
+cpdef size_t rayBishopAttacks(int sq, size_t blockers):
+	cdef size_t nw_attacks = RAYS[Dir.NORTH_WEST][sq]
+	cdef size_t ne_attacks = RAYS[Dir.NORTH_EAST][sq]
+	cdef size_t se_attacks = RAYS[Dir.SOUTH_EAST][sq]
+	cdef size_t sw_attacks = RAYS[Dir.SOUTH_WEST][sq]
+
+	if nw_attacks & blockers:
+		nw_attacks &= ~<size_t> RAYS[Dir.NORTH_WEST][BSF(nw_attacks & blockers)]
+
+	if ne_attacks & blockers:
+		ne_attacks &= ~<size_t> RAYS[Dir.NORTH_EAST][BSF(ne_attacks & blockers)]
+
+	if se_attacks & blockers:
+		se_attacks &= ~<size_t> RAYS[Dir.SOUTH_EAST][BSR(se_attacks & blockers)]
+
+	if sw_attacks & blockers:
+		sw_attacks &= ~<size_t> RAYS[Dir.SOUTH_WEST][BSR(sw_attacks & blockers)]
+
+	return nw_attacks | ne_attacks | se_attacks | sw_attacks
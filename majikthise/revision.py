@@ -0,0 +1,11 @@
+import subprocess
+
+# Stamps benchmark and test-suite results with the commit they were run on, so runs can be compared across commits.
+
+def gitRevision():
+    ''' The short hash of the checked out commit, or None outside a git checkout. '''
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'],
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
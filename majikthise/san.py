@@ -0,0 +1,46 @@
+import re
+
+from board import Square
+from constants import *
+from movegen import generateAllMoves
+
+# Standard algebraic notation, resolved against the legal moves of a position.
+# https://www.chessprogramming.org/Algebraic_Chess_Notation#Standard_Algebraic_Notation_.28SAN.29
+
+SAN_PATTERN = re.compile(r'([NBRQK])?([a-h])?([1-8])?x?([a-h][1-8])(?:=?([NBRQ]))?')
+PIECE_LETTERS = {'N': KNIGHT, 'B': BISHOP, 'R': ROOK, 'Q': QUEEN, 'K': KING}
+
+def fromSan(position, text, moves=None):
+    '''
+    The legal Move that text names in position, e.g. Nf3, exd5, e8=Q or O-O.
+    Check and annotation marks are ignored. moves, if given, are the legal moves to match against.
+    Raises ValueError if text names no legal move or more than one.
+    '''
+    san = text.rstrip('+#!?')
+    if moves is None:
+        moves = generateAllMoves(position)
+
+    if san in ('O-O', '0-0'):
+        matches = [move for move in moves if move.flag == 0x02]
+    elif san in ('O-O-O', '0-0-0'):
+        matches = [move for move in moves if move.flag == 0x03]
+    else:
+        match = SAN_PATTERN.fullmatch(san)
+        if match is None:
+            raise ValueError(f'invalid SAN: {text}')
+        pieceLetter, originFile, originRank, destination, promotion = match.groups()
+        piece = PIECE_LETTERS[pieceLetter] if pieceLetter else PAWN
+        destination = Square[destination.upper()]
+        promotion = PIECE_LETTERS[promotion] if promotion else None
+
+        pieces = position.board.pieceLocations
+        matches = [move for move in moves
+                   if move.destination == destination
+                   and pieces[move.origin] == piece
+                   and move.promotionPieceType == promotion
+                   and (originFile is None or move.origin % 8 == ord(originFile) - ord('a'))
+                   and (originRank is None or move.origin // 8 == int(originRank) - 1)]
+
+    if len(matches) != 1:
+        raise ValueError(f"{'ambiguous' if matches else 'illegal'} SAN: {text}")
+    return matches[0]
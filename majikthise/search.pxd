@@ -0,0 +1,91 @@
+from board cimport Position, MoveBuffer, MAX_MOVES, move_t
+from movegen cimport MoveGenState
+from tt cimport TranspositionTable
+
+cdef enum:
+	MAX_PLY = 64
+	INFINITE_SCORE = 32000
+	MATE_SCORE = 31000
+	# Scores above this are mates found within MAX_PLY plies.
+	MATE_BOUND = MATE_SCORE - MAX_PLY
+
+	# How many nodes are searched between checks of the clock and node budget.
+	CHECK_INTERVAL = 2048
+
+	# Move ordering bands, highest first: the hash move, captures and promotions (MVV-LVA),
+	# the two killers, then quiet moves by history score.
+	TT_MOVE_SCORE = 1 << 30
+	CAPTURE_SCORE = 1 << 28
+	KILLER_SCORE = 1 << 27
+	# History scores are halved whenever one passes this, so quiets stay below the killers.
+	HISTORY_LIMIT = 1 << 20
+
+	# Delta pruning skips a capture when even this much on top of the captured piece can't raise alpha.
+	DELTA_MARGIN = 200
+
+	# Move picker stages.
+	PICK_TT_MOVE = 0
+	GENERATE_NOISY = 1
+	PICK_NOISY = 2
+	GENERATE_QUIET = 3
+	PICK_QUIET = 4
+	# Quiescence nodes out of check stop after the captures and promotions.
+	GENERATE_CAPTURES = 5
+	PICK_CAPTURES = 6
+
+# Hands out the moves of one node best first, generating them in stages: the hash move is
+# tried before anything is generated, then the captures and promotions, and the quiet moves
+# only if none of those cut off. Each stage's moves are picked one at a time, so a node that
+# cuts off early never sorts its whole list.
+# https://www.chessprogramming.org/Move_Ordering
+# https://www.chessprogramming.org/Move_Generation#Staged_move_generation
+cdef struct MovePicker:
+	MoveBuffer *moves
+	MoveGenState gen
+	int scores[MAX_MOVES]
+	int index
+	int stage
+	int ply
+	move_t ttMove
+
+cdef class Search:
+	cdef Position position
+	cdef TranspositionTable tt
+
+	# 0 for the main search. Lazy SMP helpers are numbered from 1 and start at staggered depths.
+	cdef readonly int threadId
+
+	cdef readonly long nodes
+	cdef long nodeLimit
+	cdef double startTime
+	cdef double deadline
+	cdef readonly bint stopped
+
+	# Triangular principal variation table.
+	# https://www.chessprogramming.org/Triangular_PV-Table
+	cdef move_t pvTable[MAX_PLY][MAX_PLY]
+	cdef int pvLength[MAX_PLY]
+
+	# Moves of each ply, owned by the search so it can run without the GIL.
+	cdef MoveBuffer moveStack[MAX_PLY]
+
+	# Quiet moves that caused a cutoff, two per ply, and a butterfly history table by side, origin and destination.
+	# https://www.chessprogramming.org/Killer_Heuristic
+	# https://www.chessprogramming.org/History_Heuristic
+	cdef move_t killers[MAX_PLY][2]
+	cdef int history[2][64][64]
+
+	# Root moves to search, from go searchmoves. Every legal move if rootMoveCount is 0.
+	cdef move_t rootMoves[MAX_MOVES]
+	cdef int rootMoveCount
+
+	cdef void checkLimits(self) nogil
+	cdef bint isRootMove(self, move_t move) nogil
+	cdef void updatePv(self, int ply, move_t move) nogil
+	cdef int negamax(self, int depth, int alpha, int beta, int ply) nogil
+	cdef int quiesce(self, int alpha, int beta, int ply) nogil
+
+	cdef void initPicker(self, MovePicker *picker, MoveBuffer *moves, int ply, move_t ttMove) nogil
+	cdef void scoreMoves(self, MovePicker *picker) nogil
+	cdef move_t nextMove(self, MovePicker *picker) nogil
+	cdef void updateQuietStats(self, int ply, int depth, move_t move) nogil
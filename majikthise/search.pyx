@@ -0,0 +1,433 @@
+cimport cython
+from posix.time cimport clock_gettime, timespec, CLOCK_MONOTONIC
+
+from board cimport *
+from movegen cimport *
+from tt cimport *
+
+from board import Move
+from constants import *
+
+# Negamax alpha-beta search with iterative deepening.
+# https://www.chessprogramming.org/Alpha-Beta
+# https://www.chessprogramming.org/Iterative_Deepening
+#
+# Several Search objects can run at once on private copies of a Position, sharing one
+# transposition table: Lazy SMP. Each releases the GIL for the whole of every iteration.
+# https://www.chessprogramming.org/Lazy_SMP
+
+cdef inline double now() nogil:
+	# Monotonic seconds straight from the C library, so checking the clock costs no Python call.
+	cdef timespec ts
+	clock_gettime(CLOCK_MONOTONIC, &ts)
+	return ts.tv_sec + ts.tv_nsec * 1e-9
+
+# The material values Position.evaluate() counts, in centipawns, for delta pruning.
+cdef int PIECE_VALUES[6]
+PIECE_VALUES[:] = [100, 300, 300, 500, 900, 0]
+
+cdef inline int scoreToTT(int score, int ply) nogil:
+	# Mate scores are stored relative to the node so they stay correct when the
+	# entry is found again at a different distance from the root.
+	if score > MATE_BOUND:
+		return score + ply
+	if score < -MATE_BOUND:
+		return score - ply
+	return score
+
+cdef inline int scoreFromTT(int score, int ply) nogil:
+	if score > MATE_BOUND:
+		return score - ply
+	if score < -MATE_BOUND:
+		return score + ply
+	return score
+
+# Searches are never sent between processes, and the pickling Cython would generate can't copy the 2-D killer table.
+@cython.auto_pickle(False)
+cdef class Search:
+	'''
+	Searches a Position in place with Position.applyMove/revertMove. Past the depth limit a quiescence
+	search plays out the captures, and scores the quiet positions it reaches with Position.evaluate().
+	Stops when the depth, node budget or time budget runs out, whichever comes first.
+	'''
+	def __init__(self, Position position, TranspositionTable tt, int threadId=0):
+		self.position = position
+		self.tt = tt
+		self.threadId = threadId
+		self.nodes = 0
+		self.stopped = False
+		self.startTime = now()
+
+	def run(self, int depth=5, movetime=None, nodes=None, report=None, timeManager=None, helpers=(), searchmoves=None):
+		'''
+		Search to increasing depths and return the list of completed iterations. If the search is stopped
+		before the first one completes, the list holds a single unreported depth 0 entry with a fallback move.
+		Each iteration is a dict with depth, score (centipawns), nodes, time (seconds), nps and pv (packed moves).
+		report, if given, is called with each iteration as it completes.
+		timeManager, if given, sets the deadline in place of movetime and decides after each iteration whether to start another.
+		helpers are the Lazy SMP searches running alongside this one. Their nodes count towards the reported totals.
+		searchmoves, if given, restricts the root to those packed moves.
+		'''
+		cdef int iterationDepth, score
+		cdef long totalNodes
+		cdef Search helper
+
+		self.nodes = 0
+		self.stopped = False
+		self.nodeLimit = nodes if nodes else 0
+		self.startTime = now()
+		self.rootMoveCount = 0
+		for move in searchmoves or ():
+			if self.rootMoveCount < MAX_MOVES:
+				self.rootMoves[self.rootMoveCount] = move
+				self.rootMoveCount += 1
+		if timeManager is not None:
+			self.deadline = self.startTime + timeManager.hard if timeManager.limited() else 0
+		else:
+			self.deadline = self.startTime + movetime / 1000 if movetime else 0
+
+		# Odd helpers search one ply ahead of the others, so the threads spread over two depths.
+		self.position.reserve(MAX_PLY)
+		iterations = []
+		for iterationDepth in range(1 + (self.threadId & 1), min(depth, MAX_PLY - 1) + 1):
+			with nogil:
+				score = self.negamax(iterationDepth, -INFINITE_SCORE, INFINITE_SCORE, 0)
+			if self.stopped:
+				# Results of an unfinished iteration can't be trusted, so it isn't reported. If none has
+				# finished, a move is still owed: the best root move searched so far, or else the first in order.
+				if not iterations:
+					iterations.append(self.fallbackIteration())
+				break
+
+			elapsed = now() - self.startTime
+			totalNodes = self.nodes
+			for helper in helpers:
+				totalNodes += helper.nodes
+			iteration = {
+				'depth': iterationDepth,
+				'score': score,
+				'nodes': totalNodes,
+				'time': elapsed,
+				'nps': int(totalNodes / elapsed) if elapsed > 0 else 0,
+				'pv': [self.pvTable[0][i] for i in range(self.pvLength[0])]
+			}
+			iterations.append(iteration)
+			if report is not None:
+				report(iteration)
+
+			if self.stopped or abs(score) > MATE_BOUND:
+				break
+			if timeManager is not None and not timeManager.shouldContinue(iteration):
+				break
+
+		return iterations
+
+	def quiescence(self):
+		''' Score the position with the quiescence search alone, as a depth 0 search would. '''
+		cdef int score
+		self.nodes = 0
+		self.stopped = False
+		self.nodeLimit = 0
+		self.deadline = 0
+		self.startTime = now()
+		self.position.reserve(MAX_PLY)
+		with nogil:
+			score = self.quiesce(-INFINITE_SCORE, INFINITE_SCORE, 0)
+		return score
+
+	def fallbackIteration(self):
+		if self.pvLength[0]:
+			pv = [self.pvTable[0][0]]
+		else:
+			moves = [move.encode() for move in self.orderMoves()]
+			moves = [move for move in moves if self.isRootMove(move)]
+			pv = moves[:1]
+		elapsed = now() - self.startTime
+		return {
+			'depth': 0,
+			'score': 0,
+			'nodes': self.nodes,
+			'time': elapsed,
+			'nps': int(self.nodes / elapsed) if elapsed > 0 else 0,
+			'pv': pv
+		}
+
+	def stop(self):
+		self.stopped = True
+
+	def elapsed(self):
+		''' Seconds since the search started. '''
+		return now() - self.startTime
+
+	def setTimeLimit(self, double seconds):
+		''' Stop the search seconds from now, or never if seconds is 0. Safe to call from another thread mid-search. '''
+		self.deadline = now() + seconds if seconds else 0
+
+	def orderMoves(self, ttMove=None, int ply=0):
+		''' The legal moves of the position in the order the search would try them at ply, with ttMove as the hash move. '''
+		cdef MoveList moves = MoveList()
+		cdef MovePicker picker
+		cdef move_t move
+
+		self.initPicker(&picker, &moves.buffer, min(max(ply, 0), MAX_PLY - 1), toEncodedMove(ttMove) if ttMove is not None else NULL_MOVE)
+		ordered = []
+		move = self.nextMove(&picker)
+		while move != NULL_MOVE:
+			ordered.append(Move.fromEncoded(move))
+			move = self.nextMove(&picker)
+		return ordered
+
+	cdef void checkLimits(self) nogil:
+		if self.nodeLimit and self.nodes >= self.nodeLimit:
+			self.stopped = True
+		elif self.deadline and now() >= self.deadline:
+			self.stopped = True
+
+	cdef bint isRootMove(self, move_t move) nogil:
+		cdef int i
+		if not self.rootMoveCount:
+			return True
+		for i in range(self.rootMoveCount):
+			if self.rootMoves[i] == move:
+				return True
+		return False
+
+	cdef int negamax(self, int depth, int alpha, int beta, int ply) nogil:
+		# Runs without the GIL, so self.position stands in for a local: assigning it would take a reference.
+		cdef MoveBuffer *moves = &self.moveStack[ply]
+		cdef TTData entry
+		cdef MovePicker picker
+		cdef move_t move, ttMove = NULL_MOVE, bestMove = NULL_MOVE
+		cdef int score, bestScore = -INFINITE_SCORE, originalAlpha = alpha
+		cdef size_t key
+
+		if depth == 0:
+			return self.quiesce(alpha, beta, ply)
+
+		self.pvLength[ply] = ply
+		self.nodes += 1
+		if self.nodes % CHECK_INTERVAL == 0:
+			self.checkLimits()
+		if self.stopped:
+			return 0
+
+		if ply >= MAX_PLY - 1:
+			return self.position.evaluate()
+
+		key = positionKey(self.position)
+		if self.tt.probe(key, &entry):
+			ttMove = entry.move
+			if ply > 0 and entry.depth >= depth:
+				score = scoreFromTT(entry.score, ply)
+				if (entry.bound == BOUND_EXACT
+						or (entry.bound == BOUND_LOWER and score >= beta)
+						or (entry.bound == BOUND_UPPER and score <= alpha)):
+					return score
+
+		self.initPicker(&picker, moves, ply, ttMove)
+		move = self.nextMove(&picker)
+		if move == NULL_MOVE:
+			# Checkmate or stalemate. Nearer mates score higher.
+			return -MATE_SCORE + ply if picker.gen.checkers else 0
+
+		while move != NULL_MOVE:
+			if ply == 0 and not self.isRootMove(move):
+				move = self.nextMove(&picker)
+				continue
+
+			self.position.applyMove(move)
+			score = -self.negamax(depth - 1, -beta, -alpha, ply + 1)
+			self.position.revertMove(move)
+
+			if self.stopped:
+				return 0
+
+			if score > bestScore:
+				bestScore = score
+				bestMove = move
+				if score > alpha:
+					alpha = score
+					self.updatePv(ply, move)
+					if alpha >= beta:
+						if moveFlag(move) < CAPTURE:
+							self.updateQuietStats(ply, depth, move)
+						break
+			move = self.nextMove(&picker)
+
+		if bestScore >= beta:
+			self.tt.save(key, bestMove, scoreToTT(bestScore, ply), depth, BOUND_LOWER)
+		elif bestScore > originalAlpha:
+			self.tt.save(key, bestMove, scoreToTT(bestScore, ply), depth, BOUND_EXACT)
+		else:
+			self.tt.save(key, NULL_MOVE, scoreToTT(bestScore, ply), depth, BOUND_UPPER)
+
+		return bestScore
+
+	cdef int quiesce(self, int alpha, int beta, int ply) nogil:
+		# Past the horizon, play on with captures and promotions only, until the position is quiet
+		# enough for the static evaluation to be trusted. The principal variation stops at the horizon.
+		# https://www.chessprogramming.org/Quiescence_Search
+		cdef MovePicker picker
+		cdef move_t move
+		cdef int score, bestScore = -INFINITE_SCORE, standPat = 0, gain
+		cdef bint evading
+
+		self.pvLength[ply] = ply
+		self.nodes += 1
+		if self.nodes % CHECK_INTERVAL == 0:
+			self.checkLimits()
+		if self.stopped:
+			return 0
+
+		if ply >= MAX_PLY - 1:
+			return self.position.evaluate()
+
+		self.initPicker(&picker, &self.moveStack[ply], ply, NULL_MOVE)
+		# In check every evasion is searched, and there is no standing pat.
+		evading = picker.gen.checkers != 0
+		if not evading:
+			# Stand pat: the side to move can decline every capture and keep the static score.
+			# https://www.chessprogramming.org/Quiescence_Search#Standing_Pat
+			standPat = self.position.evaluate()
+			if standPat >= beta:
+				return standPat
+			if standPat > alpha:
+				alpha = standPat
+			bestScore = standPat
+			picker.stage = GENERATE_CAPTURES
+
+		move = self.nextMove(&picker)
+		if move == NULL_MOVE and evading:
+			return -MATE_SCORE + ply
+
+		while move != NULL_MOVE:
+			if not evading:
+				# Delta pruning: skip a capture that can't raise alpha even with a margin on top.
+				# https://www.chessprogramming.org/Delta_Pruning
+				gain = PIECE_VALUES[moveCaptured(move)] if moveFlag(move) & CAPTURE else 0
+				if moveFlag(move) >= KNIGHT_PROMOTION:
+					gain += PIECE_VALUES[movePromotion(move)] - PIECE_VALUES[PAWN]
+				if standPat + gain + DELTA_MARGIN <= alpha:
+					move = self.nextMove(&picker)
+					continue
+
+			self.position.applyMove(move)
+			score = -self.quiesce(-beta, -alpha, ply + 1)
+			self.position.revertMove(move)
+
+			if self.stopped:
+				return 0
+
+			if score > bestScore:
+				bestScore = score
+				if score > alpha:
+					alpha = score
+					if alpha >= beta:
+						break
+			move = self.nextMove(&picker)
+
+		return bestScore
+
+	cdef void initPicker(self, MovePicker *picker, MoveBuffer *moves, int ply, move_t ttMove) nogil:
+		initMoveGen(self.position, &picker.gen)
+		picker.moves = moves
+		picker.moves.count = 0
+		picker.index = 0
+		picker.stage = PICK_TT_MOVE
+		picker.ply = ply
+		# A hash move can come from another position whose key collides with this one's, so it is checked first.
+		picker.ttMove = ttMove if isLegalMove(self.position, &picker.gen, ttMove) else NULL_MOVE
+
+	cdef void scoreMoves(self, MovePicker *picker) nogil:
+		# Scores the moves the last stage generated.
+		cdef MoveBuffer *moves = picker.moves
+		cdef move_t move
+		cdef int i, flag, score
+		cdef int side = self.position.side
+
+		for i in range(picker.index, moves.count):
+			move = moves.moves[i]
+			flag = moveFlag(move)
+			if flag & CAPTURE or flag >= KNIGHT_PROMOTION:
+				# Most valuable victim, least valuable attacker. A promotion counts as capturing the piece it becomes.
+				# https://www.chessprogramming.org/MVV-LVA
+				score = CAPTURE_SCORE - self.position.board.pieceOn(moveOrigin(move))
+				if flag & CAPTURE:
+					score += (moveCaptured(move) + 1) * 8
+				if flag >= KNIGHT_PROMOTION:
+					score += movePromotion(move) * 8
+			elif move == self.killers[picker.ply][0]:
+				score = KILLER_SCORE + 1
+			elif move == self.killers[picker.ply][1]:
+				score = KILLER_SCORE
+			else:
+				score = self.history[side][moveOrigin(move)][moveDestination(move)]
+			picker.scores[i] = score
+
+	cdef move_t nextMove(self, MovePicker *picker) nogil:
+		# Returns NULL_MOVE once every move has been handed out.
+		cdef MoveBuffer *moves = picker.moves
+		cdef move_t move
+		cdef int i, best, score
+
+		while True:
+			if picker.stage == PICK_TT_MOVE:
+				picker.stage = GENERATE_NOISY
+				if picker.ttMove != NULL_MOVE:
+					return picker.ttMove
+
+			if picker.stage == GENERATE_NOISY or picker.stage == GENERATE_QUIET:
+				addLegalMoves(self.position, &picker.gen, moves, GEN_NOISY if picker.stage == GENERATE_NOISY else GEN_QUIET)
+				self.scoreMoves(picker)
+				picker.stage += 1
+			elif picker.stage == GENERATE_CAPTURES:
+				addLegalCaptures(self.position, &picker.gen, moves)
+				self.scoreMoves(picker)
+				picker.stage = PICK_CAPTURES
+
+			if picker.index >= moves.count:
+				if picker.stage == PICK_NOISY:
+					picker.stage = GENERATE_QUIET
+					continue
+				return NULL_MOVE
+
+			# One pass of selection sort: swap the best remaining move to the front of what's left.
+			best = picker.index
+			for i in range(picker.index + 1, moves.count):
+				if picker.scores[i] > picker.scores[best]:
+					best = i
+			move = moves.moves[best]
+			score = picker.scores[best]
+			moves.moves[best] = moves.moves[picker.index]
+			picker.scores[best] = picker.scores[picker.index]
+			moves.moves[picker.index] = move
+			picker.scores[picker.index] = score
+			picker.index += 1
+			# The hash move has already been searched.
+			if move != picker.ttMove:
+				return move
+
+	cdef void updateQuietStats(self, int ply, int depth, move_t move) nogil:
+		# A quiet move caused a cutoff: make it a killer at this ply and reward it in the history table.
+		cdef int side = self.position.side
+		cdef int origin = moveOrigin(move), destination = moveDestination(move)
+		cdef int color, i, j
+
+		if self.killers[ply][0] != move:
+			self.killers[ply][1] = self.killers[ply][0]
+			self.killers[ply][0] = move
+
+		self.history[side][origin][destination] += depth * depth
+		if self.history[side][origin][destination] > HISTORY_LIMIT:
+			# Age the whole table, so recent cutoffs count for more than old ones.
+			for color in range(2):
+				for i in range(64):
+					for j in range(64):
+						self.history[color][i][j] //= 2
+
+	cdef void updatePv(self, int ply, move_t move) nogil:
+		cdef int i
+		self.pvTable[ply][ply] = move
+		for i in range(ply + 1, self.pvLength[ply + 1]):
+			self.pvTable[ply][i] = self.pvTable[ply + 1][i]
+		self.pvLength[ply] = max(self.pvLength[ply + 1], ply + 1)
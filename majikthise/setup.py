@@ -5,4 +5,4 @@ from Cython.Build import cythonize
 #cythonize -i bitboard.pyx   
 
 
-setup(ext_modules=cythonize(['bitboard.pyx', 'board.pyx', 'movegen.pyx', 'rays.pyx'], compiler_directives={'language_level' : "3"}))
\ No newline at end of file
+setup(ext_modules=cythonize(['bitboard.pyx', 'board.pyx', 'movegen.pyx', 'rays.pyx', 'magics.pyx', 'zobrist.pyx', 'tt.pyx', 'search.pyx', 'parsers.pyx'], compiler_directives={'language_level' : "3"}))
\ No newline at end of file
@@ -0,0 +1,110 @@
+# Time allocation for one move under the UCI go limits.
+# https://www.chessprogramming.org/Time_Management
+
+# Assumed number of moves left in the game when the GUI doesn't send movestogo.
+DEFAULT_MOVES_TO_GO = 30
+
+# Never plan to spend more than this many times the optimum on one move...
+MAX_OVERSHOOT = 4
+# ...or more than this share of the clock.
+MAX_CLOCK_SHARE = 0.8
+
+# The next iteration usually takes a few times as long as everything before it, so stop
+# starting new ones once this share of the optimum is used.
+SOFT_SHARE = 0.5
+
+# Soft limit scale by how many iterations in a row have kept the same best move.
+STABILITY_SCALE = [1.6, 1.2, 1.0, 0.85, 0.7]
+
+# Score drops (in centipawns) between iterations beyond this extend the soft limit, up to double at MAX_DROP.
+DROP_THRESHOLD = 30
+MAX_DROP = 150
+
+GO_INTEGERS = {'wtime', 'btime', 'winc', 'binc', 'movestogo', 'depth', 'nodes', 'mate', 'movetime'}
+
+def parseGo(args):
+    ''' Turn the arguments of go into a dict, e.g. {'wtime': 60000, 'binc': 1000, 'infinite': True}. '''
+    limits = {}
+    i = 0
+    while i < len(args):
+        token = args[i]
+        if token in GO_INTEGERS:
+            limits[token] = int(args[i + 1])
+            i += 2
+        elif token == 'searchmoves':
+            # The moves run to the end of the command.
+            limits[token] = args[i + 1:]
+            break
+        else:
+            limits[token] = True
+            i += 1
+    return limits
+
+class TimeManager:
+    '''
+    Time limits for one search, in seconds, worked out from the go limits.
+    The hard limit is a deadline the search checks as it goes. The soft limit is checked between
+    iterations by shouldContinue, and stretches or shrinks with how settled the search looks.
+    Both are None if there is no time limit.
+    '''
+
+    # Milliseconds kept back per move for communication and GUI lag, set through the UCI Move Overhead option.
+    moveOverhead = 30
+
+    def __init__(self, limits, side, moveOverhead=None):
+        overhead = (self.moveOverhead if moveOverhead is None else moveOverhead) / 1000
+        self.soft = None
+        self.hard = None
+        self.fixed = False
+
+        self.bestMove = None
+        self.stableIterations = 0
+        self.lastScore = None
+
+        # While pondering the clock isn't ours. Time counts from ponderhit, startTime seconds into the search.
+        self.pondering = bool(limits.get('ponder'))
+        self.startTime = 0.0
+
+        remaining = limits.get('btime' if side else 'wtime')
+        if 'movetime' in limits:
+            self.fixed = True
+            self.soft = self.hard = max(limits['movetime'] / 1000 - overhead, 0.001)
+        elif remaining is not None:
+            remaining = max(remaining / 1000 - overhead, 0.001)
+            increment = limits.get('binc' if side else 'winc', 0) / 1000
+            movesToGo = max(limits.get('movestogo', DEFAULT_MOVES_TO_GO), 1)
+
+            optimum = min(remaining / movesToGo + increment * 3 / 4, remaining)
+            self.hard = min(optimum * MAX_OVERSHOOT, remaining * MAX_CLOCK_SHARE)
+            self.soft = min(optimum * SOFT_SHARE, self.hard)
+
+    def limited(self):
+        return self.hard is not None and not self.pondering
+
+    def ponderhit(self, elapsed):
+        ''' The opponent played the expected move elapsed seconds into the search, which now runs on our time. '''
+        self.pondering = False
+        self.startTime = elapsed
+
+    def shouldContinue(self, iteration):
+        ''' Record a completed iteration (as reported by Search.run) and decide whether to start another. '''
+        move = iteration['pv'][0] if iteration['pv'] else None
+        if move == self.bestMove:
+            self.stableIterations += 1
+        else:
+            self.bestMove = move
+            self.stableIterations = 0
+
+        drop = self.lastScore - iteration['score'] if self.lastScore is not None else 0
+        self.lastScore = iteration['score']
+
+        if not self.limited():
+            return True
+        used = iteration['time'] - self.startTime
+        if self.fixed:
+            return used < self.hard
+
+        scale = STABILITY_SCALE[min(self.stableIterations, len(STABILITY_SCALE) - 1)]
+        if drop > DROP_THRESHOLD:
+            scale *= 1 + min(drop, MAX_DROP) / MAX_DROP
+        return used < min(self.soft * scale, self.hard)
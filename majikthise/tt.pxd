@@ -0,0 +1,67 @@
+from board cimport move_t
+
+cpdef enum Bound:
+	BOUND_NONE = 0
+	BOUND_UPPER = 1
+	BOUND_LOWER = 2
+	BOUND_EXACT = 3
+
+# An entry is the Zobrist key XORed with one packed 64-bit word, and the word itself:
+#   bits  0-21  best move
+#   bits 22-37  score, offset by 32768
+#   bits 38-45  depth
+#   bits 46-47  bound type
+#   bits 48-55  age (search generation that wrote the entry)
+# Search threads share the table without locks. A reader that sees half of one write
+# and half of another gets a key that doesn't match, so torn entries read as misses.
+# https://www.chessprogramming.org/Shared_Hash_Table#Lockless
+cdef struct TTEntry:
+	size_t key
+	size_t data
+
+# Slot 0 is depth-preferred, slot 1 is always replaced.
+cdef struct TTBucket:
+	TTEntry entries[2]
+
+# Unpacked view of an entry, filled in by probe.
+cdef struct TTData:
+	move_t move
+	int score
+	int depth
+	int bound
+
+cdef class TranspositionTable:
+	cdef TTBucket *buckets
+	cdef size_t mask
+
+	cdef readonly size_t bucketCount
+	cdef readonly int megabytes
+	cdef readonly int age
+
+	cpdef void resize(self, int megabytes) except *
+	cpdef void clear(self)
+	cpdef void newGeneration(self)
+	cpdef int hashfull(self)
+
+	cdef bint probe(self, size_t key, TTData *data) nogil
+	cdef void save(self, size_t key, move_t move, int score, int depth, int bound) nogil
+
+# Perft results keyed by position and depth.
+# data packs the depth into bits 0-7 and the node count into bits 8-63.
+cdef struct PerftEntry:
+	size_t key
+	size_t data
+
+cdef class PerftTable:
+	cdef PerftEntry *entries
+	cdef size_t mask
+
+	cdef readonly size_t entryCount
+	cdef readonly int megabytes
+	cdef readonly size_t hits
+
+	cpdef void resize(self, int megabytes) except *
+	cpdef void clear(self)
+
+	cdef long probe(self, size_t key, int depth) nogil
+	cdef void store(self, size_t key, int depth, long nodes) nogil
@@ -0,0 +1,181 @@
+from libc.stdlib cimport calloc, free
+from libc.string cimport memset
+
+# Transposition table keyed by the Zobrist key of a Position.
+# https://www.chessprogramming.org/Transposition_Table
+
+cdef inline size_t packEntry(move_t move, int score, int depth, int bound, int age) nogil:
+	return (<size_t> move
+			| (<size_t> (score + 32768) & 0xFFFF) << 22
+			| (<size_t> depth & 0xFF) << 38
+			| (<size_t> bound & 0x03) << 46
+			| (<size_t> age & 0xFF) << 48)
+
+cdef inline move_t entryMove(size_t data) nogil:
+	return data & 0x3FFFFF
+
+cdef inline int entryScore(size_t data) nogil:
+	return <int> ((data >> 22) & 0xFFFF) - 32768
+
+cdef inline int entryDepth(size_t data) nogil:
+	return (data >> 38) & 0xFF
+
+cdef inline int entryBound(size_t data) nogil:
+	return (data >> 46) & 0x03
+
+cdef inline int entryAge(size_t data) nogil:
+	return (data >> 48) & 0xFF
+
+cdef class TranspositionTable:
+	'''
+	Fixed-size table of two-entry buckets held in one contiguous C array.
+	The first entry of a bucket keeps the deepest result of the current search,
+	the second always takes the newest result that did not fit in the first.
+	'''
+	def __cinit__(self):
+		self.buckets = NULL
+
+	def __init__(self, int megabytes=16):
+		self.resize(megabytes)
+
+	def __dealloc__(self):
+		free(self.buckets)
+
+	cpdef void resize(self, int megabytes) except *:
+		''' Reallocate the table to the largest power-of-two number of buckets that fits in the given size. '''
+		cdef size_t bytes = <size_t> max(megabytes, 1) * 1024 * 1024
+		cdef size_t count = 1
+		while count * 2 * sizeof(TTBucket) <= bytes:
+			count *= 2
+
+		free(self.buckets)
+		self.buckets = <TTBucket *> calloc(count, sizeof(TTBucket))
+		if self.buckets == NULL:
+			self.bucketCount = 0
+			raise MemoryError(f'Could not allocate a {megabytes} MB transposition table')
+
+		self.bucketCount = count
+		self.mask = count - 1
+		self.megabytes = megabytes
+		self.age = 0
+
+	cpdef void clear(self):
+		memset(self.buckets, 0, self.bucketCount * sizeof(TTBucket))
+		self.age = 0
+
+	cpdef void newGeneration(self):
+		# Entries from older generations are replaced first, so a new game or search
+		# reuses the table without paying to clear it.
+		self.age = (self.age + 1) & 0xFF
+
+	cpdef int hashfull(self):
+		''' Permill of the sampled entries written by the current generation, as reported by UCI. '''
+		cdef size_t i, sample = min(1000, self.bucketCount)
+		cdef int slot, used = 0
+		for i in range(sample):
+			for slot in range(2):
+				if self.buckets[i].entries[slot].data and entryAge(self.buckets[i].entries[slot].data) == self.age:
+					used += 1
+		return used * 1000 // (2 * sample)
+
+	cdef bint probe(self, size_t key, TTData *data) nogil:
+		cdef TTBucket *bucket = &self.buckets[key & self.mask]
+		cdef int slot
+		cdef size_t packed
+
+		for slot in range(2):
+			# Read the word once, so the check and the unpacking see the same value.
+			packed = bucket.entries[slot].data
+			if bucket.entries[slot].key ^ packed == key:
+				data.move = entryMove(packed)
+				data.score = entryScore(packed)
+				data.depth = entryDepth(packed)
+				data.bound = entryBound(packed)
+				return True
+
+		return False
+
+	def store(self, size_t key, move_t move, int score, int depth, int bound):
+		''' Python-facing save. '''
+		self.save(key, move, score, depth, bound)
+
+	cdef void save(self, size_t key, move_t move, int score, int depth, int bound) nogil:
+		cdef TTBucket *bucket = &self.buckets[key & self.mask]
+		cdef TTEntry *entry = &bucket.entries[0]
+		cdef size_t existing = entry.data
+		cdef size_t packed
+
+		# Depth-preferred slot: overwrite it when it holds this position, a stale
+		# entry from an older generation, or a shallower search. Otherwise fall
+		# through to the always-replace slot.
+		if not (entry.key ^ existing == key or entryAge(existing) != self.age or depth >= entryDepth(existing)):
+			entry = &bucket.entries[1]
+			existing = entry.data
+
+		# Keep the best move we already had if this search did not produce one.
+		if move == 0 and entry.key ^ existing == key:
+			move = entryMove(existing)
+
+		packed = packEntry(move, score, depth, bound, self.age)
+		entry.key = key ^ packed
+		entry.data = packed
+
+	def lookup(self, size_t key):
+		''' Python-facing probe. Returns (move, score, depth, bound) or None. '''
+		cdef TTData data
+		if self.probe(key, &data):
+			return data.move, data.score, data.depth, data.bound
+		return None
+
+cdef inline size_t perftIndex(size_t key, int depth) nogil:
+	# Spread the depths of one position over different slots so they don't evict each other.
+	return key ^ (<size_t> depth * <size_t> 0x9E3779B97F4A7C15)
+
+cdef class PerftTable:
+	'''
+	Always-replace table of perft node counts.
+	Transpositions are common deep in the tree, so each (position, depth) pair is counted once.
+	https://www.chessprogramming.org/Perft#Hashing
+	'''
+	def __cinit__(self):
+		self.entries = NULL
+
+	def __init__(self, int megabytes=16):
+		self.resize(megabytes)
+
+	def __dealloc__(self):
+		free(self.entries)
+
+	cpdef void resize(self, int megabytes) except *:
+		cdef size_t bytes = <size_t> max(megabytes, 1) * 1024 * 1024
+		cdef size_t count = 1
+		while count * 2 * sizeof(PerftEntry) <= bytes:
+			count *= 2
+
+		free(self.entries)
+		self.entries = <PerftEntry *> calloc(count, sizeof(PerftEntry))
+		if self.entries == NULL:
+			self.entryCount = 0
+			raise MemoryError(f'Could not allocate a {megabytes} MB perft table')
+
+		self.entryCount = count
+		self.mask = count - 1
+		self.megabytes = megabytes
+		self.hits = 0
+
+	cpdef void clear(self):
+		memset(self.entries, 0, self.entryCount * sizeof(PerftEntry))
+		self.hits = 0
+
+	cdef long probe(self, size_t key, int depth) nogil:
+		''' Node count stored for the position at this depth, or -1 if there is none. '''
+		cdef PerftEntry *entry = &self.entries[perftIndex(key, depth) & self.mask]
+		if entry.key == key and (entry.data & 0xFF) == <size_t> depth:
+			self.hits += 1
+			return entry.data >> 8
+		return -1
+
+	cdef void store(self, size_t key, int depth, long nodes) nogil:
+		cdef PerftEntry *entry = &self.entries[perftIndex(key, depth) & self.mask]
+		entry.key = key
+		entry.data = (<size_t> nodes << 8) | (<size_t> depth & 0xFF)
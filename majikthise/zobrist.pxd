@@ -0,0 +1,8 @@
+# Random keys for Zobrist hashing.
+# https://www.chessprogramming.org/Zobrist_Hashing
+cdef size_t PIECE_KEYS[2][6][64]
+cdef size_t SIDE_KEY
+cdef size_t CASTLING_KEYS[16]
+cdef size_t EP_KEYS[8]
+
+cpdef void initZobrist()
@@ -0,0 +1,41 @@
+# Zobrist keys are generated once when the module is imported. The generator is
+# seeded with a constant so keys are the same from run to run.
+# https://www.chessprogramming.org/Zobrist_Hashing
+
+cdef size_t randomState = 1070372
+
+cdef size_t rand64():
+	# xorshift64* generator
+	# https://www.chessprogramming.org/Pseudo-Random_Number_Generator
+	global randomState
+	randomState ^= randomState >> 12
+	randomState ^= randomState << 25
+	randomState ^= randomState >> 27
+	return randomState * <size_t> 2685821657736338717
+
+cpdef void initZobrist():
+	cdef int color, piece, sq, rights, bit
+	cdef size_t castlingRights[4]
+
+	for color in range(2):
+		for piece in range(6):
+			for sq in range(64):
+				PIECE_KEYS[color][piece][sq] = rand64()
+
+	global SIDE_KEY
+	SIDE_KEY = rand64()
+
+	# One key per castling right. The key for a set of rights is the XOR of its members,
+	# so losing a single right always flips the same bits.
+	for bit in range(4):
+		castlingRights[bit] = rand64()
+	for rights in range(16):
+		CASTLING_KEYS[rights] = 0
+		for bit in range(4):
+			if rights & (1 << bit):
+				CASTLING_KEYS[rights] ^= castlingRights[bit]
+
+	for sq in range(8):
+		EP_KEYS[sq] = rand64()
+
+initZobrist()
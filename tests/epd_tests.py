@@ -0,0 +1,102 @@
+import sys
+sys.path.append('../majikthise')
+
+import os
+import tempfile
+import unittest
+import unittest.mock
+
+from bitboard import *
+from board import *
+from engine import Engine
+from epd import readEpd, readEpdFile, runSuite, summarize
+from constants import *
+
+MATE_IN_ONE = '6k1/5ppp/8/8/8/8/5PPP/R5K1 w - - bm Ra8#; id "back rank";'
+HANGING_QUEEN = '4k3/8/8/3q4/8/8/8/3RK3 w - - bm Rxd5; id "hanging queen";'
+AVOID_PAWN = '4k3/8/8/3q4/4P3/8/8/3RK3 w - - am e5; id "avoid";'
+
+class EpdTests(unittest.TestCase):
+
+	@classmethod
+	def setUpClass(cls):
+		initBitboards()
+
+	def test_readEpd(self):
+		fen, operations = readEpd(MATE_IN_ONE)
+		self.assertEqual(fen, '6k1/5ppp/8/8/8/8/5PPP/R5K1 w - -')
+		self.assertEqual(operations, {'bm': ['Ra8#'], 'id': ['back rank']})
+
+	def test_readEpd_SeveralOperands(self):
+		fen, operations = readEpd('4k3/8/8/8/8/8/8/R3K2R w K - bm O-O Ra8+; c0 "two; solutions"; acd 3;')
+		self.assertEqual(operations, {'bm': ['O-O', 'Ra8+'], 'c0': ['two; solutions'], 'acd': ['3']})
+
+	def test_readEpd_QuotedSemicolon(self):
+		fen, operations = readEpd('4k3/8/8/8/8/8/8/R3K2R w K - c0 "a;" b; c1 "x;"')
+		self.assertEqual(operations, {'c0': ['a;', 'b'], 'c1': ['x;']})
+
+	def test_readEpd_Invalid(self):
+		with self.assertRaises(ValueError):
+			readEpd('4k3/8/8/8/8/8/8/R3K2R w')
+
+	def test_readEpdFile(self):
+		with tempfile.NamedTemporaryFile('w', suffix='.epd', delete=False) as f:
+			f.write(f'# comment\n{MATE_IN_ONE}\n\n{HANGING_QUEEN}\n')
+		try:
+			records = list(readEpdFile(f.name))
+		finally:
+			os.remove(f.name)
+		self.assertEqual([operations['id'] for fen, operations in records], [['back rank'], ['hanging queen']])
+
+	def test_runSuite_InProcess(self):
+		records = [readEpd(MATE_IN_ONE), readEpd(HANGING_QUEEN), readEpd(AVOID_PAWN)]
+		results = runSuite(records, depth=2, workers=1)
+
+		self.assertEqual([result['id'] for result in results], ['back rank', 'hanging queen', 'avoid'])
+		self.assertEqual(results[0]['move'], 'a1a8')
+		self.assertEqual(results[1]['move'], 'd1d5')
+		self.assertTrue(all(result['solved'] for result in results))
+		for result in results:
+			self.assertIsNotNone(result['solveTime'])
+			self.assertGreater(result['nodes'], 0)
+
+		summary = summarize(results)
+		self.assertEqual((summary['positions'], summary['solved'], summary['solveRate']), (3, 3, 1.0))
+		self.assertEqual(summary['nodes'], sum(result['nodes'] for result in results))
+
+	def test_runSuite_Pool(self):
+		records = [readEpd(MATE_IN_ONE), readEpd(HANGING_QUEEN)] * 2
+		reports = []
+		results = runSuite(records, depth=2, workers=2, report=reports.append)
+		self.assertEqual([result['index'] for result in results], [0, 1, 2, 3])
+		self.assertEqual(len(reports), 4)
+		self.assertEqual([result['move'] for result in results], ['a1a8', 'd1d5', 'a1a8', 'd1d5'])
+
+	def test_runSuite_BadRecord(self):
+		results = runSuite([readEpd('4k3/8/8/8/8/8/8/R3K3 w - - bm Rh9;')], depth=1, workers=1)
+		self.assertIn('error', results[0])
+		self.assertFalse(results[0]['solved'])
+		self.assertEqual(summarize(results)['errors'], 1)
+
+	def test_runSuite_EngineError(self):
+		# The record fails, the run doesn't.
+		search = Engine.search
+		failures = [RuntimeError('boom')]
+
+		def failOnce(engine, *args):
+			if failures:
+				raise failures.pop()
+			return search(engine, *args)
+
+		records = [readEpd(MATE_IN_ONE), readEpd(HANGING_QUEEN)]
+		with unittest.mock.patch.object(Engine, 'search', failOnce):
+			results = runSuite(records, depth=1, workers=1)
+		self.assertEqual(results[0]['error'], "search failed: RuntimeError('boom')")
+		self.assertNotIn('error', results[1])
+
+	def test_runSuite_EmptyId(self):
+		results = runSuite([readEpd('6k1/5ppp/8/8/8/8/5PPP/R5K1 w - - bm Ra8#; id;')], depth=1, workers=1)
+		self.assertEqual(results[0]['id'], '1')
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,55 @@
+import sys
+sys.path.append('../majikthise')
+
+import unittest
+import random
+
+from bitboard import *
+from board import *
+from movegen import *
+from rays import *
+from constants import *
+
+class MagicAttackTests(unittest.TestCase):
+	'''
+	Cross-check the magic bitboard tables against the ray-scan implementation
+	for every square and a random sample of occupancies.
+	'''
+
+	@classmethod
+	def setUpClass(cls):
+		initRays()
+		initBitboards()
+		cls.rng = random.Random(2021)
+
+	def randomOccupancies(self, n=200):
+		# Sparse and dense boards both matter, so vary how many random boards are ANDed together.
+		for i in range(n):
+			occupied = self.rng.getrandbits(64)
+			for _ in range(i % 4):
+				occupied &= self.rng.getrandbits(64)
+			yield occupied
+
+	def test_rookAttacks_MatchRays(self):
+		for sq in range(64):
+			for occupied in self.randomOccupancies():
+				self.assertEqual(rookAttacks(sq, occupied), rayRookAttacks(sq, occupied), f'square {sq} occupancy {occupied:#x}')
+
+	def test_bishopAttacks_MatchRays(self):
+		for sq in range(64):
+			for occupied in self.randomOccupancies():
+				self.assertEqual(bishopAttacks(sq, occupied), rayBishopAttacks(sq, occupied), f'square {sq} occupancy {occupied:#x}')
+
+	def test_rookAttacks_EmptyBoard(self):
+		for sq in range(64):
+			self.assertEqual(rookAttacks(sq, 0), rayRookAttacks(sq, 0))
+			self.assertEqual(POPCOUNT(rookAttacks(sq, 0)), 14)
+
+	def test_bishopAttacks_FullBoard(self):
+		# Every neighbouring diagonal square is a blocker.
+		full = 0xFFFFFFFFFFFFFFFF
+		self.assertEqual(bishopAttacks(Square.E4, full), Square.D3.bitboard() | Square.F3.bitboard() | Square.D5.bitboard() | Square.F5.bitboard())
+		self.assertEqual(bishopAttacks(Square.A1, full), Square.B2.bitboard())
+
+if __name__ == '__main__':
+	unittest.main()
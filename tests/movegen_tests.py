@@ -155,6 +155,13 @@ class PawnMoveTests(unittest.TestCase):
 						Move(Square.H2, Square.H4, 0x01)]
 		self.assertCountEqual(moves, expectedMoves)
 
+	def test_bDoublePawnPush_NoBlockers(self):
+		position = Position('rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq e3 0 1')
+		moves = bGenerateDoublePawnPushMoves(position)
+		self.assertEqual(len(moves), 8)
+		self.assertIn(Move(Square.E7, Square.E5, 0x01), moves)
+		self.assertIn(Move(Square.E7, Square.E5, 0x01), generatePseudolegalMoves(position))
+
 	def test_wGeneratePawnCaptures_e4d5(self):
 		position = Position('rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1')
 		position.makeMove(Move(origin=Square.E2, destination=Square.E4))
@@ -488,7 +495,7 @@ class BishopMoveTests(unittest.TestCase):
 		self.assertCountEqual(moves, expected)
 
 	def test_wGenerateBishopMoves_AfterPawns(self):
-		position = Position('rnbqkbnr/p1p2p1p/1p4p1/3pp3/3PP3/1P4P1/P1P2P1P/RNBQKBNR b KQkq - 0 1')
+		position = Position('rnbqkbnr/p1p2p1p/1p4p1/3pp3/3PP3/1P4P1/P1P2P1P/RNBQKBNR w KQkq - 0 1')
 		moves = generateBishopMoves(position)
 		expected = [
 			Move(Square.C1, Square.B2),
@@ -607,6 +614,185 @@ class BishopMoveTests(unittest.TestCase):
 
 	# Todo: Test a bunch of random game positions.
 
+class MoveListTests(unittest.TestCase):
+
+	@classmethod
+	def setUpClass(cls):
+		initBitboards()
+
+	def test_MoveList_StartingPosition(self):
+		position = Position()
+		moves = MoveList()
+		self.assertEqual(generateMovesInto(position, moves), 20)
+		self.assertEqual(len(moves), 20)
+		self.assertEqual([Move.fromEncoded(move) for move in moves], generateAllMoves(position))
+
+	def test_MoveList_Memoryview(self):
+		position = Position()
+		moves = generateEncodedMoves(position)
+		view = memoryview(moves)
+		self.assertEqual(view.format, 'I')
+		self.assertEqual(view.itemsize, 4)
+		self.assertTrue(view.readonly)
+		self.assertEqual(view.tolist(), list(moves))
+
+	def test_MoveList_IsReused(self):
+		# Generating into the same buffer overwrites the previous contents.
+		position = Position()
+		moves = MoveList()
+		generateMovesInto(position, moves)
+		position.makeMove(Move(Square.E2, Square.E4, 0x01))
+		generateMovesInto(position, moves)
+		self.assertEqual([Move.fromEncoded(move) for move in moves], generateAllMoves(position))
+
+	def test_MoveList_IndexError(self):
+		moves = MoveList()
+		with self.assertRaises(IndexError):
+			moves[0]
+
+class LegalMoveTests(unittest.TestCase):
+
+	@classmethod
+	def setUpClass(cls):
+		initBitboards()
+
+	def longAlgebraic(self, position):
+		return sorted(move.toLongAlgebraic() for move in generateAllMoves(position))
+
+	def test_Pinned(self):
+		# The knight on e2 is pinned by the rook on e8 and can't move.
+		position = Position('4r1k1/8/8/8/8/8/4N3/4K3 w - - 0 1')
+		self.assertEqual(self.longAlgebraic(position), ['e1d1', 'e1d2', 'e1f1', 'e1f2'])
+
+	def test_PinnedSlider(self):
+		# A pinned rook can still move along the pin.
+		position = Position('4r1k1/8/8/8/8/8/4R3/4K3 w - - 0 1')
+		self.assertEqual(self.longAlgebraic(position), ['e1d1', 'e1d2', 'e1f1', 'e1f2', 'e2e3', 'e2e4', 'e2e5', 'e2e6', 'e2e7', 'e2e8'])
+
+	def test_Evasions(self):
+		# Check from the rook on a1: block with the knight, capture with the queen or move the king.
+		position = Position('6k1/8/8/8/8/1N6/5PPP/r5K1 w - - 0 1')
+		position.board.pieceBoards[WHITE][QUEEN] = Square.D4.bitboard()
+		position.board.updateColorBoards()
+		self.assertEqual(self.longAlgebraic(position), ['b3a1', 'b3c1', 'd4a1', 'd4d1'])
+
+	def test_DoubleCheck(self):
+		# The knight on d3 and the rook on e8 both give check, so only the king may move.
+		position = Position('4r1k1/8/8/8/8/3n4/8/R3K3 w - - 0 1')
+		self.assertEqual(self.longAlgebraic(position), ['e1d1', 'e1d2', 'e1f1'])
+
+	def test_Promotions(self):
+		position = Position('1r5k/P7/8/8/8/8/8/7K w - - 0 1')
+		moves = generateAllMoves(position)
+		promotions = [move for move in moves if move.origin == Square.A7]
+		self.assertEqual(len(promotions), 8)
+		self.assertIn(Move(Square.A7, Square.B8, 0x0F, capturedPieceType=ROOK, promotionPieceType=QUEEN), promotions)
+		self.assertIn(Move(Square.A7, Square.A8, 0x08, promotionPieceType=KNIGHT), promotions)
+
+	def test_BlackDoublePush(self):
+		position = Position()
+		position.makeMove(Move(Square.E2, Square.E4, 0x01))
+		self.assertEqual(len(generateAllMoves(position)), 20)
+		self.assertIn(Move(Square.E7, Square.E5, 0x01), generateAllMoves(position))
+
+	def test_EnPassant(self):
+		position = Position('4k3/3p4/8/4P3/8/8/8/4K3 w - - 0 1')
+		position.sideToMove = BLACK
+		position.makeMove(Move(Square.D7, Square.D5, 0x01))
+		self.assertEqual(position.epTargetSquare, Square.D6)
+
+		capture = Move(Square.E5, Square.D6, 0x05, capturedPieceType=PAWN)
+		self.assertIn(capture, generateAllMoves(position))
+
+		position.makeMove(capture)
+		self.assertEqual(position.board.pieceBoards[BLACK][PAWN], 0)
+		self.assertEqual(position.board.pieceBoards[WHITE][PAWN], Square.D6.bitboard())
+		position.unmakeMove(capture)
+		self.assertEqual(position.board.pieceBoards[BLACK][PAWN], Square.D5.bitboard())
+		self.assertEqual(position.epTargetSquare, Square.D6)
+
+	def test_EnPassantDiscoveredCheck(self):
+		# Taking en passant would empty the fifth rank between the king and the rook.
+		position = Position('4k3/8/8/KPp4r/8/8/8/8 w - - 0 1')
+		position.epTargetSquare = Square.C6
+		self.assertNotIn('b5c6', self.longAlgebraic(position))
+
+		position = Position('4k3/8/8/KPp5/8/8/8/8 w - - 0 1')
+		position.epTargetSquare = Square.C6
+		self.assertIn('b5c6', self.longAlgebraic(position))
+
+	def test_CastlingThroughCheck(self):
+		# The bishop on a6 covers f1, so only queenside castling is allowed.
+		position = Position('4k3/8/b7/8/8/8/8/R3K2R w KQ - 0 1')
+		moves = self.longAlgebraic(position)
+		self.assertNotIn('e1g1', moves)
+		self.assertIn('e1c1', moves)
+
+	def test_CastlingOutOfCheck(self):
+		position = Position('4k3/8/8/8/8/8/8/R3K2r w Q - 0 1')
+		self.assertNotIn('e1c1', self.longAlgebraic(position))
+
+	def test_CastlingRightsLost(self):
+		position = Position('r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1')
+		move = Move(Square.H1, Square.H8, 0x04, capturedPieceType=ROOK)
+		position.makeMove(move)
+		self.assertFalse(position.wkCastle)
+		self.assertFalse(position.bkCastle)
+		self.assertTrue(position.wqCastle)
+		self.assertTrue(position.bqCastle)
+
+		position.unmakeMove(move)
+		self.assertTrue(position.wkCastle)
+		self.assertTrue(position.bkCastle)
+
+	def test_InCheck(self):
+		self.assertFalse(inCheck(Position()))
+		self.assertTrue(inCheck(Position('4r1k1/8/8/8/8/8/8/4K3 w - - 0 1')))
+
+	def test_NoisyAndQuietMoves(self):
+		fens = [
+			None,
+			'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1',
+			'n1n5/PPPk4/8/8/8/8/4Kppp/5N1N b - - 0 1',
+			'4r1k1/8/8/8/8/8/8/4K3 w - - 0 1',
+			'8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1'
+		]
+		for fen in fens:
+			position = Position(fen)
+			noisy = generateNoisyMoves(position)
+			quiet = generateQuietMoves(position)
+			self.assertCountEqual(noisy + quiet, generateAllMoves(position))
+			for move in noisy:
+				self.assertTrue(move.flag & 0x04 or move.flag >= 0x08)
+			for move in quiet:
+				self.assertLess(move.flag, 0x04)
+
+	def test_Captures(self):
+		# The quiescence generator has its own code path, so check it against the noisy stage two plies deep.
+		fens = [
+			'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1',
+			'8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1',
+			'n1n5/PPPk4/8/8/8/8/4Kppp/5N1N b - - 0 1',
+			# The b2 pawn is pinned, and may only take along the pin.
+			'k7/8/8/8/8/n1b5/1P6/K7 w - - 0 1'
+		]
+		for fen in fens:
+			position = Position(fen)
+			self.assertCountEqual(generateCaptures(position), generateNoisyMoves(position))
+			for move in generateAllMoves(position):
+				position.makeMove(move)
+				self.assertCountEqual(generateCaptures(position), generateNoisyMoves(position), f'{fen} {move.toLongAlgebraic()}')
+				position.unmakeMove(move)
+
+		position = Position('k7/8/8/8/8/n1b5/1P6/K7 w - - 0 1')
+		self.assertEqual(set(self.longAlgebraic(position)) & {'b2a3', 'b2c3'}, {'b2c3'})
+		self.assertEqual([move.toLongAlgebraic() for move in generateCaptures(position)], ['b2c3'])
+
+	def test_NoisyMovesIncludeQuietPromotions(self):
+		position = Position('8/P3k3/8/8/8/8/8/4K3 w - - 0 1')
+		self.assertEqual(len([move for move in generateNoisyMoves(position) if move.origin == Square.A7]), 4)
+		self.assertNotIn(Square.A7, [move.origin for move in generateQuietMoves(position)])
+
 class MakeMoveTests(unittest.TestCase):
 
 	@classmethod
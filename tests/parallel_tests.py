@@ -0,0 +1,103 @@
+import sys
+sys.path.append('../majikthise')
+
+import unittest
+
+from bitboard import *
+from board import *
+from engine import Engine, formatInfo
+from parallel import analyse, divide, rebuildPosition, runRootMoves
+from perft import POSITIONS, runPerft
+from constants import *
+
+KIWIPETE = POSITIONS['kiwipete']['fen']
+
+def isCopyMake(position):
+	return position.copyMake
+
+class ParallelTests(unittest.TestCase):
+
+	@classmethod
+	def setUpClass(cls):
+		initBitboards()
+
+	def test_rebuildPosition(self):
+		position = Position()
+		position.makeMove(Move.fromLongAlgebraic('e2e4', position))
+		position.makeMove(Move.fromLongAlgebraic('c7c5', position))
+		self.assertEqual(rebuildPosition(None, ['e2e4', 'c7c5']).toFen(), position.toFen())
+		with self.assertRaises(ValueError):
+			rebuildPosition(None, ['e2e5'])
+
+	def test_Divide_InProcess(self):
+		split = divide(KIWIPETE, 2, workers=1)
+		expected = Position(KIWIPETE).divide(2)
+		self.assertEqual(split, {move.toLongAlgebraic(): count for move, count in expected})
+
+	def test_Divide_Pool(self):
+		split = divide(KIWIPETE, 3, workers=2, bulk=True, hashSize=1)
+		self.assertEqual(len(split), 48)
+		self.assertEqual(sum(split.values()), 97862)
+
+	def test_Divide_Prefix(self):
+		split = divide(None, 3, prefix=['e2e4'], workers=2)
+		self.assertEqual(sum(split.values()), Position('rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq e3 0 1').perft(3))
+
+	def test_Traverse(self):
+		# Methods pickle like functions, so the GIL-bound traversal splits across processes too.
+		results = runRootMoves(KIWIPETE, Position.traverse, (2,), workers=2)
+		self.assertEqual(len(results) + sum(count for move, count in results), Position(KIWIPETE).traverse(3))
+
+	def test_Analyse_MateInOne(self):
+		reports = []
+		result = analyse('6k1/5ppp/8/8/8/8/8/R5K1 w - - 0 1', depth=3, workers=1, report=reports.append)
+		self.assertEqual(Move.fromEncoded(result['pv'][0]).toLongAlgebraic(), 'a1a8')
+		self.assertEqual(result['score'], MATE_SCORE - 1)
+		self.assertEqual(len(reports), len(result['moves']))
+		self.assertEqual(result['nodes'], sum(move['nodes'] for move in result['moves']))
+
+		engine = Engine()
+		engine.position = Position('6k1/5ppp/8/8/8/8/8/R5K1 w - - 0 1')
+		engine.search(depth=3)
+		self.assertEqual(result['score'], engine.iterations[-1]['score'])
+
+	def test_Analyse_Pool(self):
+		fen = 'rnb1kbnr/pppp1ppp/8/4p1q1/3P4/2N5/PPP1PPPP/R1BQKBNR w KQkq - 0 1'
+		result = analyse(fen, depth=3, workers=2)
+		self.assertEqual(Move.fromEncoded(result['pv'][0]).toLongAlgebraic(), 'c1g5')
+		self.assertEqual(result['moves'][0]['move'], 'c1g5')
+		scores = [move['score'] for move in result['moves']]
+		self.assertEqual(scores, sorted(scores, reverse=True))
+		self.assertTrue(formatInfo(result).startswith('info depth 3 score cp '))
+
+	def test_Analyse_DepthOne(self):
+		# The replies are quiesced, so taking the defended pawn on d5 loses the queen, as in Engine.search.
+		fen = '4k3/8/4p3/3p4/8/8/8/3QK3 w - - 0 1'
+		result = analyse(fen, depth=1, workers=1)
+		self.assertNotEqual(result['moves'][0]['move'], 'd1d5')
+
+		engine = Engine()
+		engine.position = Position(fen)
+		engine.search(depth=1)
+		self.assertEqual(result['score'], engine.iterations[-1]['score'])
+
+	def test_Analyse_NoMoves(self):
+		result = analyse('7k/6Q1/6K1/8/8/8/8/8 b - - 0 1', depth=3, workers=1)
+		self.assertEqual(result['score'], -MATE_SCORE)
+		self.assertEqual(result['pv'], [])
+
+	def test_Perft_Workers(self):
+		result = runPerft('kiwipete', KIWIPETE, 2, POSITIONS['kiwipete']['nodes'][1], workers=2)
+		self.assertTrue(result['ok'])
+		self.assertEqual(len(result['divide']), 48)
+
+	def test_CopyMake(self):
+		self.assertTrue(all(copyMake for move, copyMake in runRootMoves(KIWIPETE, isCopyMake, workers=2, copyMake=True)))
+		self.assertFalse(any(copyMake for move, copyMake in runRootMoves(KIWIPETE, isCopyMake, workers=1)))
+
+		result = runPerft('kiwipete', KIWIPETE, 3, POSITIONS['kiwipete']['nodes'][2], copyMake=True, workers=2)
+		self.assertTrue(result['ok'])
+		self.assertTrue(result['copyMake'])
+
+if __name__ == '__main__':
+	unittest.main()
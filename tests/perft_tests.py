@@ -0,0 +1,104 @@
+import sys
+sys.path.append('../majikthise')
+
+import json
+import os
+import tempfile
+import unittest
+
+from bitboard import *
+from board import *
+from movegen import bulkPerft
+from perft import POSITIONS, loadPosition, runPerft, runSuite, writeJson
+from tt import PerftTable
+
+class PerftTests(unittest.TestCase):
+
+	@classmethod
+	def setUpClass(cls):
+		initBitboards()
+
+	def test_Depth1(self):
+		for result in runSuite(['initial', 'kiwipete', 'position3'], depth=1):
+			self.assertTrue(result['ok'], result)
+			self.assertEqual(result['nodes'], POSITIONS[result['name']]['nodes'][0])
+
+	def test_ReferencePositions(self):
+		for result in runSuite(depth=2):
+			self.assertTrue(result['ok'], result)
+		for result in runSuite(depth=3, bulk=True, hashSize=1):
+			self.assertTrue(result['ok'], result)
+
+	def test_DivideSumsToPerft(self):
+		position = loadPosition(POSITIONS['kiwipete']['fen'])
+		split = position.divide(2)
+		self.assertEqual(len(split), 48)
+		self.assertEqual(sum(nodes for move, nodes in split), position.perft(2))
+
+	def test_PositionIsRestored(self):
+		position = loadPosition(POSITIONS['kiwipete']['fen'])
+		key = position.key
+		position.perft(3)
+		self.assertEqual(position, loadPosition(POSITIONS['kiwipete']['fen']))
+		self.assertEqual(position.key, key)
+
+	def test_Result(self):
+		result = runPerft('initial', POSITIONS['initial']['fen'], 2, expected=1, divide=True)
+		self.assertFalse(result['ok'])
+		self.assertEqual(result['depth'], 2)
+		self.assertEqual(sum(result['divide'].values()), result['nodes'])
+		self.assertIn('e2e4', result['divide'])
+		self.assertGreater(result['nps'], 0)
+
+	def test_Json(self):
+		results = runSuite(['position3'], depth=2)
+		with tempfile.TemporaryDirectory() as directory:
+			path = os.path.join(directory, 'perft.json')
+			writeJson(path, results)
+			with open(path) as f:
+				summary = json.load(f)
+
+		self.assertEqual(summary['nodes'], results[0]['nodes'])
+		self.assertEqual(summary['results'][0]['name'], 'position3')
+		self.assertIn('revision', summary)
+
+class BulkPerftTests(unittest.TestCase):
+
+	@classmethod
+	def setUpClass(cls):
+		initBitboards()
+
+	def test_MatchesPerft(self):
+		for name in POSITIONS:
+			position = loadPosition(POSITIONS[name]['fen'])
+			for depth in range(4):
+				self.assertEqual(bulkPerft(position, depth), position.perft(depth))
+
+	def test_Table(self):
+		# Transpositions first appear three plies in, so depth 5 is the shallowest run with hits.
+		position = Position()
+		table = PerftTable(1)
+		nodes = bulkPerft(position, 5)
+		self.assertEqual(bulkPerft(position, 5, table), nodes)
+		self.assertGreater(table.hits, 0)
+
+		# A second run is answered from the table at the root.
+		hits = table.hits
+		self.assertEqual(bulkPerft(position, 5, table), nodes)
+		self.assertEqual(table.hits, hits + 1)
+
+	def test_PositionIsRestored(self):
+		position = loadPosition(POSITIONS['kiwipete']['fen'])
+		key = position.key
+		bulkPerft(position, 3, PerftTable(1))
+		self.assertEqual(position, loadPosition(POSITIONS['kiwipete']['fen']))
+		self.assertEqual(position.key, key)
+
+	def test_BulkDivide(self):
+		result = runPerft('initial', POSITIONS['initial']['fen'], 3, divide=True, bulk=True, table=PerftTable(1))
+		self.assertEqual(result['nodes'], Position().perft(3))
+		self.assertEqual(sum(result['divide'].values()), result['nodes'])
+		self.assertEqual(len(result['divide']), 20)
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,89 @@
+import sys
+sys.path.append('../majikthise')
+
+import os
+import tempfile
+import unittest
+
+from bitboard import *
+from board import *
+from pgn import readGames, readPgnFile, replayGames
+from constants import *
+
+GAMES = '''[Event "Casual"]
+[White "A"]
+[Black "B \\"the second\\""]
+[Result "1-0"]
+
+1. e4 e5 2. Nf3 {A comment
+that spans lines} Nc6 3. Bb5 $1 a6 (3... Nf6 4. O-O (4. d3) Nxe4) 4. Ba4 ; rest of line
+Nf6 5. O-O Be7 1-0
+
+%escaped line
+[Event "Setup"]
+[SetUp "1"]
+[FEN "4k3/8/8/8/8/8/8/R3K2R w KQ - 0 1"]
+
+1. O-O-O Kf7 2. Rh7+ *
+
+[Event "No result"]
+
+1. d4 d5
+'''
+
+class PgnTests(unittest.TestCase):
+
+	@classmethod
+	def setUpClass(cls):
+		initBitboards()
+
+	def test_readGames(self):
+		games = list(readGames(GAMES.splitlines(True)))
+		self.assertEqual(len(games), 3)
+
+		headers, moves = games[0]
+		self.assertEqual(headers['White'], 'A')
+		self.assertEqual(headers['Black'], 'B "the second"')
+		self.assertEqual(moves, ['e4', 'e5', 'Nf3', 'Nc6', 'Bb5', 'a6', 'Ba4', 'Nf6', 'O-O', 'Be7'])
+
+		headers, moves = games[1]
+		self.assertEqual(headers['FEN'], '4k3/8/8/8/8/8/8/R3K2R w KQ - 0 1')
+		self.assertEqual(moves, ['O-O-O', 'Kf7', 'Rh7+'])
+
+		self.assertEqual(games[2], ({'Event': 'No result'}, ['d4', 'd5']))
+
+	def test_replayGames(self):
+		replayed = [(headers['Event'], position.toFen(), move.toLongAlgebraic())
+					for headers, position, move in replayGames(GAMES.splitlines(True))]
+		self.assertEqual(len(replayed), 15)
+		self.assertEqual(replayed[0], ('Casual', 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1', 'e2e4'))
+		self.assertEqual(replayed[8][2], 'e1g1')
+		self.assertEqual(replayed[10], ('Setup', '4k3/8/8/8/8/8/8/R3K2R w KQ - 0 1', 'e1c1'))
+		self.assertEqual(replayed[12], ('Setup', '8/5k2/8/8/8/8/8/2KR3R w - - 2 2', 'h1h7'))
+		self.assertEqual(replayed[13][1], STARTING_FEN)
+
+	def test_replayGames_IllegalMove(self):
+		lines = ['1. e4 e5 2. Ke3 Nc6 *\n', '1. d4 *\n']
+		with self.assertRaises(ValueError):
+			list(replayGames(lines))
+		moves = [move.toLongAlgebraic() for headers, position, move in replayGames(lines, strict=False)]
+		self.assertEqual(moves, ['e2e4', 'e7e5', 'd2d4'])
+
+	def test_readPgnFile(self):
+		with tempfile.NamedTemporaryFile('w', suffix='.pgn', delete=False, encoding='utf-8') as f:
+			f.write(GAMES)
+		try:
+			self.assertEqual(list(readGames(readPgnFile(f.name))), list(readGames(GAMES.splitlines(True))))
+		finally:
+			os.remove(f.name)
+
+	def test_readPgnFile_Empty(self):
+		with tempfile.NamedTemporaryFile('w', suffix='.pgn', delete=False) as f:
+			pass
+		try:
+			self.assertEqual(list(readPgnFile(f.name)), [])
+		finally:
+			os.remove(f.name)
+
+if __name__ == '__main__':
+	unittest.main()
@@ -311,11 +311,340 @@ class Traversals(unittest.TestCase):
     
 
     
+class MoveEncodingTests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        initBitboards()
+
+    def test_CompareWithOtherTypes(self):
+        move = Move(Square.E2, Square.E4, 0x01)
+        self.assertNotEqual(move, None)
+        self.assertNotIn(None, [move])
+
+    def test_Encode_RoundTrip(self):
+        moves = [Move(Square.E2, Square.E4, 0x01),
+                 Move(Square.E1, Square.G1, 0x02),
+                 Move(Square.A6, Square.B4, 0x04, capturedPieceType=PAWN),
+                 Move(Square.H8, Square.A1, 0x04, capturedPieceType=QUEEN)]
+        for move in moves:
+            decoded = Move.fromEncoded(move.encode())
+            self.assertEqual(decoded, move)
+            self.assertEqual(decoded.capturedPieceType, move.capturedPieceType)
+
+    def test_Encode_FitsIn32Bits(self):
+        move = Move(Square.H8, Square.H8, 0x0F, capturedPieceType=KING, promotionPieceType=QUEEN)
+        self.assertLess(move.encode(), 1 << 32)
+        self.assertEqual(Move.fromEncoded(move.encode()).promotionPieceType, QUEEN)
+
+    def test_MakeMove_AcceptsEncodedMoves(self):
+        position = Position()
+        encoded = Position()
+        moves = [Move(Square.B1, Square.C3), Move(Square.E7, Square.E6)]
+        for move in moves:
+            position.makeMove(move)
+            encoded.makeMove(move.encode())
+        self.assertEqual(position, encoded)
+
+        for move in moves[::-1]:
+            encoded.unmakeMove(move.encode())
+        self.assertEqual(encoded, Position())
+
+    def test_GenerateEncodedMoves_MatchesMoves(self):
+        position = Position()
+        encoded = [Move.fromEncoded(move) for move in generateEncodedMoves(position)]
+        self.assertEqual(encoded, generateAllMoves(position))
+
+class AttackTests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        initBitboards()
+
+    def test_attackersTo(self):
+        board = CBoard('4k3/8/8/3p4/1N6/8/3R4/B2K4 w - - 0 1')
+        attackers = board.attackersTo(Square.D3, board.occupied)
+        self.assertEqual(attackers, Square.B4.bitboard() | Square.D2.bitboard())
+
+        attackers = board.attackersTo(Square.C3, board.occupied)
+        self.assertEqual(attackers, Square.A1.bitboard())
+
+        # Split by color with the color boards, or by asking for one color.
+        attackers = board.attackersTo(Square.E4, board.occupied)
+        self.assertEqual(attackers & board.blackBoard, Square.D5.bitboard())
+        self.assertEqual(attackers & board.whiteBoard, 0)
+        self.assertEqual(board.attackersTo(Square.E4, board.occupied, BLACK), Square.D5.bitboard())
+        self.assertEqual(board.attackersTo(Square.E4, board.occupied, WHITE), 0)
+        self.assertEqual(board.attackersTo(Square.C3, board.occupied, WHITE), Square.A1.bitboard())
+
+    def test_attackersTo_Occupancy(self):
+        # The rook on b2 blocks the bishop until it is taken out of the occupancy.
+        board = CBoard('4k3/8/8/8/8/8/1R6/B3K3 w - - 0 1')
+        self.assertEqual(board.attackersTo(Square.C3, board.occupied), 0)
+        self.assertEqual(board.attackersTo(Square.C3, board.occupied ^ Square.B2.bitboard()), Square.A1.bitboard())
+
+    def test_isSquareAttacked(self):
+        board = CBoard()
+        self.assertTrue(board.isSquareAttacked(Square.F3, WHITE))
+        self.assertFalse(board.isSquareAttacked(Square.F3, BLACK))
+        self.assertTrue(board.isSquareAttacked(Square.D6, BLACK))
+        self.assertFalse(board.isSquareAttacked(Square.E4, WHITE))
+
+    def test_attacksBy(self):
+        position = Position()
+        self.assertEqual(position.wAttacks, 0x0000000000FFFF7E)
+        self.assertEqual(position.bAttacks, 0x7EFFFF0000000000)
+
+class PieceBoardsTests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        initBitboards()
+
+    def test_ReadAndCompare(self):
+        board = CBoard()
+        self.assertEqual(board.pieceBoards[WHITE][PAWN], SECOND_RANK)
+        self.assertEqual(board.pieceBoards[BLACK][KING], Square.E8.bitboard())
+        self.assertEqual(board.pieceBoards, CBoard().pieceBoards)
+        self.assertEqual(board.pieceBoards[WHITE], CBoard().pieceBoards[WHITE].tolist())
+        self.assertEqual(len(board.pieceBoards), 2)
+        self.assertEqual(len(board.pieceBoards[BLACK]), 6)
+
+    def test_WriteThrough(self):
+        board = CBoard()
+        board.pieceBoards[WHITE][PAWN] ^= Square.E2.bitboard()
+        board.pieceBoards[WHITE][PAWN] |= Square.E4.bitboard()
+        board.updateColorBoards()
+        self.assertEqual(board.pieceBoards[WHITE][PAWN], (SECOND_RANK ^ Square.E2.bitboard()) | Square.E4.bitboard())
+        self.assertTrue(board.whiteBoard & Square.E4.bitboard())
+        self.assertNotEqual(board.pieceBoards, CBoard().pieceBoards)
+
+    def test_IndexError(self):
+        board = CBoard()
+        with self.assertRaises(IndexError):
+            board.pieceBoards[2]
+        with self.assertRaises(IndexError):
+            board.pieceBoards[WHITE][6] = 0
+
+    def test_PieceLocations(self):
+        position = Position()
+        position.makeMove(Move(Square.G1, Square.F3))
+        locations = position.board.pieceLocations
+        self.assertEqual(len(locations), 64)
+        self.assertEqual(locations[Square.F3], KNIGHT)
+        self.assertIsNone(locations[Square.G1])
+        self.assertEqual(position.board.pieceTypeAtSquare(Square.E8), KING)
+
+class ConsistencyTests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        initBitboards()
+
+    def test_IncrementalBoardsStayInSync(self):
+        # Every move of the walk is checked against a from-scratch recomputation.
+        position = Position('r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1')
+        position.board.debug = True
+        self.assertEqual(position.perft(2), 2039)
+        position.board.checkConsistency()
+
+    def test_DebugSurvivesSetFen(self):
+        position = Position(debug=True)
+        position.setFen('r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1')
+        self.assertTrue(position.board.debug)
+
+    def test_DetectsDirectWrites(self):
+        board = CBoard()
+        board.pieceBoards[WHITE][PAWN] |= Square.E4.bitboard()
+        with self.assertRaises(AssertionError):
+            board.checkConsistency()
+
+        # updateColorBoards resynchronises everything derived from the piece boards.
+        board.updateColorBoards()
+        board.checkConsistency()
+        self.assertEqual(board.pieceLocations[Square.E4], PAWN)
+
+class CopyMakeTests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        initBitboards()
+
+    def test_SameTreeAsMakeUnmake(self):
+        fen = 'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1'
+        position = Position(fen, copyMake=True)
+        self.assertTrue(position.copyMake)
+        self.assertFalse(Position(fen).copyMake)
+        self.assertEqual(position.perft(3), Position(fen).perft(3))
+
+    def test_UndoRestoresEverything(self):
+        position = Position('r3k2r/8/8/8/3p4/8/4P3/R3K2R w KQkq - 0 1', copyMake=True)
+        key = position.key
+        moves = [Move(Square.E2, Square.E4, 0x01), Move(Square.D4, Square.E3, 0x05, capturedPieceType=PAWN),
+                 Move(Square.E1, Square.G1, 0x02), Move(Square.A8, Square.A1, 0x04, capturedPieceType=ROOK)]
+        for move in moves:
+            position.makeMove(move)
+        self.assertFalse(position.wkCastle or position.wqCastle)
+        for move in reversed(moves):
+            position.unmakeMove(move)
+
+        self.assertEqual(position, Position('r3k2r/8/8/8/3p4/8/4P3/R3K2R w KQkq - 0 1'))
+        self.assertEqual(position.key, key)
+        self.assertEqual(position.epTargetSquare, Square.NONE)
+        position.board.checkConsistency()
+
+    def test_UnmatchedUndo(self):
+        position = Position(copyMake=True)
+        with self.assertRaises(IndexError):
+            position.unmakeMove(Move(Square.E2, Square.E4, 0x01))
+
+class UndoStackTests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        initBitboards()
+
+    def test_HalfmoveClock(self):
+        position = Position()
+        knight = Move(Square.G1, Square.F3, 0x00)
+        push = Move(Square.E7, Square.E5, 0x01)
+        position.makeMove(knight)
+        self.assertEqual(position.halfmove_clock, 1)
+        position.makeMove(push)
+        self.assertEqual(position.halfmove_clock, 0)
+        position.unmakeMove(push)
+        self.assertEqual(position.halfmove_clock, 1)
+        position.unmakeMove(knight)
+        self.assertEqual(position.halfmove_clock, 0)
+
+    def test_EqualityComparesHalfmoveClock(self):
+        fen = 'r3k2r/8/8/8/3p4/8/4P3/R3K2R w KQkq - 0 1'
+        self.assertNotEqual(Position(fen), Position('r3k2r/8/8/8/3p4/8/4P3/R3K2R w KQkq - 5 1'))
+
+        # A knight move and back leaves the same pieces, but two halfmoves later.
+        position = Position('4k3/8/8/8/8/8/8/4K1N1 w - - 0 1')
+        for move in [Move(Square.G1, Square.F3), Move(Square.E8, Square.D8), Move(Square.F3, Square.G1), Move(Square.D8, Square.E8)]:
+            position.makeMove(move)
+        self.assertNotEqual(position, Position('4k3/8/8/8/8/8/8/4K1N1 w - - 0 1'))
+        self.assertEqual(position.key, Position('4k3/8/8/8/8/8/8/4K1N1 w - - 0 1').key)
+
+    def test_UndoRestoresState(self):
+        fen = 'r3k2r/8/8/8/3p4/8/4P3/R3K2R w KQkq - 0 1'
+        position = Position(fen)
+        key = position.key
+        moves = [Move(Square.E2, Square.E4, 0x01), Move(Square.D4, Square.E3, 0x05, capturedPieceType=PAWN),
+                 Move(Square.E1, Square.G1, 0x02), Move(Square.A8, Square.A1, 0x04, capturedPieceType=ROOK)]
+        for move in moves:
+            position.makeMove(move)
+        for move in reversed(moves):
+            position.unmakeMove(move)
+
+        self.assertEqual(position, Position(fen))
+        self.assertEqual(position.key, key)
+        self.assertEqual(position.epTargetSquare, Square.NONE)
+
+    def test_DeepLine(self):
+        # Longer than the initial stack, so it has to grow.
+        position = Position()
+        key = position.key
+        shuffle = [Move(Square.G1, Square.F3, 0x00), Move(Square.G8, Square.F6, 0x00),
+                   Move(Square.F3, Square.G1, 0x00), Move(Square.F6, Square.G8, 0x00)]
+        for i in range(50):
+            for move in shuffle:
+                position.makeMove(move)
+        self.assertEqual(position.halfmove_clock, 200)
+        for i in range(50):
+            for move in reversed(shuffle):
+                position.unmakeMove(move)
+        self.assertEqual(position.key, key)
+        self.assertEqual(position.halfmove_clock, 0)
+
+    def test_UnmatchedUndo(self):
+        with self.assertRaises(IndexError):
+            Position().unmakeMove(Move(Square.E2, Square.E4, 0x01))
+
 class FenTests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        initBitboards()
+
     def test_Fen_StartingPosition(self):
         position = Position()
-        # TODO Finish this test
-        return
+        self.assertEqual(position.toFen(), 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1')
+        self.assertEqual(position.board.pieceBoards[WHITE][PAWN], SECOND_RANK)
+        self.assertEqual(position.board.pieceBoards[BLACK][KING], Square.E8.bitboard())
+
+    def test_Fen_FullState(self):
+        fen = 'rnbqkbnr/ppp1p1pp/8/3pPp2/8/8/PPPP1PPP/RNBQKBNR w Kq f6 0 3'
+        position = Position(fen)
+        self.assertEqual(position.sideToMove, WHITE)
+        self.assertEqual((position.wkCastle, position.wqCastle, position.bkCastle, position.bqCastle), (1, 0, 0, 1))
+        self.assertEqual(position.epTargetSquare, Square.F6)
+        self.assertEqual(position.fullmove_number, 3)
+        self.assertEqual(position.toFen(), fen)
+        self.assertEqual(position.key, position.computeKey())
+
+    def test_Fen_RoundTrip(self):
+        for fen in ['r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1',
+                    '8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1',
+                    'rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8',
+                    'r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 b - - 12 10']:
+            self.assertEqual(Position(fen).toFen(), fen)
+
+    def test_Fen_AfterMoves(self):
+        position = Position()
+        for move in [Move(Square.E2, Square.E4, 0x01), Move(Square.C7, Square.C5, 0x01), Move(Square.G1, Square.F3)]:
+            position.makeMove(move)
+        self.assertEqual(position.toFen(), 'rnbqkbnr/pp1ppppp/8/2p5/4P3/5N2/PPPP1PPP/RNBQKB1R b KQkq - 1 2')
+        position.unmakeMove(Move(Square.G1, Square.F3))
+        self.assertEqual(position.toFen(), 'rnbqkbnr/pp1ppppp/8/2p5/4P3/8/PPPP1PPP/RNBQKBNR w KQkq c6 0 2')
+
+    def test_Fen_OptionalClocks(self):
+        position = Position('4k3/8/8/8/8/8/8/4K2R b K -')
+        self.assertEqual(position.sideToMove, BLACK)
+        self.assertEqual(position.toFen(), '4k3/8/8/8/8/8/8/4K2R b K - 0 1')
+
+    def test_Move_fromLongAlgebraic(self):
+        position = Position('8/P6k/8/8/8/8/8/R3K3 w Q - 0 1')
+        self.assertEqual(Move.fromLongAlgebraic('e1c1', position), Move(Square.E1, Square.C1, 0x03))
+        self.assertEqual(Move.fromLongAlgebraic('a7a8n', position).promotionPieceType, KNIGHT)
+        self.assertIsNone(Move.fromLongAlgebraic('a7a8', position))
+        self.assertIsNone(Move.fromLongAlgebraic('e1e3', position))
+
+    def test_setFen_ReusesPosition(self):
+        position = Position()
+        position.makeMove(Move(Square.E2, Square.E4, 0x01))
+        fen = 'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R b KQkq - 3 7'
+        position.setFen(fen)
+        self.assertEqual(position, Position(fen))
+        self.assertEqual(position.key, Position(fen).key)
+        self.assertEqual(position.moveSequence, [])
+        with self.assertRaises(IndexError):
+            position.unmakeMove(Move(Square.E2, Square.E4, 0x01))
+        self.assertEqual(position.perft(2), Position(fen).perft(2))
+
+    def test_Copy(self):
+        position = Position('r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1')
+        position.makeMove(Move(Square.E2, Square.A6, 0x04, capturedPieceType=BISHOP))
+        copy = position.copy()
+        self.assertEqual(copy, position)
+        self.assertEqual(copy.key, position.key)
+        self.assertEqual(copy.toFen(), position.toFen())
+
+        # Moves on the copy leave the original alone.
+        copy.makeMove(Move(Square.B4, Square.B3))
+        self.assertNotEqual(copy.key, position.key)
+
+    def test_Fen_Invalid(self):
+        for fen in ['', 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP w KQkq - 0 1',
+                    'rnbqkbnr/pppppppp/9/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1',
+                    'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNX w KQkq - 0 1',
+                    'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR x KQkq - 0 1',
+                    'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkz - 0 1',
+                    'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq e5 0 1']:
+            with self.assertRaises(ValueError):
+                Position(fen)
 
 if __name__ == '__main__':
 	unittest.main()
\ No newline at end of file
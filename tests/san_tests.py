@@ -0,0 +1,54 @@
+import sys
+sys.path.append('../majikthise')
+
+import unittest
+
+from bitboard import *
+from board import *
+from san import fromSan
+from constants import *
+
+class SanTests(unittest.TestCase):
+
+	@classmethod
+	def setUpClass(cls):
+		initBitboards()
+
+	def test_PawnAndPieceMoves(self):
+		position = Position()
+		self.assertEqual(fromSan(position, 'e4'), Move(Square.E2, Square.E4, 0x01))
+		self.assertEqual(fromSan(position, 'Nf3'), Move(Square.G1, Square.F3))
+		self.assertEqual(fromSan(position, 'Nc3+'), Move(Square.B1, Square.C3))
+
+	def test_Captures(self):
+		position = Position('rnbqkbnr/ppp1pppp/8/3p4/4P3/8/PPPP1PPP/RNBQKBNR w KQkq d6 0 2')
+		self.assertEqual(fromSan(position, 'exd5'), Move(Square.E4, Square.D5, 0x04, capturedPieceType=PAWN))
+
+	def test_Disambiguation(self):
+		position = Position('4k3/8/8/8/8/8/8/R3K2R w - - 0 1')
+		self.assertEqual(fromSan(position, 'Rad1'), Move(Square.A1, Square.D1))
+		self.assertEqual(fromSan(position, 'Rhf1'), Move(Square.H1, Square.F1))
+
+		position = Position('4k3/8/8/8/R7/8/8/R3K3 w - - 0 1')
+		self.assertEqual(fromSan(position, 'R1a2'), Move(Square.A1, Square.A2))
+		with self.assertRaises(ValueError):
+			fromSan(position, 'Ra2')
+
+	def test_Promotion(self):
+		position = Position('8/P6k/8/8/8/8/8/4K3 w - - 0 1')
+		self.assertEqual(fromSan(position, 'a8=Q').promotionPieceType, QUEEN)
+		self.assertEqual(fromSan(position, 'a8N').promotionPieceType, KNIGHT)
+
+	def test_Castling(self):
+		position = Position('r3k2r/8/8/8/8/8/8/R3K2R b KQkq - 0 1')
+		self.assertEqual(fromSan(position, 'O-O'), Move(Square.E8, Square.G8, 0x02))
+		self.assertEqual(fromSan(position, 'O-O-O'), Move(Square.E8, Square.C8, 0x03))
+
+	def test_IllegalOrInvalid(self):
+		position = Position()
+		for san in ['e5', 'Ke2', 'O-O', 'Zz9', '']:
+			with self.assertRaises(ValueError):
+				fromSan(position, san)
+
+if __name__ == '__main__':
+	unittest.main()
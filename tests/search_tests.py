@@ -0,0 +1,154 @@
+import sys
+sys.path.append('../majikthise')
+
+import time
+import unittest
+
+from bitboard import *
+from board import *
+from engine import Engine, formatInfo
+from movegen import generateAllMoves
+from search import Search
+from tt import TranspositionTable
+from constants import *
+
+class SearchTests(unittest.TestCase):
+
+	@classmethod
+	def setUpClass(cls):
+		initBitboards()
+
+	def test_StartingPosition(self):
+		engine = Engine()
+		reports = []
+		move = engine.search(depth=3, report=reports.append)
+
+		self.assertIn(move, generateAllMoves(Position()))
+		self.assertEqual([iteration['depth'] for iteration in reports], [1, 2, 3])
+		for iteration in reports:
+			self.assertGreater(iteration['nodes'], 0)
+			self.assertIn('nps', iteration)
+			self.assertEqual(len(iteration['pv']), iteration['depth'])
+		self.assertEqual(Move.fromEncoded(reports[-1]['pv'][0]), move)
+
+	def test_PositionIsRestored(self):
+		engine = Engine()
+		engine.position = Position('r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1')
+		key = engine.position.key
+		engine.search(depth=3)
+		self.assertEqual(engine.position, Position('r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1'))
+		self.assertEqual(engine.position.key, key)
+
+	def test_CapturesHangingQueen(self):
+		engine = Engine()
+		engine.position = Position('rnb1kbnr/pppp1ppp/8/4p1q1/3P4/2N5/PPP1PPPP/R1BQKBNR w KQkq - 0 1')
+		self.assertEqual(engine.search(depth=3), Move(Square.C1, Square.G5, 0x04, capturedPieceType=QUEEN))
+
+	def test_MateInOne(self):
+		engine = Engine()
+		engine.position = Position('6k1/5ppp/8/8/8/8/8/R5K1 w - - 0 1')
+		move = engine.search(depth=5)
+		self.assertEqual(move, Move(Square.A1, Square.A8))
+		self.assertGreater(engine.iterations[-1]['score'], 30000)
+
+	def test_CopyMake(self):
+		fen = 'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1'
+		engine = Engine()
+		engine.position = Position(fen)
+		move = engine.search(depth=3)
+
+		copyMakeEngine = Engine()
+		copyMakeEngine.position = Position(fen, copyMake=True)
+		self.assertEqual(copyMakeEngine.search(depth=3), move)
+		self.assertEqual(copyMakeEngine.iterations[-1]['nodes'], engine.iterations[-1]['nodes'])
+
+	def test_NodeLimit(self):
+		engine = Engine()
+		engine.search(depth=30, nodes=3000)
+		self.assertLess(engine.searcher.nodes, 3000 + 2048)
+		self.assertTrue(engine.searcher.stopped)
+		self.assertGreater(len(engine.iterations), 0)
+
+	def test_MoveTime(self):
+		engine = Engine()
+		start = time.perf_counter()
+		move = engine.search(depth=30, movetime=200)
+		self.assertLess(time.perf_counter() - start, 2)
+		self.assertIsNotNone(move)
+
+	def test_Threads(self):
+		fen = 'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1'
+		engine = Engine()
+		engine.setThreads(4)
+		engine.position = Position(fen)
+		move = engine.search(depth=4)
+
+		self.assertIn(move, generateAllMoves(Position(fen)))
+		self.assertEqual(engine.position, Position(fen))
+		self.assertEqual([helper.threadId for helper in engine.helpers], [1, 2, 3])
+		# The reported nodes include the helpers' up to the end of the iteration. They carry on until stopped.
+		nodes = engine.iterations[-1]['nodes']
+		self.assertGreaterEqual(nodes, engine.searcher.nodes)
+		self.assertLessEqual(nodes, engine.searcher.nodes + sum(helper.nodes for helper in engine.helpers))
+
+	def test_ThreadsStopWithMainSearch(self):
+		engine = Engine()
+		engine.setThreads(3)
+		start = time.perf_counter()
+		move = engine.search(depth=30, movetime=200)
+		self.assertLess(time.perf_counter() - start, 2)
+		self.assertIsNotNone(move)
+
+	def test_OrderMoves(self):
+		position = Position('rnb1kbnr/pppp1ppp/8/4p1q1/3P4/2N5/PPP1PPPP/R1BQKBNR w KQkq - 0 1')
+		search = Search(position, TranspositionTable(1))
+		takeQueen = Move(Square.C1, Square.G5, 0x04, capturedPieceType=QUEEN)
+		takePawn = Move(Square.D4, Square.E5, 0x04, capturedPieceType=PAWN)
+
+		moves = search.orderMoves()
+		self.assertEqual(moves[:2], [takeQueen, takePawn])
+		self.assertCountEqual(moves, generateAllMoves(position))
+
+		# The hash move comes before the captures.
+		quiet = Move(Square.A2, Square.A3)
+		self.assertEqual(search.orderMoves(quiet)[:3], [quiet, takeQueen, takePawn])
+		self.assertCountEqual(search.orderMoves(quiet), moves)
+
+		# A hash move that isn't legal here is left out.
+		self.assertEqual(search.orderMoves(Move(Square.A2, Square.A5)), moves)
+
+	def test_Quiescence(self):
+		# At depth 1 the queen would take the pawn on d5 if the search stopped there. The recapture shows it loses the queen.
+		engine = Engine()
+		engine.position = Position('4k3/8/4p3/3p4/8/8/8/3QK3 w - - 0 1')
+		self.assertNotEqual(engine.search(depth=1).toLongAlgebraic(), 'd1d5')
+		self.assertGreater(engine.iterations[-1]['score'], 0)
+
+	def test_QuiescenceFindsMate(self):
+		engine = Engine()
+		engine.position = Position('6k1/5ppp/8/8/8/8/8/R5K1 w - - 0 1')
+		self.assertEqual(engine.search(depth=1), Move(Square.A1, Square.A8))
+		self.assertGreater(engine.iterations[-1]['score'], 30000)
+
+	def test_MoveOrderingCutsNodes(self):
+		engine = Engine()
+		engine.search(depth=6, movetime=0)
+		# With the moves in generation order this took over a million nodes.
+		self.assertLess(engine.iterations[-1]['nodes'], 300000)
+
+	def test_FormatInfo(self):
+		engine = Engine()
+		engine.search(depth=2)
+		line = formatInfo(engine.iterations[-1])
+		self.assertTrue(line.startswith('info depth 2 score cp '))
+		self.assertIn(' nps ', line)
+		self.assertEqual(len(line.split(' pv ')[1].split()), 2)
+
+		engine.position = Position('6k1/5ppp/8/8/8/8/8/R5K1 w - - 0 1')
+		engine.search(depth=3)
+		self.assertIn(' score mate 1 ', formatInfo(engine.iterations[-1]))
+		self.assertIn(' score mate -1 ', formatInfo(dict(engine.iterations[-1], score=-(MATE_SCORE - 2))))
+		self.assertIn(' score mate 2 ', formatInfo(dict(engine.iterations[-1], score=MATE_SCORE - 3)))
+
+if __name__ == '__main__':
+	unittest.main()
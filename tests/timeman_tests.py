@@ -0,0 +1,88 @@
+import sys
+sys.path.append('../majikthise')
+
+import unittest
+
+from constants import *
+from timeman import TimeManager, parseGo
+
+def iteration(move, score, time):
+	return {'pv': [move], 'score': score, 'time': time}
+
+class TimeManagerTests(unittest.TestCase):
+
+	def test_parseGo(self):
+		self.assertEqual(parseGo('wtime 60000 btime 50000 winc 1000 binc 1000 movestogo 20'.split()),
+						 {'wtime': 60000, 'btime': 50000, 'winc': 1000, 'binc': 1000, 'movestogo': 20})
+		self.assertEqual(parseGo('infinite searchmoves e2e4 d2d4'.split()), {'infinite': True, 'searchmoves': ['e2e4', 'd2d4']})
+		self.assertEqual(parseGo('ponder depth 7'.split()), {'ponder': True, 'depth': 7})
+
+	def test_NoTimeLimit(self):
+		for limits in [{}, {'depth': 5}, {'infinite': True}, {'btime': 1000}]:
+			timeManager = TimeManager(limits, WHITE)
+			self.assertFalse(timeManager.limited())
+			self.assertTrue(timeManager.shouldContinue(iteration(1, 0, 100.0)))
+
+	def test_Movetime(self):
+		timeManager = TimeManager({'movetime': 1000, 'wtime': 5000}, WHITE, moveOverhead=0)
+		self.assertEqual((timeManager.soft, timeManager.hard), (1.0, 1.0))
+		# A fixed move time isn't cut short by a stable best move.
+		for i in range(5):
+			self.assertTrue(timeManager.shouldContinue(iteration(1, 0, 0.9)))
+		self.assertFalse(timeManager.shouldContinue(iteration(1, 0, 1.0)))
+
+	def test_ClockAllocation(self):
+		timeManager = TimeManager({'wtime': 60000, 'btime': 30000, 'binc': 2000}, BLACK, moveOverhead=0)
+		optimum = 30 / 30 + 2 * 3 / 4
+		self.assertAlmostEqual(timeManager.hard, optimum * 4)
+		self.assertAlmostEqual(timeManager.soft, optimum / 2)
+
+		# With few moves to go the clock share caps the hard limit.
+		timeManager = TimeManager({'wtime': 10000, 'movestogo': 1}, WHITE, moveOverhead=0)
+		self.assertAlmostEqual(timeManager.hard, 8.0)
+		self.assertLessEqual(timeManager.soft, timeManager.hard)
+
+		# More moves to go than the default spreads the clock thinner.
+		timeManager = TimeManager({'wtime': 40000, 'movestogo': 40}, WHITE, moveOverhead=0)
+		self.assertAlmostEqual(timeManager.soft, 40 / 40 / 2)
+
+	def test_MoveOverhead(self):
+		self.assertAlmostEqual(TimeManager({'movetime': 1000}, WHITE, moveOverhead=100).hard, 0.9)
+		self.assertAlmostEqual(TimeManager({'movetime': 50}, WHITE, moveOverhead=100).hard, 0.001)
+
+	def test_StableBestMoveSavesTime(self):
+		stable = TimeManager({'wtime': 30000}, WHITE, moveOverhead=0)
+		unstable = TimeManager({'wtime': 30000}, WHITE, moveOverhead=0)
+		# soft is 0.5 seconds here.
+		for i in range(5):
+			stable.shouldContinue(iteration(1, 20, 0.1))
+			unstable.shouldContinue(iteration(i, 20, 0.1))
+		self.assertFalse(stable.shouldContinue(iteration(1, 20, 0.4)))
+		self.assertTrue(unstable.shouldContinue(iteration(9, 20, 0.7)))
+
+	def test_ScoreDropExtends(self):
+		steady = TimeManager({'wtime': 30000}, WHITE, moveOverhead=0)
+		dropping = TimeManager({'wtime': 30000}, WHITE, moveOverhead=0)
+		for timeManager, scores in [(steady, [50, 50, 50]), (dropping, [50, 50, -100])]:
+			for i, score in enumerate(scores[:-1]):
+				timeManager.shouldContinue(iteration(1, score, 0.1))
+		self.assertFalse(steady.shouldContinue(iteration(1, 50, 0.6)))
+		self.assertTrue(dropping.shouldContinue(iteration(1, -100, 0.6)))
+
+	def test_Ponder(self):
+		timeManager = TimeManager({'ponder': True, 'wtime': 30000}, WHITE, moveOverhead=0)
+		self.assertFalse(timeManager.limited())
+		self.assertTrue(timeManager.shouldContinue(iteration(1, 0, 60.0)))
+
+		timeManager.ponderhit(60.0)
+		self.assertTrue(timeManager.limited())
+		# Only the time since ponderhit counts.
+		self.assertTrue(timeManager.shouldContinue(iteration(2, 0, 60.2)))
+		self.assertFalse(timeManager.shouldContinue(iteration(2, 0, 60.0 + timeManager.hard)))
+
+	def test_HardLimitCapsExtensions(self):
+		timeManager = TimeManager({'wtime': 30000, 'movestogo': 1}, WHITE, moveOverhead=0)
+		self.assertFalse(timeManager.shouldContinue(iteration(1, -500, timeManager.hard)))
+
+if __name__ == '__main__':
+	unittest.main()
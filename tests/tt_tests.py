@@ -0,0 +1,88 @@
+import sys
+sys.path.append('../majikthise')
+
+import unittest
+
+from bitboard import *
+from board import *
+from tt import *
+from constants import *
+
+class TranspositionTableTests(unittest.TestCase):
+
+	@classmethod
+	def setUpClass(cls):
+		initBitboards()
+
+	def setUp(self):
+		self.tt = TranspositionTable(1)
+
+	def test_Size(self):
+		# Buckets are 32 bytes, so 1 MB holds 32768 of them.
+		self.assertEqual(self.tt.bucketCount, 32768)
+		self.tt.resize(4)
+		self.assertEqual(self.tt.bucketCount, 4 * 32768)
+		self.assertEqual(self.tt.megabytes, 4)
+
+	def test_StoreAndLookup(self):
+		position = Position()
+		move = Move(Square.E2, Square.E4, 0x01).encode()
+		self.tt.store(position.key, move, -125, 7, BOUND_EXACT)
+		self.assertEqual(self.tt.lookup(position.key), (move, -125, 7, BOUND_EXACT))
+
+	def test_LookupMiss(self):
+		self.assertIsNone(self.tt.lookup(Position().key))
+
+	def test_SameBucketDifferentKey(self):
+		key = 0x123456789ABCDEF0
+		other = key ^ (1 << 63)
+		self.tt.store(key, 0, 10, 3, BOUND_LOWER)
+		self.assertIsNone(self.tt.lookup(other))
+
+	def test_DepthPreferred(self):
+		# Both keys land in the same bucket. The shallower result goes to the always-replace slot.
+		deep = 0x1000000000000005
+		shallow = 0x2000000000000005
+		newer = 0x3000000000000005
+		self.tt.store(deep, 0, 50, 10, BOUND_EXACT)
+		self.tt.store(shallow, 0, 20, 2, BOUND_UPPER)
+		self.assertEqual(self.tt.lookup(deep)[2], 10)
+		self.assertEqual(self.tt.lookup(shallow)[2], 2)
+
+		# The always-replace slot takes the newest shallow result.
+		self.tt.store(newer, 0, 30, 1, BOUND_UPPER)
+		self.assertIsNotNone(self.tt.lookup(deep))
+		self.assertIsNone(self.tt.lookup(shallow))
+		self.assertIsNotNone(self.tt.lookup(newer))
+
+	def test_OldGenerationIsReplaced(self):
+		deep = 0x1000000000000005
+		shallow = 0x2000000000000005
+		self.tt.store(deep, 0, 50, 10, BOUND_EXACT)
+		self.tt.newGeneration()
+		self.tt.store(shallow, 0, 20, 2, BOUND_UPPER)
+		self.assertEqual(self.tt.lookup(shallow)[2], 2)
+		self.tt.store(0x3000000000000005, 0, 20, 1, BOUND_UPPER)
+		self.assertIsNone(self.tt.lookup(deep))
+
+	def test_KeepsBestMove(self):
+		key = Position().key
+		move = Move(Square.G1, Square.F3).encode()
+		self.tt.store(key, move, 0, 4, BOUND_LOWER)
+		self.tt.store(key, 0, 0, 5, BOUND_UPPER)
+		self.assertEqual(self.tt.lookup(key)[0], move)
+
+	def test_Clear(self):
+		key = Position().key
+		self.tt.store(key, 0, 0, 4, BOUND_LOWER)
+		self.tt.clear()
+		self.assertIsNone(self.tt.lookup(key))
+
+	def test_Hashfull(self):
+		self.assertEqual(self.tt.hashfull(), 0)
+		for i in range(1000):
+			self.tt.store((i << 32) | i | 1 << 63, 0, 0, 1, BOUND_EXACT)
+		self.assertEqual(self.tt.hashfull(), 500)
+
+if __name__ == '__main__':
+	unittest.main()
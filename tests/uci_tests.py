@@ -0,0 +1,198 @@
+import sys
+sys.path.append('../majikthise')
+
+import logging
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from bitboard import *
+from board import *
+from majikthise import Uci, enableLog, logger
+from constants import *
+
+class UciTests(unittest.TestCase):
+
+	@classmethod
+	def setUpClass(cls):
+		initBitboards()
+
+	def setUp(self):
+		self.lines = []
+		self.received = threading.Condition()
+		self.uci = Uci(output=self.receive)
+
+	def tearDown(self):
+		self.uci.quit()
+
+	def receive(self, line):
+		with self.received:
+			self.lines.append(line)
+			self.received.notify_all()
+
+	def waitFor(self, prefix, timeout=10):
+		with self.received:
+			self.assertTrue(self.received.wait_for(lambda: any(line.startswith(prefix) for line in self.lines), timeout))
+		return next(line for line in self.lines if line.startswith(prefix))
+
+	def test_Handshake(self):
+		self.uci.handle('uci')
+		self.assertEqual(self.lines[0], 'id name majikthise')
+		self.assertEqual(self.lines[-1], 'uciok')
+		self.uci.handle('isready')
+		self.assertEqual(self.lines[-1], 'readyok')
+
+	def test_Position(self):
+		self.uci.handle('position startpos moves e2e4 c7c5 g1f3')
+		self.assertEqual(self.uci.engine.position.toFen(), 'rnbqkbnr/pp1ppppp/8/2p5/4P3/5N2/PPPP1PPP/RNBQKB1R b KQkq - 1 2')
+
+		self.uci.handle('position fen 4k3/8/8/8/8/8/8/R3K2R w KQ - 0 1 moves e1g1')
+		self.assertEqual(self.uci.engine.position.toFen(), '4k3/8/8/8/8/8/8/R4RK1 b - - 1 1')
+
+	def test_BadCommands(self):
+		self.uci.handle('position startpos moves e2e5')
+		self.assertTrue(self.lines[-1].startswith('info string bad command'))
+		self.uci.handle('frobnicate')
+		self.assertEqual(self.lines[-1], 'info string unknown command frobnicate')
+		self.assertFalse(self.uci.handle('quit'))
+
+	def test_GoDepth(self):
+		self.uci.handle('position fen 6k1/5ppp/8/8/8/8/5PPP/R5K1 w - - 0 1')
+		self.uci.handle('go depth 3')
+		self.assertEqual(self.waitFor('bestmove'), 'bestmove a1a8')
+		self.assertTrue(any(line.startswith('info depth 1') for line in self.lines))
+
+	def test_GoMate(self):
+		# Mate in one is searched one ply deep.
+		self.uci.handle('position fen 6k1/5ppp/8/8/8/8/5PPP/R5K1 w - - 0 1')
+		self.uci.handle('go mate 1')
+		self.assertEqual(self.waitFor('bestmove'), 'bestmove a1a8')
+		self.assertFalse(any(line.startswith('info depth 2') for line in self.lines))
+
+	def test_GoSearchmoves(self):
+		self.uci.handle('position fen 6k1/5ppp/8/8/8/8/5PPP/R5K1 w - - 0 1')
+		self.uci.handle('go depth 3 searchmoves g1f1 a1a2')
+		self.assertIn(self.waitFor('bestmove').split()[1], ['g1f1', 'a1a2'])
+
+		self.uci.handle('go depth 3 searchmoves a1a9')
+		self.assertTrue(self.lines[-1].startswith('info string bad command'))
+
+	def test_Debug(self):
+		self.uci.handle('position startpos')
+		self.uci.handle('go depth 2')
+		self.waitFor('bestmove')
+		self.assertFalse(any(line.startswith('info string') for line in self.lines))
+
+		self.uci.handle('debug on')
+		self.uci.handle('go movetime 100')
+		self.assertIn('info string time soft 70 hard 70', self.lines)
+		self.waitFor('info string searched')
+
+	def test_StopInfinite(self):
+		self.uci.handle('position startpos')
+		self.uci.handle('go infinite')
+		self.waitFor('info depth 1')
+
+		start = time.perf_counter()
+		self.uci.handle('isready')
+		self.assertEqual(self.lines[-1], 'readyok')
+		self.uci.handle('stop')
+		self.assertLess(time.perf_counter() - start, 1.0)
+		self.assertTrue(self.lines[-1].startswith('bestmove'))
+		self.assertIsNotNone(Move.fromLongAlgebraic(self.lines[-1].split()[1], Position()))
+
+	def test_InfiniteWaitsForStop(self):
+		# The search ends by itself on finding mate, but bestmove has to wait for stop.
+		self.uci.handle('position fen 6k1/5ppp/8/8/8/8/5PPP/R5K1 w - - 0 1')
+		self.uci.handle('go infinite')
+		self.waitFor('info depth 1')
+		time.sleep(0.05)
+		self.assertFalse(any(line.startswith('bestmove') for line in self.lines))
+		self.uci.handle('stop')
+		self.assertEqual(self.lines[-1], 'bestmove a1a8')
+
+	def test_StopBeforeSearchStarts(self):
+		for i in range(20):
+			self.uci.handle('position startpos')
+			self.uci.handle('go infinite')
+			self.uci.handle('stop')
+		self.assertEqual(sum(1 for line in self.lines if line.startswith('bestmove')), 20)
+
+	def test_Ponderhit(self):
+		self.uci.handle('position startpos moves e2e4')
+		self.uci.handle('go ponder wtime 1000 btime 1000 movestogo 10')
+		self.waitFor('info depth 3')
+		# Pondering isn't limited by our clock.
+		time.sleep(0.4)
+		self.assertFalse(any(line.startswith('bestmove') for line in self.lines))
+
+		seen = len(self.lines)
+		start = time.perf_counter()
+		self.uci.handle('ponderhit')
+		self.waitFor('bestmove')
+		self.assertLess(time.perf_counter() - start, 0.4 + 0.5)
+		# The search carried on from where it was instead of starting over.
+		self.assertFalse(any(line.startswith('info depth 1 ') for line in self.lines[seen:]))
+
+	def test_PonderFinishedEarly(self):
+		self.uci.handle('position fen 6k1/5ppp/8/8/8/8/5PPP/R5K1 w - - 0 1')
+		self.uci.handle('go ponder wtime 1000 btime 1000')
+		self.waitFor('info depth 1')
+		time.sleep(0.05)
+		self.assertFalse(any(line.startswith('bestmove') for line in self.lines))
+		self.uci.handle('ponderhit')
+		self.assertEqual(self.waitFor('bestmove'), 'bestmove a1a8')
+
+	def test_BestmovePonder(self):
+		self.uci.handle('position startpos')
+		self.uci.handle('go depth 3')
+		tokens = self.waitFor('bestmove').split()
+		self.assertEqual(tokens[2], 'ponder')
+		position = Position()
+		position.makeMove(Move.fromLongAlgebraic(tokens[1], position))
+		self.assertIsNotNone(Move.fromLongAlgebraic(tokens[3], position))
+
+	def test_SetOption(self):
+		self.uci.handle('setoption name Hash value 2')
+		self.assertEqual(self.uci.engine.tt.megabytes, 2)
+		self.uci.handle('setoption name Threads value 4')
+		self.assertEqual(self.uci.engine.threads, 4)
+		self.uci.handle('setoption name Nonexistent Option value 3')
+		self.assertEqual(self.lines[-1], 'info string unknown option Nonexistent Option')
+
+	def test_GoClock(self):
+		self.uci.handle('setoption name Move Overhead value 10')
+		self.assertEqual(self.uci.moveOverhead, 10)
+		self.uci.handle('position startpos')
+		start = time.perf_counter()
+		self.uci.handle('go wtime 2000 btime 2000 movestogo 10')
+		self.waitFor('bestmove')
+		# Never more than the hard limit of 4 x 2000 / 10 milliseconds, plus a margin for slow machines.
+		self.assertLess(time.perf_counter() - start, 0.8 + 0.5)
+
+class LogTests(unittest.TestCase):
+
+	def test_BufferedLog(self):
+		with tempfile.TemporaryDirectory() as directory:
+			path = os.path.join(directory, 'uci.log')
+			handler = enableLog(path)
+			try:
+				uci = Uci(output=lambda line: None)
+				uci.handle('isready')
+				# Nothing is written until the buffer fills or is flushed.
+				self.assertEqual(os.path.getsize(path), 0)
+				handler.flush()
+				with open(path) as f:
+					log = f.read()
+			finally:
+				logger.removeHandler(handler)
+				handler.close()
+				logger.setLevel(logging.NOTSET)
+
+		self.assertIn('<< isready', log)
+		self.assertIn('>> readyok', log)
+
+if __name__ == '__main__':
+	unittest.main()
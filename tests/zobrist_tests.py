@@ -0,0 +1,120 @@
+import sys
+sys.path.append('../majikthise')
+
+import unittest
+
+from bitboard import *
+from board import *
+from movegen import *
+from constants import *
+
+class ZobristTests(unittest.TestCase):
+
+	@classmethod
+	def setUpClass(cls):
+		initBitboards()
+
+	def assertKeyConsistent(self, position):
+		self.assertEqual(position.key, position.computeKey())
+
+	def test_StartingPosition(self):
+		position = Position()
+		self.assertKeyConsistent(position)
+		self.assertEqual(position.key, Position().key)
+		self.assertNotEqual(position.key, 0)
+
+	def test_SideToMoveChangesKey(self):
+		white = Position()
+		black = Position()
+		black.sideToMove = BLACK
+		self.assertNotEqual(white.key, black.key)
+		self.assertKeyConsistent(black)
+
+	def test_CastlingRightsChangeKey(self):
+		position = Position()
+		key = position.key
+		position.wqCastle = 0
+		self.assertNotEqual(position.key, key)
+		self.assertKeyConsistent(position)
+		self.assertEqual(position.key, Position('rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w Kkq - 0 1').key)
+		position.wqCastle = 1
+		self.assertEqual(position.key, key)
+
+	def test_EnPassantSquareChangesKey(self):
+		position = Position()
+		key = position.key
+		position.epTargetSquare = Square.E3
+		self.assertNotEqual(position.key, key)
+		self.assertKeyConsistent(position)
+		position.epTargetSquare = Square.NONE
+		self.assertEqual(position.key, key)
+
+	def test_EqualPositionsHashEqually(self):
+		# Positions that differ only in the en passant square are different positions.
+		withEp = Position('rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq e3 0 1')
+		withoutEp = Position('rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq - 0 1')
+		self.assertNotEqual(withEp, withoutEp)
+		self.assertEqual(len({withEp, withoutEp}), 2)
+
+		same = Position('rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq e3 0 1')
+		self.assertEqual(withEp, same)
+		self.assertEqual(hash(withEp), hash(same))
+		self.assertEqual(len({withEp, same}), 1)
+
+	def test_MakeMove_MatchesFen(self):
+		position = Position()
+		position.makeMove(Move(Square.E2, Square.E4, 0x01))
+		position.makeMove(Move(Square.D7, Square.D5, 0x01))
+		position.makeMove(Move(Square.E4, Square.D5, 0x04, capturedPieceType=PAWN))
+
+		expected = Position('rnbqkbnr/ppp1pppp/8/3P4/8/8/PPPP1PPP/RNBQKBNR b KQkq - 0 1')
+		expected.sideToMove = BLACK
+		self.assertKeyConsistent(position)
+		self.assertEqual(position.key, expected.key)
+
+	def test_Castling_MatchesFen(self):
+		position = Position('rnbqk2r/ppppbppp/5n2/4p3/4P3/5N2/PPPPBPPP/RNBQK2R w KQkq - 0 1')
+		position.makeMove(Move(Square.E1, Square.G1, flag=0x02))
+		position.makeMove(Move(Square.E8, Square.G8, flag=0x02))
+
+		expected = Position('rnbq1rk1/ppppbppp/5n2/4p3/4P3/5N2/PPPPBPPP/RNBQ1RK1 w - - 0 1')
+		self.assertKeyConsistent(position)
+		self.assertEqual(position.key, expected.key)
+
+	def test_UnmakeMove_RestoresKey(self):
+		position = Position('rnbqk2r/ppppbppp/5n2/4p3/4P3/5N2/PPPPBPPP/RNBQK2R w KQkq - 0 1')
+		key = position.key
+		moves = [Move(Square.E1, Square.G1, flag=0x02), Move(Square.F6, Square.E4, 0x04, capturedPieceType=PAWN)]
+		for move in moves:
+			position.makeMove(move)
+		for move in moves[::-1]:
+			position.unmakeMove(move)
+		self.assertEqual(position.key, key)
+
+	def test_Transposition(self):
+		first = Position()
+		second = Position()
+		for move in [Move(Square.G1, Square.F3), Move(Square.G8, Square.F6), Move(Square.B1, Square.C3), Move(Square.B8, Square.C6)]:
+			first.makeMove(move)
+		for move in [Move(Square.B1, Square.C3), Move(Square.B8, Square.C6), Move(Square.G1, Square.F3), Move(Square.G8, Square.F6)]:
+			second.makeMove(move)
+		self.assertEqual(first.key, second.key)
+		self.assertEqual(hash(first), hash(second))
+
+	def test_IncrementalKey_Tree(self):
+		# Walk a small tree and check the incremental key against a full recompute at every node.
+		def walk(position, depth):
+			self.assertKeyConsistent(position)
+			if depth == 0:
+				return
+			for move in generateAllMoves(position):
+				key = position.key
+				position.makeMove(move)
+				walk(position, depth - 1)
+				position.unmakeMove(move)
+				self.assertEqual(position.key, key)
+
+		walk(Position('r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1'), 2)
+
+if __name__ == '__main__':
+	unittest.main()